@@ -4,6 +4,9 @@ __init__.py — Intégration EnOcean (custom, patchée) + services d’associati
 
 - Setup identique au core (dongle + dispatcher), mais on rajoute :
   * services 'association_listen' et 'association_d2_teach'
+  * service 'link_status' (compteurs du superviseur de lien série)
+  * service 'measure_latency' (délai lecture → dispatch, standard vs basse latence)
+  * service 'ute_accept' (fenêtre d’acceptation des teach-in UTE)
 """
 
 from __future__ import annotations
@@ -11,11 +14,27 @@ import voluptuous as vol
 
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
 from homeassistant.const import CONF_DEVICE
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DATA_ENOCEAN, DOMAIN, ENOCEAN_DONGLE
+from .const import (
+    CONF_CONFIRM_RETRIES,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_LOW_LATENCY,
+    CONF_RATE_LIMIT_BURST,
+    CONF_RATE_LIMIT_RATE,
+    CONF_SENDER_FILTER,
+    DATA_ENOCEAN,
+    DEFAULT_CONFIRM_RETRIES,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_LOW_LATENCY,
+    DEFAULT_RATE_LIMIT_BURST,
+    DEFAULT_RATE_LIMIT_RATE,
+    DEFAULT_SENDER_FILTER,
+    DOMAIN,
+    ENOCEAN_DONGLE,
+)
 from .dongle import EnOceanDongle
 from .association import AssociationManager  # <-- new
 
@@ -41,31 +60,36 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Instancie le dongle et enregistre les services."""
     enocean_data = hass.data.setdefault(DATA_ENOCEAN, {})
-    usb_dongle = EnOceanDongle(hass, entry.data[CONF_DEVICE])
+    usb_dongle = EnOceanDongle(
+        hass,
+        entry.data[CONF_DEVICE],
+        sender_filter=entry.options.get(CONF_SENDER_FILTER, DEFAULT_SENDER_FILTER),
+        rate_limit_burst=entry.options.get(CONF_RATE_LIMIT_BURST, DEFAULT_RATE_LIMIT_BURST),
+        rate_limit_rate=entry.options.get(CONF_RATE_LIMIT_RATE, DEFAULT_RATE_LIMIT_RATE),
+        confirm_timeout=entry.options.get(CONF_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_TIMEOUT),
+        confirm_retries=entry.options.get(CONF_CONFIRM_RETRIES, DEFAULT_CONFIRM_RETRIES),
+        low_latency=entry.options.get(CONF_LOW_LATENCY, DEFAULT_LOW_LATENCY),
+    )
     await usb_dongle.async_setup()
     enocean_data[ENOCEAN_DONGLE] = usb_dongle
+    # Les entités YAML ont pu se déclarer avant la création du dongle
+    usb_dongle.refresh_sender_filter()
+    # Rechargement de l’entrée quand les options changent
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     # --- Services d’association ---
-    assoc = AssociationManager(hass, usb_dongle._communicator)  # type: ignore[attr-defined]
+    # On passe le dongle (et non le communicateur) : ce dernier change à chaque reconnexion
+    assoc = AssociationManager(hass, usb_dongle)
 
-    async def _svc_listen(call: ServiceCall):
-        """Service: association_listen (écoute teach-in)."""
+    async def _svc_listen(call: ServiceCall) -> ServiceResponse:
+        """Service: association_listen (collecte des teach-in de la fenêtre)."""
         timeout = int(call.data.get("timeout", 15))
         respond_ute = bool(call.data.get("respond_ute", True))
 
-        # On passe par l'executor (receive() bloque)
-        res = await hass.async_add_executor_job(assoc.listen_once, timeout, respond_ute)
-        if res:
-            # Publie un évènement facile à consommer dans des automatisations / UI
-            hass.bus.async_fire(
-                "enocean_association_found",
-                {
-                    "sender": res.sender,
-                    "rorg": res.rorg,
-                    "raw": res.raw,
-                    "description": res.description,
-                },
-            )
+        # On passe par l'executor (l’écoute bloque pendant la fenêtre) ;
+        # chaque teach-in distinct publie déjà 'enocean_association_found'
+        found = await hass.async_add_executor_job(assoc.listen_once, timeout, respond_ute)
+        return {"teach_ins": [teach_in.as_dict() for teach_in in found]}
 
     async def _svc_d2_teach(call: ServiceCall):
         """Service: association_d2_teach (envoi D2-01 ON/OFF répété)."""
@@ -77,21 +101,64 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # Executor (envoi + petites pauses)
         await hass.async_add_executor_job(assoc.send_d2_01, target, channel, on, repeats)
 
-    hass.services.async_register(DOMAIN, "association_listen", _svc_listen)
+    async def _svc_link_status(call: ServiceCall) -> ServiceResponse:
+        """Service: link_status (lien, filtrage, file d'émission, RTT des commandes)."""
+        return usb_dongle.stats()
+
+    async def _svc_measure_latency(call: ServiceCall) -> ServiceResponse:
+        """Service: measure_latency (compare mode standard et basse latence)."""
+        return await usb_dongle.async_measure_latency(float(call.data.get("duration", 10)))
+
+    async def _svc_ute_accept(call: ServiceCall) -> None:
+        """Service: ute_accept (accepte toutes les requêtes UTE pendant la fenêtre)."""
+        if usb_dongle.ute is not None:
+            usb_dongle.ute.async_open_window(float(call.data.get("duration", 60)))
+
+    hass.services.async_register(
+        DOMAIN, "association_listen", _svc_listen, supports_response=SupportsResponse.OPTIONAL
+    )
     hass.services.async_register(DOMAIN, "association_d2_teach", _svc_d2_teach)
+    hass.services.async_register(
+        DOMAIN, "link_status", _svc_link_status, supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "ute_accept",
+        _svc_ute_accept,
+        schema=vol.Schema(
+            {vol.Optional("duration", default=60): vol.All(vol.Coerce(float), vol.Range(min=1, max=600))}
+        ),
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "measure_latency",
+        _svc_measure_latency,
+        schema=vol.Schema(
+            {vol.Optional("duration", default=10): vol.All(vol.Coerce(float), vol.Range(min=1, max=300))}
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
 
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Options modifiées : on recharge l’entrée pour reconstruire le dongle."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Nettoyage à la suppression de l’intégration."""
     enocean_dongle = hass.data[DATA_ENOCEAN][ENOCEAN_DONGLE]
     enocean_dongle.unload()
-    hass.data.pop(DATA_ENOCEAN, None)
+    # On ne retire que le dongle : les émetteurs déclarés par les entités YAML restent valables
+    hass.data[DATA_ENOCEAN].pop(ENOCEAN_DONGLE, None)
 
     # Désenregistrer les services pour être propre
     try:
         hass.services.async_remove(DOMAIN, "association_listen")
         hass.services.async_remove(DOMAIN, "association_d2_teach")
+        hass.services.async_remove(DOMAIN, "link_status")
+        hass.services.async_remove(DOMAIN, "measure_latency")
+        hass.services.async_remove(DOMAIN, "ute_accept")
     except Exception:
         pass
     return True
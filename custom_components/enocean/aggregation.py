@@ -0,0 +1,74 @@
+# custom_components/enocean/aggregation.py
+# -*- coding: utf-8 -*-
+"""
+aggregation.py — Agrégation en flux des mesures capteurs (sous-échantillonnage).
+
+Un compteur qui émet toutes les quelques secondes génère des millions de lignes
+recorder par mois. On accumule les valeurs reçues sur une fenêtre de temps et
+on ne publie qu'un état par fenêtre (moyenne, min, max ou dernière valeur).
+
+L'accumulateur est en flux : mémoire constante, aucune liste de valeurs.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+AGGREGATE_MEAN = "mean"
+AGGREGATE_MIN = "min"
+AGGREGATE_MAX = "max"
+AGGREGATE_LAST = "last"
+AGGREGATE_MODES = [AGGREGATE_MEAN, AGGREGATE_MIN, AGGREGATE_MAX, AGGREGATE_LAST]
+
+
+class WindowAccumulator:
+    """Accumule count/somme/min/max/dernière valeur d'une fenêtre."""
+
+    __slots__ = ("count", "total", "minimum", "maximum", "last")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Vide l'accumulateur (début de fenêtre)."""
+        self.count = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.last: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        """Ajoute une mesure."""
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        self.last = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Moyenne arithmétique de la fenêtre (None si vide)."""
+        return self.total / self.count if self.count else None
+
+    def result(self, mode: str) -> Optional[float]:
+        """Valeur à publier selon le mode d'agrégation."""
+        if mode == AGGREGATE_MEAN:
+            return self.mean
+        if mode == AGGREGATE_MIN:
+            return self.minimum
+        if mode == AGGREGATE_MAX:
+            return self.maximum
+        return self.last
+
+    def attributes(self, ndigits: int) -> dict:
+        """Attributs d'état conservant l'information de la fenêtre."""
+        mean = self.mean
+        return {
+            "aggregate_mean": round(mean, ndigits) if mean is not None else None,
+            "aggregate_min": self.minimum,
+            "aggregate_max": self.maximum,
+            "aggregate_last": self.last,
+            "aggregate_count": self.count,
+        }
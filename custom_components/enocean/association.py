@@ -4,27 +4,33 @@
 association.py — Gestion de l'association (teach-in) et d'envois D2 simples.
 
 Ce module fournit une classe AssociationManager utilisée par __init__.py :
-- listen_once(timeout, respond_ute): écoute un teach-in puis s'arrête (alias de listen).
-- listen(timeout, respond_ute): idem, version "canonique" (bloquante côté thread exécuteur).
-- stop_listen(): coupe l'écoute et libère le callback.
+- listen_once(timeout, respond_ute): alias de listen.
+- listen(timeout, respond_ute): écoute pendant toute la fenêtre et collecte chaque
+  teach-in distinct (bits LRN décodés par teachin.py ; les télégrammes de données
+  des autres appareils sont ignorés). Bloquante côté thread exécuteur.
+- stop_listen(): coupe l'écoute avant la fin de la fenêtre.
 - d2_teach_in(receiver_id, channel, action, repeats): envoie un D2-01 (ON/OFF) minimal.
 
 Notes:
 - Le code est prévu pour être appelé via hass.async_add_executor_job(...) depuis __init__.py
   afin de ne JAMAIS bloquer la boucle événementielle d’Home Assistant.
-- On gère proprement la pose/retrait du receive_callback du communicator.
+- L'écoute passe par dongle.teach_in_listener, appelé dans le thread de lecture
+  pour chaque trame radio (avant la limitation de débit).
 """
 
 from __future__ import annotations
 
 import logging
+import threading
 import time
-from typing import Optional
 
-from enocean.protocol.packet import RadioPacket, Packet  # type: ignore
+from enocean.protocol.packet import Packet  # type: ignore
 from enocean.protocol.constants import PACKET  # type: ignore
 from enocean.communicators import SerialCommunicator  # type: ignore
 
+from .telegram import Telegram
+from .teachin import TeachIn, decode_teach_in
+
 _LOGGER = logging.getLogger(__name__)
 
 # Nom d’évènement HA publié à la détection d’un teach-in (utile pour debogage/automations).
@@ -34,107 +40,93 @@ EVENT_ENOCEAN_ID_DISCOVERED = "enocean_association_found"
 class AssociationManager:
     """Pilote l'écoute teach-in et l'envoi D2-01."""
 
-    def __init__(self, hass, communicator: SerialCommunicator) -> None:
+    def __init__(self, hass, dongle) -> None:
         # Référence au core HA (pour bus d'évènements)
         self.hass = hass
-        # Communicator EnOcean actif (déjà démarré par l’intégration)
-        self._comm = communicator
-        # Drapeau d’écoute en cours
+        # Dongle de l’intégration (le communicateur peut être recréé par le superviseur)
+        self._dongle = dongle
+        # Drapeau d’écoute en cours + signal d’arrêt anticipé
         self._listening = False
+        self._stop_event = threading.Event()
+
+    @property
+    def _comm(self) -> SerialCommunicator:
+        """Communicator EnOcean actif (résolu à chaque appel)."""
+        return self._dongle.communicator
 
     # ---------------------------------------------------------------------
     # API attendue par __init__.py
     # ---------------------------------------------------------------------
-    def listen_once(self, timeout: int = 15, respond_ute: bool = True) -> None:
+    def listen_once(self, timeout: int = 15, respond_ute: bool = True) -> list[TeachIn]:
         """Alias conservant la signature attendue par __init__.py."""
         # On délègue à la méthode canonique 'listen'
-        self.listen(timeout=timeout, respond_ute=respond_ute)
+        return self.listen(timeout=timeout, respond_ute=respond_ute)
 
     # ---------------------------------------------------------------------
     # ÉCOUTE TEACH-IN
     # ---------------------------------------------------------------------
-    def listen(self, timeout: int = 15, respond_ute: bool = True) -> None:
+    def listen(self, timeout: int = 15, respond_ute: bool = True) -> list[TeachIn]:
         """
-        Écoute le prochain teach-in reçu par le dongle, publie un évènement HA,
-        tente une réponse UTE si possible, puis s’arrête.
-        Bloque le thread appelant jusqu’à réception ou expiration du délai.
+        Écoute les teach-in pendant `timeout` s et retourne chaque teach-in distinct
+        (un par émetteur, dans l’ordre d’arrivée, avec le nombre de répétitions).
+        Un évènement HA est publié à la première détection de chaque émetteur.
+        Bloque le thread appelant jusqu’à la fin de la fenêtre (ou stop_listen()).
         """
         if self._listening:
             _LOGGER.debug("Association: écoute déjà en cours, on ignore la nouvelle demande.")
-            return
+            return []
 
         self._listening = True
-        deadline = time.time() + max(1, int(timeout))
-
-        def _on_packet(pkt: Packet) -> None:
-            """Callback interne appelé par le communicator pour chaque trame radio."""
-            if not self._listening:
+        self._stop_event.clear()
+        found: dict[int, TeachIn] = {}
+        # L’appareil à associer n’est pas encore configuré : la liste blanche doit le laisser passer
+        self._dongle.pause_sender_filter()
+        # Réponse UTE : fenêtre "tout accepter" du répondeur pendant l’écoute
+        if respond_ute and self._dongle.ute is not None:
+            self.hass.loop.call_soon_threadsafe(self._dongle.ute.async_open_window, timeout)
+
+        def _on_packet(pkt: Telegram) -> None:
+            """Appelé dans le thread de lecture pour chaque trame radio."""
+            teach_in = decode_teach_in(pkt)
+            if teach_in is None:
                 return
-
-            # On filtre les trames radio
-            if isinstance(pkt, RadioPacket) and pkt.rorg is not None:
-                # Récupération tolérante des infos utiles (peut varier selon la lib)
-                try:
-                    sender = list(pkt.sender) if hasattr(pkt, "sender") else None
-                    raw = list(pkt.data) if hasattr(pkt, "data") else None
-                except Exception:
-                    sender, raw = None, None
-
-                # On notifie Home Assistant via le bus d'évènements (debug/automation possible)
-                try:
-                    self.hass.bus.async_fire(
-                        EVENT_ENOCEAN_ID_DISCOVERED,
-                        {"sender": sender, "rorg": int(pkt.rorg), "raw": raw},
-                    )
-                except Exception:
-                    # On ne casse jamais l’écoute pour un souci d’évènement
-                    _LOGGER.exception("Association: échec publication d’évènement HA (ignoré).")
-
-                _LOGGER.info("Association: teach-in détecté (sender=%s rorg=0x%02X).", sender, int(pkt.rorg))
-
-                # Tentative de réponse UTE si la lib le permet
-                if respond_ute and hasattr(pkt, "send_response"):
-                    try:
-                        pkt.send_response()  # certaines versions de python-enocean l'exposent
-                        _LOGGER.info("Association: réponse UTE envoyée.")
-                    except Exception as exc:
-                        _LOGGER.warning("Association: échec réponse UTE: %s", exc)
-                else:
-                    if respond_ute:
-                        _LOGGER.debug("Association: send_response() non dispo dans cette version de python-enocean.")
-
-                # On a traité un teach-in → on arrête l’écoute
-                self.stop_listen()
-
-        # Armement du callback de réception
-        self._comm.receive_callback = _on_packet
+            known = found.get(teach_in.sender)
+            if known is not None:
+                known.count += 1
+                return
+            teach_in.dbm = pkt.dbm
+            found[teach_in.sender] = teach_in
+            _LOGGER.info("Association: teach-in détecté (%s).", teach_in.description)
+            try:
+                # bus.fire est sûr depuis un autre thread que la boucle
+                self.hass.bus.fire(EVENT_ENOCEAN_ID_DISCOVERED, teach_in.as_dict())
+            except Exception:
+                # On ne casse jamais l’écoute pour un souci d’évènement
+                _LOGGER.exception("Association: échec publication d’évènement HA (ignoré).")
+
+        self._dongle.teach_in_listener = _on_packet
         _LOGGER.info(
             "Association: écoute teach-in démarrée pour %ss (respond_ute=%s).",
             timeout,
             respond_ute,
         )
 
-        # Petite boucle d'attente (non-async, on est dans un thread d'executor)
         try:
-            while self._listening and time.time() < deadline:
-                time.sleep(0.05)
+            self._stop_event.wait(max(1, int(timeout)))
         finally:
-            # Si on a expiré sans recevoir, on libère proprement
-            if self._listening:
-                _LOGGER.info("Association: fin d’écoute (timeout %ss), aucun teach-in reçu.", timeout)
-                self.stop_listen()
+            self._dongle.teach_in_listener = None
+            self._listening = False
+            self._dongle.resume_sender_filter()
+
+        _LOGGER.info(
+            "Association: fin d’écoute, %d teach-in distinct(s) reçu(s).", len(found)
+        )
+        return list(found.values())
 
     def stop_listen(self) -> None:
-        """Coupe l’écoute teach-in et libère le callback communicator."""
-        if not self._listening:
-            return
-        self._listening = False
-        # On retire le callback pour ne pas interférer avec le fonctionnement normal
-        try:
-            if getattr(self._comm, "receive_callback", None) is not None:
-                self._comm.receive_callback = None
-        finally:
-            _LOGGER.debug("Association: écoute arrêtée et callback libéré.")
+        """Coupe l’écoute teach-in avant la fin de la fenêtre."""
+        if self._listening:
+            self._stop_event.set()
 
     # ---------------------------------------------------------------------
     # ENVOI D2-01 (ON/OFF) — utile pendant LRN de certains actionneurs
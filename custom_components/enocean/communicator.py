@@ -0,0 +1,443 @@
+# custom_components/enocean/communicator.py
+# -*- coding: utf-8 -*-
+"""
+communicator.py — Communicateurs EnOcean (série et TCP) adaptés à l'intégration.
+
+Socle commun (_EnOceanCommunicatorMixin) :
+- un pré-filtre optionnel par émetteur (liste blanche) appliqué sur les octets
+  bruts du buffer ESP3, AVANT la construction des objets Packet/RadioPacket :
+  les télégrammes des appareils voisins non configurés sont jetés (et comptés)
+  sans allocation ni dispatch.
+- l'émission directe de trames précalculées (frames.RawFrame), sans Packet.
+- en mode `telegrams` (dongle dans HA), les trames radio deviennent des
+  telegram.Telegram construits directement depuis le buffer, sans RadioPacket ;
+  les autres trames (réponses, évènements) passent toujours par parse_msg().
+- la mesure du délai lecture → dispatch : depuis la lecture du premier octet
+  d'une trame jusqu'à la remise du Packet au callback (histogramme `latency`).
+
+Transports :
+- EnOceanSerialCommunicator : port série local (SerialCommunicator python-enocean),
+  avec un mode basse latence optionnel pour les puces FTDI (USB300…).
+- EnOceanTcpCommunicator : passerelle réseau (ser2net…) en ESP3 brut sur TCP,
+  adresse "tcp://hôte:port" ; Nagle désactivé, lectures non bloquantes
+  (select) et reconnexion automatique sans perdre la file d'émission.
+
+Les télégrammes UTE (RORG 0xD4) passent toujours le filtre (teach-in).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import select
+import socket
+import time
+from typing import AbstractSet, Optional
+from urllib.parse import urlsplit
+
+import serial  # type: ignore
+from enocean.communicators import SerialCommunicator  # type: ignore
+from enocean.communicators.communicator import Communicator  # type: ignore
+from enocean.protocol import crc8  # type: ignore
+from enocean.protocol.constants import PACKET, PARSE_RESULT, RORG  # type: ignore
+from enocean.protocol.packet import Packet  # type: ignore
+
+from .confirmation import RttHistogram
+from .frames import ESP3_HEADER_LEN, RawFrame
+from .telegram import frame_sender, radio_frame_length, telegram_from_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+# Transport TCP
+TCP_SCHEME = "tcp"
+TCP_DEFAULT_PORT = 9637           # port par défaut de python-enocean (TCPCommunicator)
+TCP_CONNECT_TIMEOUT = 3.0         # délai de connexion (s)
+TCP_POLL_INTERVAL = 0.05          # attente max de données à lire par tour de boucle (s)
+TCP_READ_SIZE = 4096              # lecture bufferisée
+TCP_RECONNECT_MIN = 1.0           # backoff de reconnexion (s)
+TCP_RECONNECT_MAX = 30.0
+
+# Mode basse latence (série)
+SERIAL_READ_SIZE = 16             # lecture standard (comme SerialCommunicator)
+SERIAL_TIMEOUT = 0.1              # timeout de lecture standard (s)
+LOW_LATENCY_TIMEOUT = 0.02        # timeout en basse latence : la file d'émission est servie plus vite
+FTDI_LATENCY_TIMER_MS = 1         # latency_timer FTDI (défaut noyau : 16 ms)
+SYSFS_LATENCY_TIMER = "/sys/bus/usb-serial/devices/{tty}/latency_timer"
+
+# Classes (ms) de l'histogramme lecture → dispatch
+RX_LATENCY_BUCKETS_MS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def parse_tcp_url(device: str) -> Optional[tuple[str, int]]:
+    """'tcp://hôte:port' → (hôte, port) ; None si ce n'est pas une adresse TCP."""
+    if not device or not device.lower().startswith(f"{TCP_SCHEME}://"):
+        return None
+    parts = urlsplit(device)
+    if not parts.hostname:
+        raise ValueError(f"Adresse TCP invalide : {device}")
+    return parts.hostname, parts.port or TCP_DEFAULT_PORT
+
+
+class _EnOceanCommunicatorMixin:
+    """Réception ESP3 (pré-filtre + callback) et émission de RawFrame, communes aux transports."""
+
+    def _init_rx(self, callback, sender_filter: Optional[AbstractSet[int]]) -> None:
+        """À appeler dans __init__ après celui du communicateur python-enocean."""
+        # On garde notre propre référence au callback (celui du parent est name-mangled)
+        self._rx_callback = callback
+        # Liste blanche d'IDs émetteurs (entiers 32 bits) ; None = filtre désactivé
+        self.sender_filter: Optional[AbstractSet[int]] = sender_filter
+        # Nombre de télégrammes jetés par le filtre
+        self.dropped = 0
+        # Trames radio livrées en Telegram (True) ou en RadioPacket (False)
+        self.telegrams = False
+        # Délai lecture → dispatch : instant de lecture du début de la trame en tête de buffer
+        self.latency = RttHistogram(RX_LATENCY_BUCKETS_MS)
+        self._rx_since: Optional[float] = None
+        self._last_read = 0.0
+
+    def _feed(self, data: bytes) -> None:
+        """Ajoute des octets lus au buffer ESP3 (horodatage pour la mesure de latence)."""
+        now = time.monotonic()
+        if not self._buffer:
+            self._rx_since = now
+        self._last_read = now
+        self._buffer.extend(data)
+
+    def send(self, packet) -> bool:
+        """Accepte aussi les trames précalculées (RawFrame) en plus des Packet."""
+        if isinstance(packet, RawFrame):
+            self.transmit.put(packet)
+            return True
+        return super().send(packet)
+
+    def parse(self):
+        """Comme Communicator.parse(), précédé du pré-filtre sur l'entête de buffer."""
+        while True:
+            allowed = self.sender_filter
+            if self.telegrams and (msg_len := self._radio_head_length()):
+                buf = self._buffer
+                sender = frame_sender(buf)
+                if allowed is not None and sender not in allowed and buf[6] != RORG.UTE:
+                    self.dropped += 1
+                else:
+                    self._deliver(telegram_from_frame(buf, sender))
+                del buf[:msg_len]
+                self._rx_since = self._last_read if buf else None
+                continue
+
+            if allowed is not None and self._drop_foreign_head(allowed):
+                self._rx_since = self._last_read if self._buffer else None
+                continue
+
+            status, self._buffer, packet = Packet.parse_msg(self._buffer, communicator=self)
+            # Message incomplet : on attend la suite
+            if status == PARSE_RESULT.INCOMPLETE:
+                return status
+
+            if status == PARSE_RESULT.OK and packet:
+                self._deliver(packet)
+            # La trame suivante (s'il en reste) est arrivée au plus tôt à la dernière lecture
+            self._rx_since = self._last_read if self._buffer else None
+
+    def _deliver(self, packet) -> None:
+        """Remet une trame au callback (ou à la file receive) et mesure la latence."""
+        if self._rx_callback is None:
+            self.receive.put(packet)
+        else:
+            self._rx_callback(packet)
+        if self._rx_since is not None:
+            self.latency.add((time.monotonic() - self._rx_since) * 1000.0)
+        self.logger.debug(packet)
+
+    def _radio_head_length(self) -> int:
+        """Aligne le buffer sur l'octet de synchro ; longueur de la trame radio en tête (0 sinon)."""
+        buf = self._buffer
+        if buf and buf[0] != 0x55:
+            try:
+                del buf[:buf.index(0x55)]
+            except ValueError:
+                return 0
+        return radio_frame_length(buf)
+
+    def _drop_foreign_head(self, allowed: AbstractSet[int]) -> bool:
+        """
+        Jette la trame en tête de buffer si c'est un télégramme radio complet
+        dont l'émetteur n'est pas dans `allowed`. Retourne True si jetée.
+
+        Les cas douteux (entête incomplète ou CRC entête faux, trame non radio)
+        sont laissés à Packet.parse_msg().
+        """
+        buf = self._buffer
+        try:
+            start = buf.index(0x55)
+        except ValueError:
+            return False
+        if start:
+            # parse_msg() ignore de toute façon ce qui précède l'octet de synchro
+            del buf[:start]
+
+        if len(buf) < ESP3_HEADER_LEN:
+            return False
+        data_len = (buf[1] << 8) | buf[2]
+        msg_len = ESP3_HEADER_LEN + data_len + buf[3] + 1
+        if (
+            len(buf) < msg_len
+            or buf[4] != PACKET.RADIO
+            or data_len < 6
+            or buf[6] == RORG.UTE
+            or buf[5] != crc8.calc(buf[1:5])
+        ):
+            return False
+
+        # ERP1 : data = RORG | payload | sender(4) | status → sender = data[-5:-1]
+        sender = (
+            (buf[data_len + 1] << 24)
+            | (buf[data_len + 2] << 16)
+            | (buf[data_len + 3] << 8)
+            | buf[data_len + 4]
+        )
+        if sender in allowed:
+            return False
+
+        del buf[:msg_len]
+        self.dropped += 1
+        return True
+
+
+class EnOceanSerialCommunicator(_EnOceanCommunicatorMixin, SerialCommunicator):
+    """
+    SerialCommunicator avec pré-filtre des émetteurs sur le flux brut.
+
+    Mode basse latence (optionnel, réglable à chaud via set_low_latency) :
+    - ASYNC_LOW_LATENCY sur le port (pyserial set_low_latency_mode) ;
+    - latency_timer FTDI ramené à 1 ms via sysfs quand c'est permis (réglage
+      du périphérique, qui survit au port : restauré par stop()) ;
+    - lectures de ce qui est disponible (au moins 1 octet) au lieu de blocs de
+      16 octets : une trame de 21 octets n'attend plus le timeout de 100 ms
+      pour ses 5 derniers octets.
+    """
+
+    logger = logging.getLogger("enocean.communicators.EnOceanSerialCommunicator")
+
+    def __init__(
+        self,
+        port: str,
+        callback=None,
+        sender_filter: Optional[AbstractSet[int]] = None,
+        low_latency: bool = False,
+    ) -> None:
+        super().__init__(port=port, callback=callback)
+        self._init_rx(callback, sender_filter)
+        self.port = port
+        # Port ouvert par SerialCommunicator (attribut privé du parent)
+        self._ser = self._SerialCommunicator__ser
+        # Valeur d'origine du latency_timer FTDI (restaurée en mode standard)
+        self._saved_latency_timer: Optional[str] = None
+        self.low_latency = False
+        if low_latency:
+            self.set_low_latency(True)
+
+    def _latency_timer_path(self) -> Optional[str]:
+        """Chemin sysfs du latency_timer (adaptateurs usb-serial uniquement)."""
+        path = SYSFS_LATENCY_TIMER.format(tty=os.path.basename(os.path.realpath(self.port)))
+        return path if os.path.exists(path) else None
+
+    def set_low_latency(self, enabled: bool) -> dict[str, bool]:
+        """
+        Active/désactive le mode basse latence (bloquant, hors boucle HA).
+        Retourne ce qui a pu être appliqué ; les refus (droits, pilote) sont tolérés.
+        """
+        applied = {"async_low_latency": False, "latency_timer": False}
+        try:
+            self._ser.set_low_latency_mode(enabled)
+            applied["async_low_latency"] = True
+        except (AttributeError, NotImplementedError, ValueError, OSError) as exc:
+            self.logger.debug("ASYNC_LOW_LATENCY non appliqué sur %s : %s", self.port, exc)
+
+        if (timer := self._latency_timer_path()) is not None:
+            try:
+                if enabled:
+                    with open(timer, encoding="ascii") as fh:
+                        current = fh.read().strip()
+                    if self._saved_latency_timer is None:
+                        self._saved_latency_timer = current
+                    value = str(FTDI_LATENCY_TIMER_MS)
+                else:
+                    value = self._saved_latency_timer
+                if value is not None:
+                    with open(timer, "w", encoding="ascii") as fh:
+                        fh.write(value)
+                    applied["latency_timer"] = True
+            except OSError as exc:
+                self.logger.debug("latency_timer non modifié (%s) : %s", timer, exc)
+
+        self._ser.timeout = LOW_LATENCY_TIMEOUT if enabled else SERIAL_TIMEOUT
+        self.low_latency = enabled
+        return applied
+
+    def _restore_latency_timer(self) -> None:
+        """Remet le latency_timer FTDI d'origine (s'il a été modifié)."""
+        saved, self._saved_latency_timer = self._saved_latency_timer, None
+        if saved is None or (timer := self._latency_timer_path()) is None:
+            return
+        try:
+            with open(timer, "w", encoding="ascii") as fh:
+                fh.write(saved)
+        except OSError as exc:
+            self.logger.debug("latency_timer non restauré (%s) : %s", timer, exc)
+
+    def stop(self) -> None:
+        """Arrête le thread et rend au périphérique son latency_timer d'origine."""
+        super().stop()
+        self._restore_latency_timer()
+
+    def run(self) -> None:
+        """Boucle de SerialCommunicator.run(), taille de lecture adaptée au mode."""
+        self.logger.info("EnOceanSerialCommunicator started")
+        ser = self._ser
+        while not self._stop_flag.is_set():
+            while True:
+                packet = self._get_from_send_queue()
+                if not packet:
+                    break
+                try:
+                    ser.write(bytearray(packet.build()))
+                except serial.SerialException:
+                    self.stop()
+
+            try:
+                size = max(1, ser.in_waiting) if self.low_latency else SERIAL_READ_SIZE
+                data = ser.read(size)
+            except (serial.SerialException, OSError):
+                self.logger.error(
+                    "Serial port exception! (device disconnected or multiple access on port?)"
+                )
+                self.stop()
+                data = b""
+            if data:
+                self._feed(data)
+            self.parse()
+            time.sleep(0)
+
+        ser.close()
+        self.logger.info("EnOceanSerialCommunicator stopped")
+
+
+class EnOceanTcpCommunicator(_EnOceanCommunicatorMixin, Communicator):
+    """
+    Client TCP vers une passerelle ESP3 (ser2net, stick USB déporté…).
+    - La connexion initiale est faite dans le constructeur (comme l'ouverture
+      du port série) : une passerelle injoignable lève OSError.
+    - Ensuite, toute coupure est gérée dans le thread : reconnexion avec backoff,
+      les trames en file d'émission attendent le retour de la liaison.
+    """
+
+    logger = logging.getLogger("enocean.communicators.EnOceanTcpCommunicator")
+
+    def __init__(
+        self,
+        host: str,
+        port: int = TCP_DEFAULT_PORT,
+        callback=None,
+        sender_filter: Optional[AbstractSet[int]] = None,
+    ) -> None:
+        super().__init__(callback=callback)
+        self._init_rx(callback, sender_filter)
+        self.host = host
+        self.port = port
+        # Trame en cours d'écriture (reprise après coupure, jamais perdue)
+        self._tx_pending: Optional[bytes] = None
+        self._sock: Optional[socket.socket] = self._connect()
+
+    def _connect(self) -> socket.socket:
+        """Ouvre la connexion TCP (Nagle désactivé : une trame = un segment)."""
+        sock = socket.create_connection((self.host, self.port), timeout=TCP_CONNECT_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setblocking(False)
+        # Les octets d'une trame partielle d'avant coupure sont inexploitables
+        self._buffer = []
+        return sock
+
+    def _close(self) -> None:
+        """Ferme la socket courante (sans lever)."""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _reconnect(self) -> bool:
+        """Reconnexion avec backoff exponentiel ; False si arrêt demandé entre-temps."""
+        delay = TCP_RECONNECT_MIN
+        while not self._stop_flag.is_set():
+            try:
+                self._sock = self._connect()
+                self.logger.info("Passerelle %s:%s reconnectée.", self.host, self.port)
+                return True
+            except OSError as exc:
+                self.logger.warning(
+                    "Passerelle %s:%s injoignable (%s), nouvel essai dans %.0fs.",
+                    self.host, self.port, exc, delay,
+                )
+                self._stop_flag.wait(delay)
+                delay = min(TCP_RECONNECT_MAX, delay * 2)
+        return False
+
+    def _write_pending(self) -> None:
+        """Écrit la file d'émission ; une trame partiellement écrite est reprise au tour suivant."""
+        while True:
+            if self._tx_pending is None:
+                packet = self._get_from_send_queue()
+                if not packet:
+                    return
+                self._tx_pending = bytes(packet.build())
+            sent = self._sock.send(self._tx_pending)
+            self._tx_pending = self._tx_pending[sent:] or None
+            if self._tx_pending is not None:
+                # Tampon d'émission plein : on rend la main à la lecture
+                return
+
+    def run(self) -> None:
+        self.logger.info("EnOceanTcpCommunicator started (%s:%s)", self.host, self.port)
+        while not self._stop_flag.is_set():
+            if self._sock is None and not self._reconnect():
+                break
+            try:
+                self._write_pending()
+                readable, _, _ = select.select([self._sock], [], [], TCP_POLL_INTERVAL)
+                if readable:
+                    data = self._sock.recv(TCP_READ_SIZE)
+                    if not data:
+                        raise ConnectionError("connexion fermée par la passerelle")
+                    self._feed(data)
+                    self.parse()
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError as exc:
+                self.logger.error("Liaison TCP %s:%s perdue : %s", self.host, self.port, exc)
+                self._close()
+        self._close()
+        self.logger.info("EnOceanTcpCommunicator stopped")
+
+
+def create_communicator(
+    device: str,
+    callback=None,
+    sender_filter: Optional[AbstractSet[int]] = None,
+    low_latency: bool = False,
+):
+    """
+    Construit le communicateur adapté à `device` (chemin série ou tcp://hôte:port).
+    `low_latency` ne concerne que le port série.
+    """
+    tcp = parse_tcp_url(device)
+    if tcp is not None:
+        return EnOceanTcpCommunicator(
+            tcp[0], tcp[1], callback=callback, sender_filter=sender_filter
+        )
+    return EnOceanSerialCommunicator(
+        port=device, callback=callback, sender_filter=sender_filter, low_latency=low_latency
+    )
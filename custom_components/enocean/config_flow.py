@@ -3,23 +3,51 @@
 config_flow.py — Flux de configuration pour l'intégration custom EnOcean.
 
 Rôles :
-- Permet l'ajout via l'UI (step 'user').
+- Permet l'ajout via l'UI (step 'user') : les ports candidats sont sondés en
+  parallèle (CO_RD_VERSION, cf. probe.py) et seuls les vrais dongles EnOcean
+  sont proposés ; saisie manuelle (step 'manual') du chemin série ou de
+  l'adresse "tcp://hôte:port" d'une passerelle ESP3 réseau, validée avant création.
 - Supporte l'import YAML (step 'import') déclenché par SOURCE_IMPORT.
-- Expose *au niveau du module* la fonction async_get_options_flow(config_entry)
-  attendue par Home Assistant (PAS de méthode de classe du même nom).
+- Expose le flux d'options via la méthode statique
+  EnOceanFlowHandler.async_get_options_flow(config_entry), seule forme que
+  Home Assistant recherche (une fonction de module est ignorée).
 
 NB : On garde la logique simple : création d'une entrée minimale. Les options
-peuvent être étendues plus tard selon les besoins.
+(flux d'options) règlent le comportement du dongle :
+- sender_filter : ne traiter que les télégrammes des émetteurs configurés.
+- rate_limit_burst / rate_limit_rate : limitation de débit par émetteur.
+- confirm_timeout / confirm_retries : suivi des commandes D2-01 (statut CMD 0x04).
+- low_latency : mode basse latence du port série (puces FTDI).
 """
 
 from __future__ import annotations
 
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.const import CONF_DEVICE
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DOMAIN
+from .const import (
+    CONF_CONFIRM_RETRIES,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_LOW_LATENCY,
+    CONF_RATE_LIMIT_BURST,
+    CONF_RATE_LIMIT_RATE,
+    CONF_SENDER_FILTER,
+    DEFAULT_CONFIRM_RETRIES,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_LOW_LATENCY,
+    DEFAULT_RATE_LIMIT_BURST,
+    DEFAULT_RATE_LIMIT_RATE,
+    DEFAULT_SENDER_FILTER,
+    DOMAIN,
+)
+from .dongle import detect, validate_path
+from .probe import DongleInfo, async_probe_ports
+
+# Choix "saisie manuelle" dans la liste des dongles détectés
+MANUAL_PATH = "manual"
 
 
 class EnOceanFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -27,12 +55,57 @@ class EnOceanFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        # Dongles ayant répondu à la sonde (chemin -> infos)
+        self._found: dict[str, DongleInfo] = {}
+
     async def async_step_user(self, user_input: dict | None = None) -> FlowResult:
-        """Step UI : crée une entrée minimale."""
+        """Step UI : choix parmi les dongles EnOcean détectés (ou saisie manuelle)."""
         # Une seule instance typiquement
         if self._async_current_entries():
             return self.async_abort(reason="single_instance_allowed")
-        return self.async_create_entry(title="EnOcean", data=user_input or {})
+
+        if user_input is not None:
+            device = user_input[CONF_DEVICE]
+            if device not in self._found:
+                return await self.async_step_manual()
+            return self._async_create_dongle_entry(device)
+
+        candidates = await self.hass.async_add_executor_job(detect)
+        found = await async_probe_ports(self.hass, candidates)
+        self._found = {info.path: info for info in found}
+        if not self._found:
+            return await self.async_step_manual()
+
+        choices = {path: info.label for path, info in self._found.items()}
+        choices[MANUAL_PATH] = "Autre (chemin ou tcp://hôte:port)"
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema(
+                {vol.Required(CONF_DEVICE, default=found[0].path): vol.In(choices)}
+            ),
+        )
+
+    async def async_step_manual(self, user_input: dict | None = None) -> FlowResult:
+        """Saisie du dongle (port série ou tcp://hôte:port), validé avant création."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            device = user_input[CONF_DEVICE].strip()
+            # Validation bloquante (stat / connexion d'essai) hors boucle
+            if await self.hass.async_add_executor_job(validate_path, device):
+                return self._async_create_dongle_entry(device)
+            errors["base"] = "invalid_dongle_path"
+
+        return self.async_show_form(
+            step_id="manual",
+            data_schema=vol.Schema({vol.Required(CONF_DEVICE): str}),
+            errors=errors,
+        )
+
+    @callback
+    def _async_create_dongle_entry(self, device: str) -> FlowResult:
+        """Crée l'entrée pour le dongle retenu."""
+        return self.async_create_entry(title="EnOcean", data={CONF_DEVICE: device})
 
     async def async_step_import(self, import_data: dict | None = None) -> FlowResult:
         """Step 'import' pour prendre en charge l'import YAML."""
@@ -41,24 +114,53 @@ class EnOceanFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             return self.async_abort(reason="already_configured")
         return self.async_create_entry(title="EnOcean (import YAML)", data=import_data or {})
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        """Retourne le flow d'options pour cette intégration."""
+        return EnOceanOptionsFlow(config_entry)
+
 
 class EnOceanOptionsFlow(config_entries.OptionsFlow):
-    """Flux d'options (placeholder)."""
+    """Flux d'options (réglages du dongle)."""
 
     def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
         self._entry = config_entry
 
     async def async_step_init(self, user_input: dict | None = None) -> FlowResult:
-        """Aucune option pour l'instant — on valide directement."""
+        """Formulaire unique ; l'entrée est rechargée à la validation."""
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
-        # Pas de formulaire pour le moment
-        return self.async_create_entry(title="", data={})
-
-
-# >>> IMPORTANT : fonction attendue par HA (niveau module), pas de méthode de classe du même nom !
-@callback
-def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
-    """Retourne le flow d'options pour cette intégration."""
-    return EnOceanOptionsFlow(config_entry)
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_SENDER_FILTER,
+                        default=options.get(CONF_SENDER_FILTER, DEFAULT_SENDER_FILTER),
+                    ): bool,
+                    vol.Optional(
+                        CONF_RATE_LIMIT_BURST,
+                        default=options.get(CONF_RATE_LIMIT_BURST, DEFAULT_RATE_LIMIT_BURST),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+                    vol.Optional(
+                        CONF_RATE_LIMIT_RATE,
+                        default=options.get(CONF_RATE_LIMIT_RATE, DEFAULT_RATE_LIMIT_RATE),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                    vol.Optional(
+                        CONF_CONFIRM_TIMEOUT,
+                        default=options.get(CONF_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_TIMEOUT),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=30)),
+                    vol.Optional(
+                        CONF_CONFIRM_RETRIES,
+                        default=options.get(CONF_CONFIRM_RETRIES, DEFAULT_CONFIRM_RETRIES),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=5)),
+                    vol.Optional(
+                        CONF_LOW_LATENCY,
+                        default=options.get(CONF_LOW_LATENCY, DEFAULT_LOW_LATENCY),
+                    ): bool,
+                }
+            ),
+        )
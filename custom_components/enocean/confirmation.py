@@ -0,0 +1,184 @@
+# custom_components/enocean/confirmation.py
+# -*- coding: utf-8 -*-
+"""
+confirmation.py — Suivi des commandes D2-01 et de leur confirmation.
+
+EnOceanSwitch.turn_on() passe l'état à ON de façon optimiste ; un télégramme
+perdu passait inaperçu. Chaque commande de sortie D2-01 (CMD 0x01) est ici
+associée au prochain statut CMD 0x04 reçu du même dev_id et du même canal :
+- le délai commande → confirmation alimente un histogramme (RTT) ;
+- sans confirmation dans la fenêtre, la commande est ré-émise via la file
+  cadencée (tx.py), jusqu'à `retries` fois, puis déclarée perdue.
+
+Toutes les méthodes s'exécutent dans la boucle HA.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bornes supérieures (ms) des classes de l'histogramme RTT (dernière classe : au-delà)
+RTT_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600, 3200)
+
+# Canal "toutes les sorties" dans les statuts D2-01
+D2_ALL_CHANNELS = 0x1E
+
+
+class RttHistogram:
+    """Histogramme à classes fixes des délais de confirmation."""
+
+    def __init__(self, bounds_ms: tuple[int, ...] = RTT_BUCKETS_MS) -> None:
+        self._bounds = bounds_ms
+        self._counts = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, rtt_ms: float) -> None:
+        """Ajoute une mesure (ms)."""
+        self._counts[bisect.bisect_left(self._bounds, rtt_ms)] += 1
+        self.count += 1
+        self.total_ms += rtt_ms
+        self.max_ms = max(self.max_ms, rtt_ms)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Classes "<=N ms" + moyenne/max."""
+        labels = [f"<={b}ms" for b in self._bounds] + [f">{self._bounds[-1]}ms"]
+        return {
+            "buckets": dict(zip(labels, self._counts)),
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class _Pending:
+    """Commande en attente de confirmation."""
+
+    __slots__ = ("packet", "sent_at", "attempts", "timer", "on_result")
+
+    def __init__(self, packet: Any, on_result: Optional[Callable[[bool], None]]) -> None:
+        self.packet = packet
+        self.sent_at = time.monotonic()
+        self.attempts = 1
+        self.timer = None
+        self.on_result = on_result
+
+
+class CommandTracker:
+    """Corrèle commandes D2-01 et statuts CMD 0x04 ; ré-émet si besoin."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send: Callable[[Any], None],
+        timeout: float,
+        retries: int,
+    ) -> None:
+        # Référence HA (boucle) et envoi cadencé (TxPacer.async_enqueue)
+        self.hass = hass
+        self._send = send
+        # Fenêtre d'attente (s) et nombre de ré-émissions autorisées
+        self._timeout = timeout
+        self._retries = retries
+        # (dev_id entier, canal) -> commande en attente ; une seule par sortie
+        self._pending: dict[tuple[int, int], _Pending] = {}
+        # Mesures et compteurs
+        self.rtt = RttHistogram()
+        self.confirmed = 0
+        self.retried = 0
+        self.lost = 0
+
+    @callback
+    def async_send(
+        self,
+        dev_id: int,
+        channel: int,
+        packet: Any,
+        on_result: Optional[Callable[[bool], None]] = None,
+    ) -> None:
+        """Émet la commande et attend sa confirmation (remplace une attente antérieure)."""
+        key = (dev_id, channel)
+        if (previous := self._pending.pop(key, None)) is not None and previous.timer:
+            previous.timer.cancel()
+        pending = _Pending(packet, on_result)
+        self._pending[key] = pending
+        self._send(packet)
+        pending.timer = self.hass.loop.call_later(self._timeout, self._async_expired, key)
+
+    @callback
+    def async_confirm(
+        self, dev_id: int, channel: int, received_at: Optional[float] = None
+    ) -> None:
+        """
+        Statut CMD 0x04 reçu : clôt la commande en attente et mesure le RTT.
+        `received_at` (monotonic) est pris dans le thread de lecture, au plus près du port.
+        """
+        if channel == D2_ALL_CHANNELS:
+            keys = [k for k in self._pending if k[0] == dev_id]
+        else:
+            keys = [(dev_id, channel)]
+        now = received_at if received_at is not None else time.monotonic()
+        for key in keys:
+            pending = self._pending.pop(key, None)
+            if pending is None:
+                continue
+            if pending.timer:
+                pending.timer.cancel()
+            # RTT mesuré depuis la dernière émission (ré-émission éventuelle)
+            self.rtt.add((now - pending.sent_at) * 1000.0)
+            self.confirmed += 1
+            if pending.on_result:
+                pending.on_result(True)
+
+    @callback
+    def _async_expired(self, key: tuple[int, int]) -> None:
+        """Fenêtre écoulée sans statut : ré-émission ou abandon."""
+        pending = self._pending.get(key)
+        if pending is None:
+            return
+        if pending.attempts <= self._retries:
+            pending.attempts += 1
+            pending.sent_at = time.monotonic()
+            self.retried += 1
+            _LOGGER.debug(
+                "EnOcean: pas de confirmation de %08X/%d, ré-émission %d.",
+                key[0], key[1], pending.attempts - 1,
+            )
+            self._send(pending.packet)
+            pending.timer = self.hass.loop.call_later(self._timeout, self._async_expired, key)
+            return
+
+        del self._pending[key]
+        self.lost += 1
+        _LOGGER.warning(
+            "EnOcean: commande vers %08X canal %d non confirmée après %d envoi(s).",
+            key[0], key[1], pending.attempts,
+        )
+        if pending.on_result:
+            pending.on_result(False)
+
+    @callback
+    def async_stop(self) -> None:
+        """Annule toutes les attentes (déchargement)."""
+        for pending in self._pending.values():
+            if pending.timer:
+                pending.timer.cancel()
+        self._pending.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Compteurs + histogramme RTT (service link_status)."""
+        return {
+            "confirmed": self.confirmed,
+            "retried": self.retried,
+            "lost": self.lost,
+            "pending": len(self._pending),
+            "rtt": self.rtt.as_dict(),
+        }
@@ -20,3 +20,33 @@ PLATFORMS = [
     Platform.SENSOR,
     Platform.SWITCH,
 ]
+
+# Superviseur du lien série (supervisor.py)
+SUPERVISOR_CHECK_INTERVAL = 5.0   # période de vérification (s)
+SUPERVISOR_IDLE_TIMEOUT = 30.0    # silence (s) avant d'envoyer un ping CO_RD_VERSION
+SUPERVISOR_PING_TIMEOUT = 3.0     # délai (s) de réponse au ping avant de déclarer le lien perdu
+SUPERVISOR_BACKOFF_MIN = 1.0      # premier délai (s) entre deux tentatives de reconnexion
+SUPERVISOR_BACKOFF_MAX = 60.0     # délai (s) maximal entre deux tentatives
+
+# Options de l'entrée (flux d'options)
+CONF_SENDER_FILTER = "sender_filter"   # liste blanche des émetteurs configurés
+DEFAULT_SENDER_FILTER = False
+
+# Clé hass.data[DATA_ENOCEAN] : compteur des IDs émetteurs déclarés par les entités
+KNOWN_SENDERS = "known_senders"
+CONF_RATE_LIMIT_BURST = "rate_limit_burst"   # télégrammes acceptés d'affilée par émetteur
+CONF_RATE_LIMIT_RATE = "rate_limit_rate"     # débit soutenu par émetteur (télégrammes/s, 0 = sans limite)
+DEFAULT_RATE_LIMIT_BURST = 20
+DEFAULT_RATE_LIMIT_RATE = 0.0   # désactivée par défaut (à activer dans les options)
+
+# Repairs : émetteur qui inonde le dongle
+ISSUE_SENDER_FLOOD = "sender_flood"
+CONF_CONFIRM_TIMEOUT = "confirm_timeout"     # attente (s) du statut D2-01 après commande (0 = sans suivi)
+CONF_CONFIRM_RETRIES = "confirm_retries"     # ré-émissions si pas de confirmation
+DEFAULT_CONFIRM_TIMEOUT = 2.0
+DEFAULT_CONFIRM_RETRIES = 2
+CONF_LOW_LATENCY = "low_latency"             # mode basse latence du port série (FTDI)
+DEFAULT_LOW_LATENCY = False
+
+# Espacement minimal (s) entre deux trames émises (file cadencée, tx.py)
+TX_PACING_INTERVAL = 0.05
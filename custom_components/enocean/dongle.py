@@ -8,24 +8,67 @@ Objectifs :
 - Signature compatible : EnOceanDongle(hass, device)
 - Appliquer le patch UTE le plus tôt possible pour éviter les crashs teach-in.
 - Fournir detect()/validate_path() pour le config_flow et helpers d'init/stop.
+- Relancer le communicateur à la demande du superviseur (supervisor.py).
 
 Chaque fonction est commentée pour clarifier son rôle.
 """
 
 from __future__ import annotations
 
+import asyncio                  # attente des fenêtres de mesure de latence
 import glob                     # recherche des ports série candidats
 import logging                  # logs HA
 import os                       # validations de chemin
-from typing import List
+import queue                    # report des trames en attente lors d'un redémarrage
+import socket                   # sonde de joignabilité des passerelles TCP
+import time                     # horodatage de la dernière activité
+from collections import Counter
+from typing import Callable, List, Optional
 
-from enocean.communicators import SerialCommunicator  # communicateur série EnOcean
+from enocean.communicators.communicator import Communicator  # base des communicateurs EnOcean
+from enocean.protocol.packet import ResponsePacket  # réponse CO_RD_IDBASE
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+    dispatcher_send,
+)
+
+from .communicator import (
+    RX_LATENCY_BUCKETS_MS,
+    TCP_CONNECT_TIMEOUT,
+    EnOceanSerialCommunicator,
+    create_communicator,
+    parse_tcp_url,
+)
+from .confirmation import CommandTracker, RttHistogram
+from .const import (
+    DATA_ENOCEAN,
+    DOMAIN,
+    ENOCEAN_DONGLE,
+    ISSUE_SENDER_FLOOD,
+    KNOWN_SENDERS,
+    SIGNAL_RECEIVE_MESSAGE,
+    SIGNAL_SEND_MESSAGE,
+    TX_PACING_INTERVAL,
+)
 
 # Patch maison : sécurise UTE (ignore l'envoi si base_id inconnu) et tente de lire le Base ID
 from .patches import apply_enocean_workaround
+from .ratelimit import SenderRateLimiter
+from .supervisor import LinkSupervisor
+from .telegram import Telegram
+from .tx import TxPacer
+from .ute import RORG_UTE, UteResponder
 
 _LOGGER = logging.getLogger(__name__)
 
+# Attente max (s) de l'arrêt du thread de lecture lors d'un redémarrage
+RESTART_JOIN_TIMEOUT = 2.0
+
 # ---------------------------------------------------------------------------
 # Patch UTE appliqué au plus tôt (à l'import du module) pour intercepter
 # Packet.send_response() avant toute trame teach-in.
@@ -62,11 +105,16 @@ def detect() -> List[str]:
 def validate_path(path: str) -> bool:
     """
     Valide sommairement un chemin de dongle :
-    - non vide, existe, accessible (stat ok).
+    - non vide, existe, accessible (stat ok) ;
+    - ou adresse "tcp://hôte:port" d'une passerelle joignable (connexion d'essai).
     """
     try:
         if not path:
             return False
+        tcp = parse_tcp_url(path)
+        if tcp is not None:
+            with socket.create_connection(tcp, timeout=TCP_CONNECT_TIMEOUT):
+                return True
         if not os.path.exists(path):
             return False
         os.stat(path)  # Vérifie les droits d'accès
@@ -81,25 +129,255 @@ def validate_path(path: str) -> bool:
 # ---------------------------------------------------------------------------
 class EnOceanDongle:
     """
-    Représente le dongle EnOcean et encapsule le SerialCommunicator.
+    Représente le dongle EnOcean et encapsule le communicateur (port série ou passerelle TCP).
 
     Signature compatible avec l’appel de __init__.py :
         EnOceanDongle(hass, device)
 
     Fournit :
-        - start()/stop() : cycle de vie du communicateur
-        - communicator   : accès à l'instance SerialCommunicator
+        - async_setup()/unload() : cycle de vie côté HA (dispatcher + superviseur)
+        - start()/stop()/restart() : cycle de vie du communicateur
+        - callback()     : réception python-enocean → dispatcher HA
+        - communicator   : accès à l'instance de communicateur courante
         - detect()/validate_path() : helpers statiques
     """
 
-    def __init__(self, hass, device: str) -> None:
+    def __init__(
+        self,
+        hass,
+        device: str,
+        *,
+        sender_filter: bool = False,
+        rate_limit_burst: int = 0,
+        rate_limit_rate: float = 0.0,
+        confirm_timeout: float = 0.0,
+        confirm_retries: int = 0,
+        low_latency: bool = False,
+    ) -> None:
         # Référence Home Assistant (utile si besoin d’accès au bus plus tard)
         self.hass = hass
         # Chemin du port série (ex: /dev/serial/by-id/usb-...)
         self.device = device
+        # Mode basse latence du port série (option, sans effet en TCP)
+        self._low_latency = low_latency
+        # Liste blanche des émetteurs configurés (option) + suspension temporaire
+        self._sender_filter_enabled = sender_filter
+        self._sender_filter_paused = False
+        # Télégrammes jetés par les communicateurs précédents (avant reconnexion)
+        self._dropped_before_restart = 0
+        # Limitation de débit par émetteur (None si rate <= 0)
+        self._limiter: Optional[SenderRateLimiter] = (
+            SenderRateLimiter(rate_limit_burst, rate_limit_rate) if rate_limit_rate > 0 else None
+        )
+        # Émetteurs signalés dans Repairs (un ticket par épisode, retiré au retour au calme)
+        self._flood_reported: set[int] = set()
+        # Émetteurs dont le retour au calme est déjà en cours de vérification
+        self._calm_checks: set[int] = set()
+        # Horodatage (monotonic) de la dernière trame reçue, quelle qu'elle soit
+        self.last_activity = time.monotonic()
+        # Déconnexion du dispatcher d'envoi (posée par async_setup)
+        self.dispatcher_disconnect_handle = None
+        # Superviseur du lien série (posé par async_setup)
+        self.supervisor: Optional[LinkSupervisor] = None
+        # File d'émission cadencée (survit aux reconnexions) + suivi des commandes D2-01
+        self.tx: Optional[TxPacer] = None
+        self.commands: Optional[CommandTracker] = None
+        # Écoute d'association en cours (AssociationManager) : voit chaque trame radio
+        # dans le thread de lecture, avant la limitation de débit
+        self.teach_in_listener: Optional[Callable[[Telegram], None]] = None
+        # Réponses UTE en lot (remplace la réponse synchrone de python-enocean)
+        self.ute: Optional[UteResponder] = None
+        if hass is not None:
+            self.tx = TxPacer(hass, lambda packet: self._comm.send(packet), TX_PACING_INTERVAL)
+            self.ute = UteResponder(hass, self.tx.async_enqueue, lambda: self._comm._base_id)
+            if confirm_timeout > 0:
+                self.commands = CommandTracker(
+                    hass, self.tx.async_enqueue, confirm_timeout, confirm_retries
+                )
         # Communicator python-enocean (non démarré à la construction)
-        self._comm = SerialCommunicator(port=device)
+        self._comm = self._create_communicator()
+
+    def _create_communicator(self) -> Communicator:
+        """Construit un nouveau communicateur (ouvre le port série ou la connexion TCP)."""
+        # Sans hass (helpers init_communicator), les trames restent dans comm.receive
+        rx_callback = self.callback if self.hass is not None else None
+        comm = create_communicator(
+            self.device,
+            callback=rx_callback,
+            sender_filter=self._sender_filter_ids(),
+            low_latency=self._low_latency,
+        )
+        if self.hass is not None:
+            # Trames radio livrées en Telegram compacts ; les requêtes UTE sont
+            # traitées par self.ute, pas dans parse_msg()
+            comm.telegrams = True
+            comm.teach_in = False
+        return comm
+
+    # ---- liste blanche des émetteurs ----
+    def _sender_filter_ids(self) -> Optional[frozenset[int]]:
+        """Ensemble figé des IDs déclarés par les entités, ou None si filtre inactif."""
+        if not self._sender_filter_enabled or self._sender_filter_paused or self.hass is None:
+            return None
+        known = self.hass.data.get(DATA_ENOCEAN, {}).get(KNOWN_SENDERS) or {}
+        return frozenset(known)
+
+    def refresh_sender_filter(self) -> None:
+        """Recalcule la liste blanche (ajout/retrait d'entités) ; remplacement atomique."""
+        self._comm.sender_filter = self._sender_filter_ids()
+
+    def pause_sender_filter(self) -> None:
+        """Laisse tout passer (ex. écoute teach-in d'un appareil encore inconnu)."""
+        self._sender_filter_paused = True
+        self.refresh_sender_filter()
+
+    def resume_sender_filter(self) -> None:
+        """Réactive la liste blanche après une pause."""
+        self._sender_filter_paused = False
+        self.refresh_sender_filter()
+
+    # ---- cycle de vie côté Home Assistant ----
+    async def async_setup(self) -> None:
+        """Démarre le communicateur (executor), branche le dispatcher et le superviseur."""
+        await self.hass.async_add_executor_job(self.start)
+        self.dispatcher_disconnect_handle = async_dispatcher_connect(
+            self.hass, SIGNAL_SEND_MESSAGE, self._send_message_callback
+        )
+        self.supervisor = LinkSupervisor(self.hass, self)
+        self.supervisor.async_start()
+
+    def unload(self) -> None:
+        """Débranche superviseur + dispatcher, puis arrête le communicateur."""
+        if self.supervisor is not None:
+            self.supervisor.async_stop()
+            self.supervisor = None
+        if self.commands is not None:
+            self.commands.async_stop()
+        if self.tx is not None:
+            self.tx.async_stop()
+        if self.dispatcher_disconnect_handle:
+            self.dispatcher_disconnect_handle()
+            self.dispatcher_disconnect_handle = None
+        self.stop()
+
+    def _send_message_callback(self, command) -> None:
+        """Envoie une trame via la file cadencée (appelable depuis n'importe quel thread)."""
+        self.hass.loop.call_soon_threadsafe(self.tx.async_enqueue, command)
 
+    def send_tracked(self, dev_id: int, channel: int, packet, on_result=None) -> None:
+        """
+        Envoie une commande D2-01 dont on attend le statut CMD 0x04 (thread-safe).
+        Sans suivi configuré, équivaut à un envoi cadencé simple.
+        """
+        if self.commands is None:
+            self._send_message_callback(packet)
+            return
+        self.hass.loop.call_soon_threadsafe(
+            self.commands.async_send, dev_id, channel, packet, on_result
+        )
+
+    def callback(self, packet) -> None:
+        """
+        Appelé par python-enocean (thread de lecture) pour chaque trame valide.
+        - Toute trame (radio, réponse, évènement) prouve que le lien est vivant.
+        - Seules les trames radio (Telegram) sont diffusées aux entités.
+        - Un émetteur qui dépasse son débit voit ses télégrammes agrégés
+          (seul le dernier est diffusé quand un jeton se libère).
+        """
+        self.last_activity = now = time.monotonic()
+        if isinstance(packet, Telegram):
+            _LOGGER.debug("Received radio packet: %s", packet)
+            rorg = packet.rorg
+            if (listener := self.teach_in_listener) is not None:
+                listener(packet)
+            if self.ute is not None and rorg == RORG_UTE:
+                self.ute.offer(packet)
+            # Statut actionneur D2-01 (CMD 0x04) : confirme la commande en attente
+            # (trame courte ou étrangère ignorée : elle ne doit pas tuer le thread de lecture)
+            if (
+                self.commands is not None
+                and rorg == 0xD2
+                and len(packet.payload) >= 2
+                and (packet.payload[0] & 0x0F) == 0x04
+            ):
+                self.hass.loop.call_soon_threadsafe(
+                    self.commands.async_confirm, packet.sender, packet.payload[1] & 0x1F, now
+                )
+            if self._limiter is not None:
+                sender = packet.sender
+                wait = self._limiter.offer(sender, packet)
+                if wait is not None:
+                    if wait >= 0:
+                        self.hass.loop.call_soon_threadsafe(
+                            self._async_schedule_release, sender, wait
+                        )
+                    return
+            dispatcher_send(self.hass, SIGNAL_RECEIVE_MESSAGE, packet)
+        elif (
+            isinstance(packet, ResponsePacket)
+            and packet.response == 0
+            and len(packet.response_data) == 4
+        ):
+            # Réponse à CO_RD_IDBASE : avec un callback, python-enocean ne la voit
+            # jamais passer par comm.receive et base_id resterait inconnu
+            self._comm._base_id = list(packet.response_data)
+
+    # ---- limitation de débit (boucle HA) ----
+    def _async_schedule_release(self, sender: int, wait: float) -> None:
+        """Planifie la diffusion du dernier télégramme retenu ; signale l'émetteur."""
+        self.hass.loop.call_later(wait, self._async_release, sender)
+        if sender in self._flood_reported:
+            return
+        self._flood_reported.add(sender)
+        _LOGGER.warning(
+            "EnOcean: l'émetteur %08X dépasse %.1f télégrammes/s, télégrammes agrégés.",
+            sender, self._limiter.rate,
+        )
+        ir.async_create_issue(
+            self.hass,
+            DOMAIN,
+            f"{ISSUE_SENDER_FLOOD}_{sender:08X}",
+            is_fixable=False,
+            severity=ir.IssueSeverity.WARNING,
+            translation_key=ISSUE_SENDER_FLOOD,
+            translation_placeholders={
+                "sender": f"{sender:08X}",
+                "rate": f"{self._limiter.rate:g}",
+            },
+        )
+
+    def _async_release(self, sender: int) -> None:
+        """Diffuse le télégramme retenu, ou replanifie si le seau est encore vide."""
+        if self._limiter is None:
+            return
+        packet, wait = self._limiter.release(sender)
+        if packet is not None:
+            async_dispatcher_send(self.hass, SIGNAL_RECEIVE_MESSAGE, packet)
+            if sender in self._flood_reported and sender not in self._calm_checks:
+                self._calm_checks.add(sender)
+                self.hass.loop.call_later(
+                    self._limiter.refill_time, self._async_check_calm, sender
+                )
+        elif wait:
+            self.hass.loop.call_later(wait, self._async_release, sender)
+
+    def _async_check_calm(self, sender: int) -> None:
+        """Retire le ticket Repairs quand l'émetteur est revenu sous son débit."""
+        if self._limiter is None or sender not in self._flood_reported:
+            self._calm_checks.discard(sender)
+            return
+        if not self._limiter.is_calm(sender):
+            # Toujours en rafale : nouvelle vérification après une recharge complète
+            self.hass.loop.call_later(
+                self._limiter.refill_time, self._async_check_calm, sender
+            )
+            return
+        self._calm_checks.discard(sender)
+        self._flood_reported.discard(sender)
+        ir.async_delete_issue(self.hass, DOMAIN, f"{ISSUE_SENDER_FLOOD}_{sender:08X}")
+        _LOGGER.info("EnOcean: l'émetteur %08X est revenu sous son débit.", sender)
+
+    # ---- cycle de vie du communicateur ----
     def start(self) -> None:
         """
         Démarre le communicateur et sécurise UTE :
@@ -115,6 +393,7 @@ class EnOceanDongle:
 
         # Démarre le thread de lecture/écriture série
         self._comm.start()
+        self.last_activity = time.monotonic()
 
         # Lecture du Base ID (idempotent, ignore les erreurs)
         try:
@@ -134,13 +413,92 @@ class EnOceanDongle:
             _LOGGER.exception("Arrêt du communicateur échoué (ignoré).")
         _LOGGER.info("EnOcean dongle arrêté (%s).", self.device)
 
+    def restart(self) -> None:
+        """
+        Démonte puis recrée le communicateur (bloquant : à appeler via l'executor).
+        - Les trames encore en file d'émission sont reportées sur le nouveau communicateur.
+        - Lève l'exception d'ouverture du port si le dongle n'est pas (encore) revenu.
+        """
+        old = self._comm
+        self.stop()
+        if old.is_alive():
+            old.join(timeout=RESTART_JOIN_TIMEOUT)
+
+        # On récupère les trames non émises (elles survivent au redémarrage)
+        pending = []
+        while True:
+            try:
+                pending.append(old.transmit.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            self._comm = self._create_communicator()
+            self._dropped_before_restart += old.dropped
+        finally:
+            # En cas d'échec, on les remet dans l'ancienne file pour la tentative suivante
+            for pkt in pending:
+                self._comm.transmit.put(pkt)
+
+        self.start()
+        if pending:
+            _LOGGER.info("EnOcean: %d trame(s) en attente ré-émise(s) après reconnexion.", len(pending))
+
+    def is_alive(self) -> bool:
+        """Indique si le thread de lecture du communicateur tourne toujours."""
+        return self._comm.is_alive()
+
+    def stats(self) -> dict:
+        """Compteurs du dongle (service enocean.link_status)."""
+        out = self.supervisor.as_dict() if self.supervisor is not None else {}
+        out["transport"] = "tcp" if parse_tcp_url(self.device) else "serial"
+        out["low_latency"] = getattr(self._comm, "low_latency", False)
+        out["rx_latency"] = self._comm.latency.as_dict()
+        out["sender_filter"] = self._comm.sender_filter is not None
+        out["dropped_foreign"] = self._dropped_before_restart + self._comm.dropped
+        if self._limiter is not None:
+            out["rate_limit"] = self._limiter.as_dict()
+        if self.tx is not None:
+            out["tx_queue"] = len(self.tx)
+        if self.commands is not None:
+            out["commands"] = self.commands.as_dict()
+        if self.ute is not None:
+            out["ute"] = self.ute.as_dict()
+        return out
+
+    async def async_measure_latency(self, duration: float) -> dict:
+        """
+        Mesure le délai lecture → dispatch en mode standard puis en basse latence,
+        `duration` s chacun, sur le trafic réel ; le mode configuré est ensuite rétabli.
+        """
+        comm = self._comm
+        if not isinstance(comm, EnOceanSerialCommunicator):
+            raise HomeAssistantError("Mesure de latence disponible uniquement sur port série.")
+        results: dict = {}
+        try:
+            for label, enabled in (("standard", False), ("low_latency", True)):
+                applied = await self.hass.async_add_executor_job(comm.set_low_latency, enabled)
+                comm.latency = RttHistogram(RX_LATENCY_BUCKETS_MS)
+                await asyncio.sleep(duration)
+                results[label] = {**comm.latency.as_dict(), **applied}
+        finally:
+            # Un redémarrage pendant la mesure a pu remplacer le communicateur
+            if isinstance(self._comm, EnOceanSerialCommunicator):
+                await self.hass.async_add_executor_job(
+                    self._comm.set_low_latency, self._low_latency
+                )
+        return results
+
     @property
-    def communicator(self) -> SerialCommunicator:
+    def communicator(self) -> Communicator:
         """
-        Retourne l'instance SerialCommunicator active (accès lecture/envoi trames).
+        Retourne le communicateur actif, série ou TCP (accès lecture/envoi trames).
         """
         return self._comm
 
+    # Alias historique (__init__.py du core accède à _communicator)
+    _communicator = communicator
+
     # ---- utilitaires statiques compatibles avec d'anciens appels ----
     @staticmethod
     def detect() -> List[str]:
@@ -153,12 +511,45 @@ class EnOceanDongle:
         return validate_path(path)
 
 
+# ---------------------------------------------------------------------------
+# Déclaration des émetteurs connus (alimente la liste blanche du dongle)
+# ---------------------------------------------------------------------------
+@callback
+def async_register_sender(hass: HomeAssistant, sender: int) -> Callable[[], None]:
+    """
+    Déclare un ID émetteur configuré (appelé par chaque entité à son ajout).
+    - Compteur de références : plusieurs entités peuvent partager un même ID.
+    - Fonctionne même si le dongle n'est pas encore créé (plateformes YAML).
+    Retourne la fonction de retrait (à passer à async_on_remove).
+    """
+    data = hass.data.setdefault(DATA_ENOCEAN, {})
+    known: Counter = data.setdefault(KNOWN_SENDERS, Counter())
+    known[sender] += 1
+    _refresh_dongle_filter(data)
+
+    @callback
+    def _unregister() -> None:
+        known[sender] -= 1
+        if known[sender] <= 0:
+            del known[sender]
+        _refresh_dongle_filter(data)
+
+    return _unregister
+
+
+def _refresh_dongle_filter(data: dict) -> None:
+    """Propage la liste blanche au dongle s'il existe déjà."""
+    dongle = data.get(ENOCEAN_DONGLE)
+    if dongle is not None:
+        dongle.refresh_sender_filter()
+
+
 # ---------------------------------------------------------------------------
 # Helpers optionnels utilisés ailleurs dans l'intégration
 # ---------------------------------------------------------------------------
-def init_communicator(device: str) -> SerialCommunicator:
+def init_communicator(device: str) -> Communicator:
     """
-    Construit et démarre un SerialCommunicator prêt à l'emploi.
+    Construit et démarre un communicateur (série ou TCP) prêt à l'emploi.
     - Applique le patch UTE pré-start
     - start()
     - Tente de lire le Base ID
@@ -169,12 +560,19 @@ def init_communicator(device: str) -> SerialCommunicator:
     return dongle.communicator
 
 
-def stop_communicator(comm: SerialCommunicator) -> None:
-    """Arrête proprement un SerialCommunicator existant."""
+def stop_communicator(comm: Communicator) -> None:
+    """Arrête proprement un communicateur existant."""
     try:
         comm.stop()
     except Exception:
         _LOGGER.exception("Arrêt communicateur échoué (ignoré).")
 
 
-__all__ = ["EnOceanDongle", "detect", "validate_path", "init_communicator", "stop_communicator"]
+__all__ = [
+    "EnOceanDongle",
+    "async_register_sender",
+    "detect",
+    "validate_path",
+    "init_communicator",
+    "stop_communicator",
+]
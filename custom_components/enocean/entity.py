@@ -2,41 +2,93 @@
 """
 Classe de base pour les entités EnOcean.
 - S’abonne aux paquets reçus
-- Filtre sur sender (dev_id)
-- Méthode utilitaire d’envoi
+- Filtre sur sender (dev_id précalculé en entier, comparé au Telegram.sender)
+- Déclare son dev_id au dongle (liste blanche optionnelle des émetteurs)
+- Valeur restaurée au démarrage (restore.py) marquée périmée jusqu’au premier télégramme
+- Méthodes utilitaires d’envoi (Packet, ou trame précalculée avec suivi D2-01)
 """
 
+from typing import Any
+
 from enocean.protocol.packet import Packet
 from enocean.utils import combine_hex
 from homeassistant.helpers.dispatcher import async_dispatcher_connect, dispatcher_send
+from homeassistant.core import State
 from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.restore_state import ExtraStoredData
+
+from .const import DATA_ENOCEAN, ENOCEAN_DONGLE, SIGNAL_RECEIVE_MESSAGE, SIGNAL_SEND_MESSAGE
+from .dongle import async_register_sender
 
-from .const import SIGNAL_RECEIVE_MESSAGE, SIGNAL_SEND_MESSAGE
+ATTR_RESTORED = "restored"
 
 class EnOceanEntity(Entity):
     """Parent commun des entités EnOcean (reprend le core)."""
 
+    # Valeur reprise du dernier arrêt, pas encore confirmée par un télégramme
+    _restored = False
+
     def __init__(self, dev_id: list[int]) -> None:
-        """Sauve l’ID destination (récepteur)."""
+        """Sauve l’ID destination (récepteur) et sa forme entière, calculée une fois."""
         self.dev_id = dev_id
+        self._dev_int = combine_hex(dev_id) if dev_id else None
 
     async def async_added_to_hass(self) -> None:
-        """S’abonne aux paquets radio reçus."""
+        """S’abonne aux paquets radio reçus et déclare son émetteur."""
         self.async_on_remove(
             async_dispatcher_connect(
                 self.hass, SIGNAL_RECEIVE_MESSAGE, self._message_received_callback
             )
         )
+        # Les lights sans id (pas de retour d’état) n’ont rien à déclarer
+        if self.dev_id:
+            self.async_on_remove(async_register_sender(self.hass, self._dev_int))
 
     def _message_received_callback(self, packet):
-        """Appelé pour chaque paquet : filtre sur sender == dev_id."""
-        if packet.sender_int == combine_hex(self.dev_id):
+        """Appelé pour chaque télégramme : filtre sur sender == dev_id."""
+        if packet.sender == self._dev_int:
+            self._restored = False
             self.value_changed(packet)
 
     def value_changed(self, packet):
         """À surcharger en plateforme : met à jour l’état suivant le paquet."""
 
+    def restore_last_state(self, state: State, extra_data: ExtraStoredData | None) -> bool:
+        """
+        À surcharger en plateforme : reprend la valeur sauvegardée (restore.py),
+        avant l’ajout à HA. Retourne True si une valeur a été reprise.
+        """
+        return False
+
+    @property
+    def assumed_state(self) -> bool:
+        """Une valeur restaurée n’est qu’une supposition jusqu’au premier télégramme."""
+        return self._restored or super().assumed_state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Ajoute `restored: true` tant que la valeur n’a pas été confirmée."""
+        attributes = super().extra_state_attributes
+        if not self._restored:
+            return attributes
+        return {**(attributes or {}), ATTR_RESTORED: True}
+
     def send_command(self, data, optional, packet_type):
         """Construit et envoie un Packet via le dongle."""
         packet = Packet(packet_type, data=data, optional=optional)
         dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, packet)
+
+    def send_frame(self, frame):
+        """Envoie une trame précalculée (frames.RawFrame) via le dongle."""
+        dispatcher_send(self.hass, SIGNAL_SEND_MESSAGE, frame)
+
+    def send_tracked_frame(self, frame, channel, on_result=None):
+        """
+        Comme send_frame, mais le dongle attend le statut CMD 0x04 du canal
+        (ré-émission si besoin) ; on_result(confirmé) est appelé dans la boucle HA.
+        """
+        dongle = self.hass.data.get(DATA_ENOCEAN, {}).get(ENOCEAN_DONGLE)
+        if dongle is None:
+            self.send_frame(frame)
+            return
+        dongle.send_tracked(self._dev_int, channel, frame, on_result)
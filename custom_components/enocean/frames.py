@@ -0,0 +1,94 @@
+# custom_components/enocean/frames.py
+# -*- coding: utf-8 -*-
+"""
+frames.py — Trames ESP3 précalculées pour les commandes sortantes.
+
+Chaque turn_on/turn_off construisait des listes Python, un Packet python-enocean,
+puis le re-sérialisait en recalculant les deux CRC8. Ici, chaque entité prépare
+ses trames à la création :
+- trames constantes (D2-01 ON/OFF d'un canal, light OFF) : octets figés, réutilisés ;
+- gabarits à octet variable (light ON + luminosité) : entête et CRC entête figés,
+  CRC des données pré-calculé jusqu'à l'octet variable ; l'envoi ne fait que
+  patcher l'octet et finir le CRC sur les quelques octets suivants.
+
+Les trames produites (RawFrame) passent par la même file cadencée que les Packet ;
+EnOceanSerialCommunicator.send() les accepte telles quelles.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+# Synchro ESP3 + taille d'entête (sync, len data(2), len opt, type, CRC8 entête)
+ESP3_SYNC = 0x55
+ESP3_HEADER_LEN = 6
+
+
+def _make_crc8_table() -> tuple[int, ...]:
+    """Table CRC8 (polynôme 0x07), identique à enocean.protocol.crc8."""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return tuple(table)
+
+
+CRC8_TABLE = _make_crc8_table()
+
+
+def crc8(data: Iterable[int], crc: int = 0) -> int:
+    """CRC8 ESP3 ; `crc` permet de reprendre un calcul partiel."""
+    table = CRC8_TABLE
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+def build_frame(packet_type: int, data: list[int], optional: list[int]) -> bytes:
+    """Sérialise une trame ESP3 complète (équivalent de Packet.build())."""
+    header = bytes(
+        [(len(data) >> 8) & 0xFF, len(data) & 0xFF, len(optional), packet_type]
+    )
+    body = bytes(data) + bytes(optional)
+    return bytes([ESP3_SYNC]) + header + bytes([crc8(header)]) + body + bytes([crc8(body)])
+
+
+class RawFrame:
+    """Trame ESP3 prête à écrire ; expose build() comme un Packet."""
+
+    __slots__ = ("frame",)
+
+    def __init__(self, frame: bytes) -> None:
+        self.frame = frame
+
+    def build(self) -> bytes:
+        """Octets à écrire sur le port (appelé par le thread du communicateur)."""
+        return self.frame
+
+    def __repr__(self) -> str:
+        return f"RawFrame({self.frame.hex(' ')})"
+
+
+class FrameTemplate:
+    """Gabarit de trame dont un seul octet de données varie."""
+
+    __slots__ = ("_frame", "_offset", "_crc_index", "_prefix_crc")
+
+    def __init__(
+        self, packet_type: int, data: list[int], optional: list[int], data_index: int
+    ) -> None:
+        """`data_index` : position (dans data) de l'octet à patcher à l'envoi."""
+        self._frame = build_frame(packet_type, data, optional)
+        self._offset = ESP3_HEADER_LEN + data_index
+        self._crc_index = len(self._frame) - 1
+        # CRC des données jusqu'à l'octet variable (exclu), calculé une fois
+        self._prefix_crc = crc8(self._frame[ESP3_HEADER_LEN:self._offset])
+
+    def render(self, value: int) -> RawFrame:
+        """Trame avec l'octet variable = value (CRC données terminé sur la suite)."""
+        buf = bytearray(self._frame)
+        buf[self._offset] = value & 0xFF
+        buf[self._crc_index] = crc8(buf[self._offset:self._crc_index], self._prefix_crc)
+        return RawFrame(bytes(buf))
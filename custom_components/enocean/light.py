@@ -3,6 +3,8 @@
 Plateforme light EnOcean (copie core) :
 - Cas variateurs 4BS (A5-02-xx) avec 'sender_id' (ID émetteur simulé)
 - Pas utile pour les D2-01-xx, mais on garde pour compatibilité
+- Trames précalculées à la création : OFF figée, ON = gabarit dont on patche la luminosité
+- Dernier état (allumée, luminosité) restauré au démarrage (restore.py)
 """
 
 from __future__ import annotations
@@ -18,13 +20,17 @@ from homeassistant.components.light import (
     ColorMode,
     LightEntity,
 )
-from homeassistant.const import CONF_ID, CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_ID, CONF_NAME, STATE_OFF, STATE_ON, Platform
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoreEntity
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
 from .entity import EnOceanEntity
+from .frames import FrameTemplate, RawFrame, build_frame
+from .restore import async_restore_entities
+from .telegram import Telegram
 
 CONF_SENDER_ID = "sender_id"
 DEFAULT_NAME = "EnOcean Light"
@@ -38,19 +44,21 @@ PLATFORM_SCHEMA = LIGHT_PLATFORM_SCHEMA.extend(
     }
 )
 
-def setup_platform(
+async def async_setup_platform(
     hass: HomeAssistant,
     config: ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: DiscoveryInfoType | None = None,
 ) -> None:
     """Enregistre l’entité light depuis le YAML."""
     sender_id: list[int] = config[CONF_SENDER_ID]
     dev_name: str = config[CONF_NAME]
     dev_id: list[int] = config[CONF_ID]
-    add_entities([EnOceanLight(sender_id, dev_id, dev_name)])
+    entities = [EnOceanLight(sender_id, dev_id, dev_name)]
+    async_restore_entities(hass, Platform.LIGHT, entities)
+    async_add_entities(entities)
 
-class EnOceanLight(EnOceanEntity, LightEntity):
+class EnOceanLight(EnOceanEntity, LightEntity, RestoreEntity):
     """Variateur EnOcean (4BS) avec brightness 0..100%."""
 
     _attr_color_mode = ColorMode.BRIGHTNESS
@@ -64,6 +72,20 @@ class EnOceanLight(EnOceanEntity, LightEntity):
         self._sender_id = sender_id
         self._attr_unique_id = str(combine_hex(dev_id)) if dev_id else dev_name
         self._attr_name = dev_name
+        # 4BS A5-02 : [A5, 02, luminosité, 01, 09, sender(4), status] ; octet 2 variable
+        command = [0xA5, 0x02, 0x00, 0x01, 0x09] + sender_id + [0x00]
+        self._frame_on = FrameTemplate(0x01, command, [], data_index=2)
+        self._frame_off = RawFrame(build_frame(0x01, command, []))
+
+    def restore_last_state(self, state: State, extra_data: ExtraStoredData | None) -> bool:
+        """Reprend allumée/éteinte et la luminosité sauvegardées."""
+        if state.state not in (STATE_ON, STATE_OFF):
+            return False
+        self._attr_is_on = state.state == STATE_ON
+        if (brightness := state.attributes.get(ATTR_BRIGHTNESS)) is not None:
+            self._attr_brightness = brightness
+        self._restored = True
+        return True
 
     def turn_on(self, **kwargs: Any) -> None:
         """Envoie 4BS (A5-02) avec brightness (1..100)."""
@@ -74,24 +96,20 @@ class EnOceanLight(EnOceanEntity, LightEntity):
         if bval == 0:
             bval = 1
 
-        command = [0xA5, 0x02, bval, 0x01, 0x09]
-        command.extend(self._sender_id)
-        command.extend([0x00])
-        self.send_command(command, [], 0x01)
+        self.send_frame(self._frame_on.render(bval))
         self._attr_is_on = True
+        self._restored = False
 
     def turn_off(self, **kwargs: Any) -> None:
         """Envoie 4BS (A5-02) brightness=0."""
-        command = [0xA5, 0x02, 0x00, 0x01, 0x09]
-        command.extend(self._sender_id)
-        command.extend([0x00])
-        self.send_command(command, [], 0x01)
+        self.send_frame(self._frame_off)
         self._attr_is_on = False
+        self._restored = False
 
-    def value_changed(self, packet):
+    def value_changed(self, packet: Telegram):
         """Met à jour brightness si le device renvoie un 4BS A5-02."""
-        if packet.data[0] == 0xA5 and packet.data[1] == 0x02:
-            val = packet.data[2]
+        if packet.rorg == 0xA5 and len(packet.payload) == 4 and packet.payload[0] == 0x02:
+            val = packet.payload[1]
             self._attr_brightness = math.floor(val / 100.0 * 256.0)
             self._attr_is_on = bool(val != 0)
             self.schedule_update_ha_state()
@@ -0,0 +1,160 @@
+# custom_components/enocean/probe.py
+# -*- coding: utf-8 -*-
+"""
+probe.py — Identification des dongles EnOcean parmi les ports candidats.
+
+detect() liste tous les ports série, y compris les clés Zigbee/Z-Wave ; un
+simple test d'existence ne permet pas de les distinguer. Ici, chaque candidat
+reçoit la common command CO_RD_VERSION (0x03) et n'est retenu que s'il répond
+par une trame ESP3 RESPONSE valide (CRC entête et données, code retour OK).
+
+Tous les ports sont sondés en parallèle avec un délai court (PROBE_TIMEOUT) :
+la durée totale reste celle du port le plus lent, quel que soit leur nombre.
+Les adresses tcp://hôte:port sont sondées de la même façon.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import serial  # type: ignore  # pyserial, dépendance de python-enocean
+
+from homeassistant.core import HomeAssistant
+
+from .communicator import parse_tcp_url
+from .frames import ESP3_HEADER_LEN, ESP3_SYNC, build_frame, crc8
+
+_LOGGER = logging.getLogger(__name__)
+
+# Délai de réponse accordé à chaque port (s) — un USB300 répond en quelques ms
+PROBE_TIMEOUT = 0.3
+PROBE_BAUDRATE = 57600
+
+# ESP3 : common command CO_RD_VERSION et type de trame de la réponse
+PACKET_RESPONSE = 0x02
+PACKET_COMMON_COMMAND = 0x05
+CO_RD_VERSION = 0x03
+RET_OK = 0x00
+# Réponse : code retour(1) + APP version(4) + API version(4) + chip ID(4) + chip version(4) [+ description(16)]
+_VERSION_MIN_LEN = 17
+
+_CO_RD_VERSION_FRAME = build_frame(PACKET_COMMON_COMMAND, [CO_RD_VERSION], [])
+
+
+@dataclass(frozen=True)
+class DongleInfo:
+    """Dongle ayant répondu à CO_RD_VERSION."""
+
+    path: str
+    chip_id: str
+    app_version: str
+    api_version: str
+    description: str = ""
+
+    @property
+    def label(self) -> str:
+        """Libellé court pour le formulaire de configuration."""
+        name = f"{self.description} " if self.description else ""
+        return f"{self.path} ({name}chip {self.chip_id}, app {self.app_version})"
+
+
+def parse_version_response(buf: bytes) -> Optional[tuple[str, str, str, str]]:
+    """
+    Cherche dans `buf` une réponse CO_RD_VERSION valide.
+    Retourne (app, api, chip_id, description) ou None (incomplet / invalide).
+    Les octets parasites et les trames d'autres types (radio…) sont ignorés.
+    """
+    start = 0
+    while True:
+        start = buf.find(ESP3_SYNC, start)
+        if start < 0 or len(buf) - start < ESP3_HEADER_LEN:
+            return None
+        header = buf[start + 1:start + 5]
+        if buf[start + 5] != crc8(header):
+            start += 1
+            continue
+        data_len = (header[0] << 8) | header[1]
+        end = start + ESP3_HEADER_LEN + data_len + header[2] + 1
+        if len(buf) < end:
+            return None
+        body = buf[start + ESP3_HEADER_LEN:end - 1]
+        if buf[end - 1] == crc8(body) and header[3] == PACKET_RESPONSE:
+            data = body[:data_len]
+            if data_len >= _VERSION_MIN_LEN and data[0] == RET_OK:
+                app = ".".join(str(b) for b in data[1:5])
+                api = ".".join(str(b) for b in data[5:9])
+                chip_id = data[9:13].hex().upper()
+                description = data[17:33].split(b"\x00", 1)[0].decode("ascii", "replace").strip()
+                return app, api, chip_id, description
+        start = end
+
+
+def probe_port(path: str, timeout: float = PROBE_TIMEOUT) -> Optional[DongleInfo]:
+    """
+    Sonde un port (bloquant, à lancer hors boucle) : envoie CO_RD_VERSION et
+    attend une réponse ESP3 valide pendant au plus `timeout` s.
+    """
+    deadline = time.monotonic() + timeout
+    buf = bytearray()
+    try:
+        tcp = parse_tcp_url(path)
+        if tcp is not None:
+            with socket.create_connection(tcp, timeout=timeout) as sock:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.sendall(_CO_RD_VERSION_FRAME)
+                while (left := deadline - time.monotonic()) > 0:
+                    sock.settimeout(left)
+                    chunk = sock.recv(256)
+                    if not chunk:
+                        break
+                    buf.extend(chunk)
+                    if (found := parse_version_response(buf)) is not None:
+                        return DongleInfo(path, found[2], found[0], found[1], found[3])
+            return None
+
+        # exclusive : on ne touche pas à un port déjà ouvert par une autre intégration
+        with serial.Serial(
+            path, PROBE_BAUDRATE, timeout=0.02, write_timeout=timeout, exclusive=True
+        ) as port:
+            port.reset_input_buffer()
+            port.write(_CO_RD_VERSION_FRAME)
+            while time.monotonic() < deadline:
+                chunk = port.read(port.in_waiting or 1)
+                if not chunk:
+                    continue
+                buf.extend(chunk)
+                if (found := parse_version_response(buf)) is not None:
+                    return DongleInfo(path, found[2], found[0], found[1], found[3])
+    except (OSError, ValueError, serial.SerialException) as exc:
+        _LOGGER.debug("Sonde %s : %s", path, exc)
+    return None
+
+
+async def async_probe_ports(
+    hass: HomeAssistant, paths: Iterable[str], timeout: float = PROBE_TIMEOUT
+) -> list[DongleInfo]:
+    """Sonde tous les ports en parallèle ; ne garde que les dongles EnOcean (ordre conservé)."""
+    # /dev/serial/by-id/* pointe vers un /dev/tty* déjà listé : un seul essai par
+    # périphérique réel (le premier chemin, le plus stable, est conservé)
+    seen: set[str] = set()
+    unique: list[str] = []
+    for path in paths:
+        real = path if parse_tcp_url(path) else os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            unique.append(path)
+    paths = unique
+    if not paths:
+        return []
+    results = await asyncio.gather(
+        *(hass.async_add_executor_job(probe_port, path, timeout) for path in paths)
+    )
+    found = [info for info in results if info is not None]
+    _LOGGER.debug("Sonde EnOcean : %d/%d port(s) ont répondu.", len(found), len(paths))
+    return found
@@ -0,0 +1,128 @@
+# custom_components/enocean/ratelimit.py
+# -*- coding: utf-8 -*-
+"""
+ratelimit.py — Limitation de débit par émetteur (seau à jetons).
+
+Un capteur défaillant qui émet en boucle sature le dispatcher et le recorder.
+Chaque émetteur dispose d'un seau de `burst` jetons rechargé à `rate` jetons/s :
+- jeton disponible → le télégramme est diffusé normalement ;
+- seau vide → le télégramme est mis de côté ; seul le DERNIER est conservé
+  et sera diffusé dès qu'un jeton se libère (agrégation "keep latest").
+
+Coût par paquet : O(1) (une entrée de dict + quelques opérations flottantes).
+Les seaux pleins (émetteur calme) sont retirés au plus une fois par
+SWEEP_INTERVAL : la mémoire reste proportionnelle aux émetteurs actifs.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Optional
+
+# Intervalle minimal (s) entre deux purges des seaux pleins
+SWEEP_INTERVAL = 60.0
+
+
+class SenderRateLimiter:
+    """Seaux à jetons indexés par ID émetteur (entier 32 bits)."""
+
+    def __init__(self, burst: int, rate: float) -> None:
+        # Capacité du seau (télégrammes acceptés d'affilée)
+        self.burst = float(max(1, burst))
+        # Débit soutenu (télégrammes/s)
+        self.rate = float(rate)
+        # sender -> [jetons, horodatage de la dernière recharge]
+        self._buckets: dict[int, list[float]] = {}
+        # sender -> dernier télégramme retenu (en attente d'un jeton)
+        self._pending: dict[int, Any] = {}
+        # sender -> nombre de télégrammes remplacés (agrégés) depuis le début
+        self.suppressed: dict[int, int] = {}
+        # Thread de lecture et boucle HA consomment tous deux des jetons
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL
+
+    @property
+    def refill_time(self) -> float:
+        """Durée (s) pour qu'un seau vide redevienne plein."""
+        return self.burst / self.rate
+
+    def _is_full(self, bucket: list[float], now: float) -> bool:
+        return bucket[0] + (now - bucket[1]) * self.rate >= self.burst
+
+    def _sweep(self, now: float) -> None:
+        """Retire les seaux pleins sans télégramme en attente (ils seraient recréés pleins)."""
+        self._next_sweep = now + SWEEP_INTERVAL
+        calm = [
+            sender
+            for sender, bucket in self._buckets.items()
+            if sender not in self._pending and self._is_full(bucket, now)
+        ]
+        for sender in calm:
+            del self._buckets[sender]
+
+    def _take(self, sender: int, now: float) -> float:
+        """Recharge puis tente de prendre un jeton ; retourne 0 si pris, sinon l'attente (s)."""
+        bucket = self._buckets.get(sender)
+        if bucket is None:
+            self._buckets[sender] = [self.burst - 1.0, now]
+            return 0.0
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+        bucket[0] = tokens
+        return (1.0 - tokens) / self.rate
+
+    def offer(self, sender: int, packet: Any) -> Optional[float]:
+        """
+        Présente un télégramme.
+        - None : jeton pris, le télégramme peut être diffusé immédiatement.
+        - float : télégramme retenu ; délai avant qu'un jeton se libère.
+          Si un télégramme était déjà en attente pour cet émetteur, il est remplacé
+          (le délai retourné vaut alors -1 : une vidange est déjà planifiée).
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._next_sweep:
+                self._sweep(now)
+            wait = self._take(sender, now)
+            if not wait:
+                return None
+            already_pending = sender in self._pending
+            self._pending[sender] = packet
+            self.suppressed[sender] = self.suppressed.get(sender, 0) + 1
+            return -1.0 if already_pending else wait
+
+    def release(self, sender: int) -> tuple[Any, Optional[float]]:
+        """
+        Vidange planifiée : retourne (télégramme à diffuser ou None, nouvelle attente).
+        Si le jeton n'est toujours pas disponible, on renvoie l'attente restante.
+        """
+        with self._lock:
+            if sender not in self._pending:
+                return None, None
+            wait = self._take(sender, time.monotonic())
+            if wait:
+                return None, wait
+            # Le télégramme diffusé n'est plus "supprimé"
+            self.suppressed[sender] -= 1
+            return self._pending.pop(sender), None
+
+    def is_calm(self, sender: int) -> bool:
+        """Émetteur revenu sous son débit : rien en attente et seau de nouveau plein."""
+        with self._lock:
+            if sender in self._pending:
+                return False
+            bucket = self._buckets.get(sender)
+            return bucket is None or self._is_full(bucket, time.monotonic())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Compteurs par émetteur (hex) pour le service link_status."""
+        return {
+            "burst": int(self.burst),
+            "rate": self.rate,
+            "suppressed": {f"{s:08X}": n for s, n in self.suppressed.items() if n},
+            "pending": len(self._pending),
+        }
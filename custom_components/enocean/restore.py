@@ -0,0 +1,48 @@
+# custom_components/enocean/restore.py
+# -*- coding: utf-8 -*-
+"""
+restore.py — Restauration groupée des derniers états au démarrage.
+
+RestoreSensor.async_get_last_sensor_data() est attendu entité par entité dans
+async_added_to_hass ; switches et lights ne restauraient rien et démarraient
+éteints (automatisations déclenchées à tort). Ici, à la mise en place de la
+plateforme et avant l'ajout des entités, un seul passage synchrone :
+- unique_id -> entity_id via le registre des entités ;
+- entity_id -> dernier état sauvegardé (RestoreStateData, déjà chargé par HA) ;
+- l'entité reprend sa valeur via restore_last_state().
+
+Une valeur restaurée est marquée périmée (attribut `restored`, état supposé)
+jusqu'au premier télégramme reçu de l'appareil (voir EnOceanEntity).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import restore_state
+
+from .const import DOMAIN, LOGGER
+from .entity import EnOceanEntity
+
+
+@callback
+def async_restore_entities(
+    hass: HomeAssistant, domain: str, entities: Iterable[EnOceanEntity]
+) -> int:
+    """Restaure en un passage les entités de la plateforme `domain` ; retourne le nombre restauré."""
+    registry = er.async_get(hass)
+    last_states = restore_state.async_get(hass).last_states
+    total = restored = 0
+    for entity in entities:
+        total += 1
+        if entity.unique_id is None:
+            continue
+        entity_id = registry.async_get_entity_id(domain, DOMAIN, entity.unique_id)
+        if entity_id is None or (stored := last_states.get(entity_id)) is None:
+            continue
+        if entity.restore_last_state(stored.state, stored.extra_data):
+            restored += 1
+    LOGGER.debug("Restauration %s : %d/%d état(s) repris.", domain, restored, total)
+    return restored
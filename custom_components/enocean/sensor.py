@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+Plateforme sensor EnOcean (copie core) :
+- Température (A5-02 / A5-04 / A5-10), humidité, puissance (A5-12-01), poignée (F6-10-00)
+- Ajout : énergie cumulée A5-12-01 (relevés DT == 0), un compteur total_increasing
+  par canal tarifaire, écritures limitées à une par `energy_interval`
+- Ajout : agrégation optionnelle par capteur (mean/min/max/last sur une fenêtre)
+  pour ne publier qu’un état par fenêtre et soulager le recorder
+- Dernières valeurs restaurées en un passage à la mise en place (restore.py)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+import time
+
+from enocean.utils import combine_hex
+import voluptuous as vol
+
+from homeassistant.components.sensor import (
+    PLATFORM_SCHEMA as SENSOR_PLATFORM_SCHEMA,
+    RestoreSensor,
+    SensorExtraStoredData,
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    CONF_DEVICE_CLASS,
+    CONF_ID,
+    CONF_NAME,
+    PERCENTAGE,
+    STATE_CLOSED,
+    STATE_OPEN,
+    Platform,
+    UnitOfEnergy,
+    UnitOfPower,
+    UnitOfTemperature,
+)
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.restore_state import ExtraStoredData
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+
+from .aggregation import AGGREGATE_MODES, WindowAccumulator
+from .entity import EnOceanEntity
+from .restore import async_restore_entities
+from .telegram import meter_reading
+
+CONF_MAX_TEMP = "max_temp"
+CONF_MIN_TEMP = "min_temp"
+CONF_RANGE_FROM = "range_from"
+CONF_RANGE_TO = "range_to"
+CONF_AGGREGATE = "aggregate"
+CONF_AGGREGATE_WINDOW = "aggregate_window"
+CONF_TARIFFS = "tariffs"
+CONF_ENERGY_INTERVAL = "energy_interval"
+
+DEFAULT_NAME = "EnOcean sensor"
+DEFAULT_AGGREGATE_WINDOW = timedelta(minutes=5)
+DEFAULT_TARIFFS = [0]
+DEFAULT_ENERGY_INTERVAL = timedelta(minutes=1)
+
+SENSOR_TYPE_HUMIDITY = "humidity"
+SENSOR_TYPE_POWER = "powersensor"
+SENSOR_TYPE_ENERGY = "energy"
+SENSOR_TYPE_TEMPERATURE = "temperature"
+SENSOR_TYPE_WINDOWHANDLE = "windowhandle"
+
+
+@dataclass(frozen=True, kw_only=True)
+class EnOceanSensorEntityDescription(SensorEntityDescription):
+    """Description d’une entité capteur EnOcean."""
+
+    unique_id: Callable[[list[int]], str | None]
+
+
+SENSOR_DESC_TEMPERATURE = EnOceanSensorEntityDescription(
+    key=SENSOR_TYPE_TEMPERATURE,
+    name="Temperature",
+    native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+    device_class=SensorDeviceClass.TEMPERATURE,
+    state_class=SensorStateClass.MEASUREMENT,
+    unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_TEMPERATURE}",
+)
+
+SENSOR_DESC_HUMIDITY = EnOceanSensorEntityDescription(
+    key=SENSOR_TYPE_HUMIDITY,
+    name="Humidity",
+    native_unit_of_measurement=PERCENTAGE,
+    device_class=SensorDeviceClass.HUMIDITY,
+    state_class=SensorStateClass.MEASUREMENT,
+    unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_HUMIDITY}",
+)
+
+SENSOR_DESC_POWER = EnOceanSensorEntityDescription(
+    key=SENSOR_TYPE_POWER,
+    name="Power",
+    native_unit_of_measurement=UnitOfPower.WATT,
+    device_class=SensorDeviceClass.POWER,
+    state_class=SensorStateClass.MEASUREMENT,
+    unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_POWER}",
+)
+
+SENSOR_DESC_ENERGY = EnOceanSensorEntityDescription(
+    key=SENSOR_TYPE_ENERGY,
+    name="Energy",
+    native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+    device_class=SensorDeviceClass.ENERGY,
+    state_class=SensorStateClass.TOTAL_INCREASING,
+    unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_ENERGY}",
+)
+
+SENSOR_DESC_WINDOWHANDLE = EnOceanSensorEntityDescription(
+    key=SENSOR_TYPE_WINDOWHANDLE,
+    name="WindowHandle",
+    translation_key="window_handle",
+    unique_id=lambda dev_id: f"{combine_hex(dev_id)}-{SENSOR_TYPE_WINDOWHANDLE}",
+)
+
+# Schéma YAML : identique au core + options d’agrégation
+PLATFORM_SCHEMA = SENSOR_PLATFORM_SCHEMA.extend(
+    {
+        vol.Required(CONF_ID): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+        vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
+        vol.Optional(CONF_DEVICE_CLASS, default=SENSOR_TYPE_POWER): cv.string,
+        vol.Optional(CONF_MAX_TEMP, default=40): vol.Coerce(int),
+        vol.Optional(CONF_MIN_TEMP, default=0): vol.Coerce(int),
+        vol.Optional(CONF_RANGE_FROM, default=255): cv.positive_int,
+        vol.Optional(CONF_RANGE_TO, default=0): cv.positive_int,
+        vol.Optional(CONF_AGGREGATE): vol.In(AGGREGATE_MODES),
+        vol.Optional(
+            CONF_AGGREGATE_WINDOW, default=DEFAULT_AGGREGATE_WINDOW
+        ): cv.positive_time_period,
+        # Compteurs A5-12-01 : canaux tarifaires (TI 0..15) et écriture minimale
+        vol.Optional(CONF_TARIFFS, default=DEFAULT_TARIFFS): vol.All(
+            cv.ensure_list, [vol.All(vol.Coerce(int), vol.Range(min=0, max=15))]
+        ),
+        vol.Optional(
+            CONF_ENERGY_INTERVAL, default=DEFAULT_ENERGY_INTERVAL
+        ): cv.positive_time_period,
+    }
+)
+
+
+async def async_setup_platform(
+    hass: HomeAssistant,
+    config: ConfigType,
+    async_add_entities: AddEntitiesCallback,
+    discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    """Enregistre le capteur depuis le YAML."""
+    dev_id: list[int] = config[CONF_ID]
+    dev_name: str = config[CONF_NAME]
+    sensor_type: str = config[CONF_DEVICE_CLASS]
+    # Agrégation (capteurs numériques uniquement)
+    aggregation = {
+        "aggregate": config.get(CONF_AGGREGATE),
+        "aggregate_window": config[CONF_AGGREGATE_WINDOW],
+    }
+
+    entities: list[EnOceanSensor] = []
+    if sensor_type == SENSOR_TYPE_TEMPERATURE:
+        entities = [
+            EnOceanTemperatureSensor(
+                dev_id,
+                dev_name,
+                SENSOR_DESC_TEMPERATURE,
+                scale_min=config[CONF_MIN_TEMP],
+                scale_max=config[CONF_MAX_TEMP],
+                range_from=config[CONF_RANGE_FROM],
+                range_to=config[CONF_RANGE_TO],
+                **aggregation,
+            )
+        ]
+
+    elif sensor_type == SENSOR_TYPE_HUMIDITY:
+        entities = [
+            EnOceanHumiditySensor(dev_id, dev_name, SENSOR_DESC_HUMIDITY, **aggregation)
+        ]
+
+    elif sensor_type == SENSOR_TYPE_POWER:
+        entities = [EnOceanPowerSensor(dev_id, dev_name, SENSOR_DESC_POWER, **aggregation)]
+        # Même compteur : un total d'énergie par canal tarifaire
+        entities.extend(
+            EnOceanEnergySensor(
+                dev_id,
+                dev_name,
+                SENSOR_DESC_ENERGY,
+                tariff=tariff,
+                write_interval=config[CONF_ENERGY_INTERVAL],
+            )
+            for tariff in dict.fromkeys(config[CONF_TARIFFS])
+        )
+
+    elif sensor_type == SENSOR_TYPE_WINDOWHANDLE:
+        entities = [EnOceanWindowHandle(dev_id, dev_name, SENSOR_DESC_WINDOWHANDLE)]
+
+    async_restore_entities(hass, Platform.SENSOR, entities)
+    async_add_entities(entities)
+
+
+class EnOceanSensor(EnOceanEntity, RestoreSensor):
+    """Capteur EnOcean générique (dernière valeur restaurée par restore.py)."""
+
+    def __init__(
+        self,
+        dev_id: list[int],
+        dev_name: str,
+        description: EnOceanSensorEntityDescription,
+    ) -> None:
+        """Sauve description, nom et unique_id."""
+        super().__init__(dev_id)
+        self.entity_description = description
+        self._attr_name = f"{description.name} {dev_name}"
+        self._attr_unique_id = description.unique_id(dev_id)
+
+    def restore_last_state(self, state: State, extra_data: ExtraStoredData | None) -> bool:
+        """Reprend la dernière valeur sauvegardée si aucune n’a encore été reçue."""
+        if self._attr_native_value is not None or extra_data is None:
+            return False
+        sensor_data = SensorExtraStoredData.from_dict(extra_data.as_dict())
+        if sensor_data is None or sensor_data.native_value is None:
+            return False
+        self._attr_native_value = sensor_data.native_value
+        self._restored = True
+        return True
+
+    def value_changed(self, packet):
+        """À surcharger : met à jour l’état suivant le paquet."""
+
+
+class EnOceanAggregatedSensor(EnOceanSensor):
+    """
+    Capteur numérique avec agrégation optionnelle.
+    - aggregate=None : chaque valeur reçue est publiée (comportement core).
+    - aggregate=mean|min|max|last : les valeurs alimentent un accumulateur et
+      un seul état est publié par fenêtre, avec les attributs aggregate_*.
+    """
+
+    # Arrondi appliqué à la moyenne publiée
+    _aggregate_ndigits = 1
+
+    def __init__(
+        self,
+        dev_id: list[int],
+        dev_name: str,
+        description: EnOceanSensorEntityDescription,
+        *,
+        aggregate: str | None = None,
+        aggregate_window: timedelta = DEFAULT_AGGREGATE_WINDOW,
+    ) -> None:
+        """Sauve le mode et la fenêtre d’agrégation."""
+        super().__init__(dev_id, dev_name, description)
+        self._aggregate = aggregate
+        self._aggregate_window = aggregate_window
+        self._accumulator = WindowAccumulator() if aggregate else None
+
+    async def async_added_to_hass(self) -> None:
+        """Arme la publication périodique si l’agrégation est active."""
+        await super().async_added_to_hass()
+        if self._accumulator is not None:
+            self.async_on_remove(
+                async_track_time_interval(
+                    self.hass, self._async_publish_window, self._aggregate_window
+                )
+            )
+
+    def _publish(self, value: float) -> None:
+        """Publie la valeur tout de suite, ou l’accumule jusqu’à la fin de fenêtre."""
+        if self._accumulator is None:
+            self._attr_native_value = value
+            self.schedule_update_ha_state()
+            return
+        self._accumulator.add(value)
+
+    @callback
+    def _async_publish_window(self, _now=None) -> None:
+        """Fin de fenêtre : publie l’agrégat et ses attributs, puis remet à zéro."""
+        acc = self._accumulator
+        if acc is None or not acc.count:
+            return
+        value = acc.result(self._aggregate)
+        self._attr_native_value = round(value, self._aggregate_ndigits)
+        self._attr_extra_state_attributes = {
+            **acc.attributes(self._aggregate_ndigits),
+            "aggregate": self._aggregate,
+            "aggregate_window": self._aggregate_window.total_seconds(),
+        }
+        acc.reset()
+        self.async_write_ha_state()
+
+
+# A5-12-xx, DB0 : LRN (bit 3, 1 = données) | DT (bit 2, 0 = relevé cumulé)
+_METER_DATA_MASK = 0x0C
+_METER_CUMULATIVE = 0x08
+_METER_INSTANT = 0x0C
+# Diviseur de MR selon DIV (DB0 bits 1..0)
+_METER_DIVISORS = (1, 10, 100, 1000)
+
+
+class EnOceanPowerSensor(EnOceanAggregatedSensor):
+    """
+    Capteur de puissance EnOcean.
+    EEP : A5-12-01 (Automated Meter Reading, Electricity)
+    """
+
+    _aggregate_ndigits = 3
+
+    def value_changed(self, packet):
+        """Met à jour la puissance instantanée (DT == 1)."""
+        payload = packet.payload
+        if (
+            packet.rorg != 0xA5
+            or len(payload) != 4
+            or payload[3] & _METER_DATA_MASK != _METER_INSTANT
+        ):
+            return
+        # Ce télégramme porte la valeur instantanée
+        raw_val, _data_type, divisor, _tariff = meter_reading(payload)
+        self._publish(raw_val / _METER_DIVISORS[divisor])
+
+
+class EnOceanEnergySensor(EnOceanSensor):
+    """
+    Compteur d’énergie EnOcean (kWh, total croissant), un par canal tarifaire.
+    EEP : A5-12-01, relevés cumulés (DT == 0).
+    Les relevés rapprochés ne sont pas tous écrits : au plus un état par
+    `write_interval`, le dernier relevé reçu étant publié en fin d’intervalle.
+    """
+
+    def __init__(
+        self,
+        dev_id: list[int],
+        dev_name: str,
+        description: EnOceanSensorEntityDescription,
+        *,
+        tariff: int = 0,
+        write_interval: timedelta = DEFAULT_ENERGY_INTERVAL,
+    ) -> None:
+        """Sauve le canal tarifaire et l’intervalle d’écriture."""
+        super().__init__(dev_id, dev_name, description)
+        self._tariff = tariff
+        self._write_interval = write_interval
+        self._write_interval_s = write_interval.total_seconds()
+        # Instant (monotonic) de la dernière écriture, relevé en attente
+        self._last_write = -self._write_interval_s
+        self._pending: float | None = None
+        if tariff:
+            # Le tarif 0 garde l’unique_id du compteur sans tarif
+            self._attr_name = f"{description.name} T{tariff} {dev_name}"
+            self._attr_unique_id = f"{description.unique_id(dev_id)}-t{tariff}"
+        self._attr_extra_state_attributes = {"tariff": tariff}
+
+    async def async_added_to_hass(self) -> None:
+        """Arme la publication du relevé en attente."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_flush, self._write_interval)
+        )
+
+    def value_changed(self, packet):
+        """Relevé cumulé (DT == 0) du canal tarifaire : écrit tout de suite ou mis en attente."""
+        payload = packet.payload
+        # Test de bits avant tout décodage : les valeurs instantanées (DT == 1)
+        # et les teach-in sortent ici
+        if (
+            packet.rorg != 0xA5
+            or len(payload) != 4
+            or payload[3] & _METER_DATA_MASK != _METER_CUMULATIVE
+            or payload[3] >> 4 != self._tariff
+        ):
+            return
+        raw_val, _data_type, divisor, _tariff = meter_reading(payload)
+        energy = raw_val / _METER_DIVISORS[divisor]
+        now = time.monotonic()
+        if now - self._last_write < self._write_interval_s:
+            self._pending = energy
+            return
+        self._pending = None
+        self._last_write = now
+        self._attr_native_value = energy
+        self.schedule_update_ha_state()
+
+    @callback
+    def _async_flush(self, _now=None) -> None:
+        """Fin d’intervalle : publie le dernier relevé en attente."""
+        if (energy := self._pending) is None:
+            return
+        self._pending = None
+        self._last_write = time.monotonic()
+        self._attr_native_value = energy
+        self.async_write_ha_state()
+
+
+class EnOceanTemperatureSensor(EnOceanAggregatedSensor):
+    """
+    Capteur de température EnOcean.
+    EEP : A5-02-01 à A5-02-1B (8 bits), A5-04-01/02, A5-10-01 à A5-10-14.
+    Les 10 bits (A5-02-20, A5-02-30) ne sont pas supportés.
+    Pour A5-04-01/02 et A5-10-10 à A5-10-14, l’échelle doit être "0 à 250".
+    """
+
+    def __init__(
+        self,
+        dev_id: list[int],
+        dev_name: str,
+        description: EnOceanSensorEntityDescription,
+        *,
+        scale_min: int,
+        scale_max: int,
+        range_from: int,
+        range_to: int,
+        **aggregation,
+    ) -> None:
+        """Sauve échelle et plage brute."""
+        super().__init__(dev_id, dev_name, description, **aggregation)
+        self._scale_min = scale_min
+        self._scale_max = scale_max
+        self.range_from = range_from
+        self.range_to = range_to
+
+    def value_changed(self, packet):
+        """Convertit l’octet brut (DB1) en °C."""
+        if packet.rorg != 0xA5 or len(packet.payload) != 4:
+            return
+        temp_scale = self._scale_max - self._scale_min
+        temp_range = self.range_to - self.range_from
+        raw_val = packet.payload[2]
+        temperature = temp_scale / temp_range * (raw_val - self.range_from)
+        temperature += self._scale_min
+        self._publish(round(temperature, 1))
+
+
+class EnOceanHumiditySensor(EnOceanAggregatedSensor):
+    """
+    Capteur d’humidité EnOcean.
+    EEP : A5-04-01/02, A5-10-10 à A5-10-14.
+    """
+
+    def value_changed(self, packet):
+        """Convertit l’octet brut (DB2, 0..250) en %."""
+        if packet.rorg != 0xA5 or len(packet.payload) != 4:
+            return
+        humidity = packet.payload[1] * 100 / 250
+        self._publish(round(humidity, 1))
+
+
+class EnOceanWindowHandle(EnOceanSensor):
+    """
+    Poignée de fenêtre EnOcean.
+    EEP : F6-10-00 (Mechanical handle / Hoppe AG)
+    """
+
+    def value_changed(self, packet):
+        """Décode la position (fermée / ouverte / basculée)."""
+        if not packet.payload:
+            return
+        action = (packet.payload[0] & 0x70) >> 4
+
+        if action == 0x07:
+            self._attr_native_value = STATE_CLOSED
+        if action in (0x04, 0x06):
+            self._attr_native_value = STATE_OPEN
+        if action == 0x05:
+            self._attr_native_value = "tilt"
+
+        self.schedule_update_ha_state()
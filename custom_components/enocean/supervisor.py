@@ -0,0 +1,238 @@
+# custom_components/enocean/supervisor.py
+# -*- coding: utf-8 -*-
+"""
+supervisor.py — Surveillance du lien série avec le dongle EnOcean.
+
+Problème traité : si le thread de lecture python-enocean meurt (exception série)
+ou si la clé USB est ré-énumérée, les entités deviennent muettes jusqu'au
+redémarrage de HA.
+
+Principe :
+- Le dongle horodate chaque trame reçue (EnOceanDongle.last_activity).
+- Toutes les SUPERVISOR_CHECK_INTERVAL s, on vérifie que le thread tourne.
+- Après SUPERVISOR_IDLE_TIMEOUT s de silence, on envoie un ping CO_RD_VERSION
+  (commande commune peu coûteuse) ; toute trame reçue ensuite vaut réponse.
+- Sans réponse sous SUPERVISOR_PING_TIMEOUT s (ou thread mort) → lien perdu :
+  on démonte/recrée le communicateur avec un backoff exponentiel. Les trames
+  en file d'émission sont conservées (cf. EnOceanDongle.restart()).
+- Compteurs exposés : reconnexions, pannes, durée d'indisponibilité.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Optional
+
+from enocean.protocol.constants import PACKET  # type: ignore
+from enocean.protocol.packet import Packet  # type: ignore
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+
+from .const import (
+    SUPERVISOR_BACKOFF_MAX,
+    SUPERVISOR_BACKOFF_MIN,
+    SUPERVISOR_CHECK_INTERVAL,
+    SUPERVISOR_IDLE_TIMEOUT,
+    SUPERVISOR_PING_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Common command CO_RD_VERSION (réponse courte, sans effet de bord)
+CO_RD_VERSION = 0x03
+
+
+class LinkSupervisor:
+    """Détecte les blocages du lien série et relance le communicateur."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        dongle,
+        *,
+        check_interval: float = SUPERVISOR_CHECK_INTERVAL,
+        idle_timeout: float = SUPERVISOR_IDLE_TIMEOUT,
+        ping_timeout: float = SUPERVISOR_PING_TIMEOUT,
+        backoff_min: float = SUPERVISOR_BACKOFF_MIN,
+        backoff_max: float = SUPERVISOR_BACKOFF_MAX,
+    ) -> None:
+        # Références HA + dongle supervisé
+        self.hass = hass
+        self._dongle = dongle
+        # Réglages (valeurs par défaut dans const.py)
+        self._check_interval = check_interval
+        self._idle_timeout = idle_timeout
+        self._ping_timeout = ping_timeout
+        self._backoff_min = backoff_min
+        self._backoff_max = backoff_max
+        # État courant
+        self._unsub_check = None        # désabonnement du timer périodique
+        self._unsub_retry = None        # désabonnement du timer de backoff
+        self._reconnect_task: Optional[asyncio.Task] = None  # reconnexion en cours
+        self._stopped = False           # async_stop() appelé (déchargement)
+        self._ping_sent_at: Optional[float] = None
+        self._down_since: Optional[float] = None
+        self._attempt = 0               # nombre de tentatives depuis la panne
+        self._reconnecting = False
+        # Compteurs exposés (cf. as_dict())
+        self.failures = 0
+        self.reconnects = 0
+        self.last_downtime = 0.0
+        self.total_downtime = 0.0
+        self.last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+    @callback
+    def async_start(self) -> None:
+        """Arme la vérification périodique."""
+        self._stopped = False
+        self._unsub_check = async_track_time_interval(
+            self.hass, self._async_check, timedelta(seconds=self._check_interval)
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Désarme les timers et annule la reconnexion en cours (déchargement de l'intégration)."""
+        self._stopped = True
+        if self._unsub_check is not None:
+            self._unsub_check()
+            self._unsub_check = None
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+
+    # ------------------------------------------------------------------
+    # Détection
+    # ------------------------------------------------------------------
+    @callback
+    def _async_check(self, _now=None) -> None:
+        """Vérifie le thread de lecture et l'activité récente du lien."""
+        if self._reconnecting:
+            return
+
+        if not self._dongle.is_alive():
+            self._async_link_lost("thread de lecture arrêté")
+            return
+
+        now = time.monotonic()
+        last = self._dongle.last_activity
+
+        # Un ping est en vol : toute trame reçue depuis suffit comme réponse
+        if self._ping_sent_at is not None:
+            if last >= self._ping_sent_at:
+                self._ping_sent_at = None
+            elif now - self._ping_sent_at >= self._ping_timeout:
+                self._async_link_lost("pas de réponse à CO_RD_VERSION")
+            return
+
+        if now - last >= self._idle_timeout:
+            self._send_ping()
+
+    def _send_ping(self) -> None:
+        """Envoie CO_RD_VERSION pour provoquer une réponse du dongle."""
+        self._ping_sent_at = time.monotonic()
+        try:
+            self._dongle.communicator.send(
+                Packet(PACKET.COMMON_COMMAND, data=[CO_RD_VERSION], optional=[])
+            )
+            _LOGGER.debug("Superviseur: lien inactif, ping CO_RD_VERSION envoyé.")
+        except Exception as exc:
+            self._async_link_lost(f"ping impossible ({exc})")
+
+    # ------------------------------------------------------------------
+    # Reconnexion (backoff exponentiel)
+    # ------------------------------------------------------------------
+    @callback
+    def _async_link_lost(self, reason: str) -> None:
+        """Marque le lien comme perdu et lance la première reconnexion sans attendre."""
+        _LOGGER.warning("EnOcean: lien série perdu (%s), reconnexion…", reason)
+        self.failures += 1
+        self.last_error = reason
+        self._ping_sent_at = None
+        self._down_since = time.monotonic()
+        self._attempt = 0
+        self._reconnecting = True
+        self._async_retry()
+
+    @callback
+    def _async_retry(self, _now=None) -> None:
+        """Lance une tentative de reconnexion (tâche gardée pour async_stop())."""
+        self._unsub_retry = None
+        self._reconnect_task = self.hass.async_create_task(self._async_reconnect())
+
+    @callback
+    def _async_stop_orphan(self, restart: asyncio.Future) -> None:
+        """Arrête le communicateur créé par un restart() qui s'est terminé après async_stop()."""
+        if not restart.cancelled() and restart.exception() is None:
+            self.hass.async_add_executor_job(self._dongle.stop)
+
+    async def _async_reconnect(self) -> None:
+        """Tente de recréer le communicateur ; replanifie avec backoff en cas d'échec."""
+        # restart() tourne dans l'executor et ne peut pas être interrompu : une
+        # annulation (async_stop) n'interrompt que l'attente
+        restart = self.hass.async_add_executor_job(self._dongle.restart)
+        try:
+            await asyncio.shield(restart)
+        except asyncio.CancelledError:
+            restart.add_done_callback(self._async_stop_orphan)
+            raise
+        except Exception as exc:
+            if self._stopped:
+                return
+            delay = min(self._backoff_max, self._backoff_min * (2 ** self._attempt))
+            self._attempt += 1
+            self.last_error = str(exc)
+            _LOGGER.warning(
+                "EnOcean: reconnexion %d échouée (%s), nouvel essai dans %.0fs.",
+                self._attempt, exc, delay,
+            )
+            self._unsub_retry = async_call_later(self.hass, delay, self._async_retry)
+            return
+        finally:
+            if self._reconnect_task is asyncio.current_task():
+                self._reconnect_task = None
+
+        if self._stopped:
+            # Déchargé pendant restart() : le nouveau communicateur ne doit pas survivre
+            await self.hass.async_add_executor_job(self._dongle.stop)
+            return
+
+        self.last_downtime = time.monotonic() - (self._down_since or time.monotonic())
+        self.total_downtime += self.last_downtime
+        self.reconnects += 1
+        self._down_since = None
+        self._attempt = 0
+        self._reconnecting = False
+        _LOGGER.info(
+            "EnOcean: lien série rétabli après %.1fs (reconnexion n°%d).",
+            self.last_downtime, self.reconnects,
+        )
+
+    # ------------------------------------------------------------------
+    # Statistiques
+    # ------------------------------------------------------------------
+    def as_dict(self) -> dict[str, Any]:
+        """Compteurs du lien (service enocean.link_status)."""
+        now = time.monotonic()
+        downtime = self.total_downtime
+        if self._down_since is not None:
+            downtime += now - self._down_since
+        return {
+            "state": "reconnecting" if self._reconnecting else "connected",
+            "failures": self.failures,
+            "reconnects": self.reconnects,
+            "last_downtime_s": round(self.last_downtime, 3),
+            "total_downtime_s": round(downtime, 3),
+            "idle_s": round(now - self._dongle.last_activity, 3),
+            "pending_tx": self._dongle.communicator.transmit.qsize(),
+            "last_error": self.last_error,
+        }
@@ -3,6 +3,10 @@
 Plateforme switch EnOcean (copie core) :
 - Envoie D2-01 ON/OFF vers l’ID récepteur (dev_id) + channel
 - Pas de sender_id configurable (c’est normal pour D2-01)
+- Chaque commande attend le statut CMD 0x04 de l’actionneur (ré-émission si perdu)
+- Trames ON/OFF précalculées à la création (frames.py)
+- Statuts décodés directement sur les octets du Telegram (sans parse_eep)
+- Dernier état restauré au démarrage (restore.py), supposé jusqu’au premier statut
 """
 
 from __future__ import annotations
@@ -15,14 +19,18 @@ from homeassistant.components.switch import (
     PLATFORM_SCHEMA as SWITCH_PLATFORM_SCHEMA,
     SwitchEntity,
 )
-from homeassistant.const import CONF_ID, CONF_NAME, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_ID, CONF_NAME, STATE_OFF, STATE_ON, Platform
+from homeassistant.core import HomeAssistant, State, callback
 from homeassistant.helpers import config_validation as cv, entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoreEntity
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
 from .const import LOGGER, DOMAIN
 from .entity import EnOceanEntity
+from .frames import RawFrame, build_frame
+from .restore import async_restore_entities
+from .telegram import Telegram, meter_reading
 
 CONF_CHANNEL = "channel"
 DEFAULT_NAME = "EnOcean Switch"
@@ -68,9 +76,11 @@ async def async_setup_platform(
     dev_id: list[int] = config[CONF_ID]
     dev_name: str = config[CONF_NAME]
     _migrate_to_new_unique_id(hass, dev_id, channel)
-    async_add_entities([EnOceanSwitch(dev_id, dev_name, channel)])
+    entities = [EnOceanSwitch(dev_id, dev_name, channel)]
+    async_restore_entities(hass, Platform.SWITCH, entities)
+    async_add_entities(entities)
 
-class EnOceanSwitch(EnOceanEntity, SwitchEntity):
+class EnOceanSwitch(EnOceanEntity, SwitchEntity, RestoreEntity):
     """Switch D2-01 EnOcean (récepteur)."""
 
     _attr_is_on = False
@@ -81,43 +91,57 @@ class EnOceanSwitch(EnOceanEntity, SwitchEntity):
         self.channel = channel
         self._attr_unique_id = generate_unique_id(dev_id, channel)
         self._attr_name = dev_name
+        # Trames D2-01 figées (destinataire = dev_id, sender = Base ID du dongle)
+        optional = [0x03] + dev_id + [0xFF, 0x00]
+        self._frame_on = RawFrame(build_frame(
+            0x01, [0xD2, 0x01, channel & 0xFF, 0x64, 0x00, 0x00, 0x00, 0x00, 0x00], optional
+        ))
+        self._frame_off = RawFrame(build_frame(
+            0x01, [0xD2, 0x01, channel & 0xFF, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00], optional
+        ))
+
+    def restore_last_state(self, state: State, extra_data: ExtraStoredData | None) -> bool:
+        """Reprend l’état ON/OFF sauvegardé (supposé jusqu’au premier statut)."""
+        if state.state not in (STATE_ON, STATE_OFF):
+            return False
+        self._attr_is_on = state.state == STATE_ON
+        self._restored = True
+        return True
 
     def turn_on(self, **kwargs: Any) -> None:
         """Envoie D2-01 ON sur le canal."""
-        optional = [0x03] + self.dev_id + [0xFF, 0x00]
-        self.send_command(
-            data=[0xD2, 0x01, self.channel & 0xFF, 0x64, 0x00, 0x00, 0x00, 0x00, 0x00],
-            optional=optional,
-            packet_type=0x01,
-        )
+        self.send_tracked_frame(self._frame_on, self.channel, self._command_result)
         self._attr_is_on = True
+        self._restored = False
 
     def turn_off(self, **kwargs: Any) -> None:
         """Envoie D2-01 OFF sur le canal."""
-        optional = [0x03] + self.dev_id + [0xFF, 0x00]
-        self.send_command(
-            data=[0xD2, 0x01, self.channel & 0xFF, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00],
-            optional=optional,
-            packet_type=0x01,
-        )
+        self.send_tracked_frame(self._frame_off, self.channel, self._command_result)
         self._attr_is_on = False
+        self._restored = False
+
+    @callback
+    def _command_result(self, confirmed: bool) -> None:
+        """Résultat du suivi : l’état optimiste n’est garanti que si confirmé."""
+        self._attr_assumed_state = not confirmed
+        self._attr_extra_state_attributes = {"last_command_confirmed": confirmed}
+        self.async_write_ha_state()
 
-    def value_changed(self, packet):
+    def value_changed(self, packet: Telegram):
         """Met à jour l’état quand on reçoit un statut D2-01."""
-        if packet.data[0] == 0xA5:  # Power meter
-            packet.parse_eep(0x12, 0x01)
-            if packet.parsed["DT"]["raw_value"] == 1:
-                raw_val = packet.parsed["MR"]["raw_value"]
-                divisor = packet.parsed["DIV"]["raw_value"]
+        payload = packet.payload
+        if packet.rorg == 0xA5 and len(payload) == 4:  # Power meter (A5-12-01)
+            raw_val, data_type, divisor, _tariff = meter_reading(payload)
+            if data_type == 1:
                 watts = raw_val / (10 ** divisor)
                 if watts > 1:
                     self._attr_is_on = True
                     self.schedule_update_ha_state()
-        elif packet.data[0] == 0xD2:  # Status actuator
-            packet.parse_eep(0x01, 0x01)
-            if packet.parsed["CMD"]["raw_value"] == 4:
-                channel = packet.parsed["IO"]["raw_value"]
-                output = packet.parsed["OV"]["raw_value"]
+        elif packet.rorg == 0xD2 and len(payload) >= 3:  # Status actuator
+            # D2-01 CMD 0x04 : CMD = DB.0..3, IO = 5 bits, OV = 7 bits
+            if payload[0] & 0x0F == 4:
+                channel = payload[1] & 0x1F
+                output = payload[2] & 0x7F
                 if channel == self.channel:
                     self._attr_is_on = output > 0
                     self.schedule_update_ha_state()
@@ -0,0 +1,130 @@
+# custom_components/enocean/teachin.py
+# -*- coding: utf-8 -*-
+"""
+teachin.py — Reconnaissance des télégrammes d'apprentissage (teach-in).
+
+Sur un site chargé, la plupart des télégrammes reçus pendant une fenêtre
+d'association sont des données ordinaires d'autres capteurs. On ne retient
+que les vrais indicateurs d'apprentissage, décodés sur les octets du
+Telegram (RORG | payload | sender(4) | status) :
+- 4BS (A5) : bit LRN DB0.3 = 0 ; si DB0.7 = 1, FUNC/TYPE/fabricant inclus ;
+- 1BS (D5) : bit LRN DB0.3 = 0 ;
+- UTE (D4) : requête de teach-in (commande 0x0), EEP et sens de communication
+  inclus ; les demandes de suppression sont ignorées ;
+- RPS (F6) : pas de bit LRN (exception) — seul un appui (étrier pressé) d'un
+  module PTM (T21 = 1) vaut apprentissage ; relâchements et autres RPS ignorés.
+
+Les télégrammes de données sont écartés par un simple test de bit, avant
+toute allocation.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import time
+from typing import Any, Optional
+
+from .telegram import Telegram
+
+RORG_RPS = 0xF6
+RORG_1BS = 0xD5
+RORG_4BS = 0xA5
+RORG_UTE = 0xD4
+
+# Bits utiles
+_LRN_BIT = 0x08          # DB0.3 (4BS / 1BS) : 0 = teach-in
+_LRN_TYPE_EEP = 0x80     # DB0.7 (4BS) : 1 = FUNC/TYPE/fabricant inclus
+_RPS_PRESSED = 0x10      # étrier pressé (PTM)
+_STATUS_T21 = 0x20       # statut RPS : module PTM2xx
+_UTE_CMD_MASK = 0x0F     # DB6.3..0 : identifiant de commande (0 = requête teach-in)
+_UTE_DELETE = 0x01       # DB6.5..4 : type de requête "suppression"
+
+KIND_4BS = "4bs"
+KIND_1BS = "1bs"
+KIND_UTE = "ute"
+KIND_RPS = "rps"
+
+
+@dataclass
+class TeachIn:
+    """Teach-in distinct observé pendant une fenêtre d'écoute."""
+
+    sender: int
+    rorg: int
+    kind: str
+    raw: list[int]
+    eep: Optional[str] = None
+    manufacturer: Optional[int] = None
+    bidirectional: bool = False
+    dbm: Optional[int] = None
+    count: int = 1
+    first_seen: float = field(default_factory=time.time)
+
+    @property
+    def sender_hex(self) -> str:
+        """ID émetteur au format AA:BB:CC:DD."""
+        return ":".join(f"{b:02X}" for b in self.sender.to_bytes(4, "big"))
+
+    @property
+    def description(self) -> str:
+        """Résumé lisible (journal, évènement)."""
+        eep = f" EEP {self.eep}" if self.eep else ""
+        return f"{self.kind.upper()} {self.sender_hex}{eep}"
+
+    def as_dict(self) -> dict[str, Any]:
+        """Représentation sérialisable (évènement HA, réponse de service)."""
+        return {
+            "sender": list(self.sender.to_bytes(4, "big")),
+            "sender_hex": self.sender_hex,
+            "rorg": self.rorg,
+            "kind": self.kind,
+            "eep": self.eep,
+            "manufacturer": self.manufacturer,
+            "bidirectional": self.bidirectional,
+            "dbm": self.dbm,
+            "count": self.count,
+            "raw": self.raw,
+            "description": self.description,
+        }
+
+
+def decode_teach_in(telegram: Telegram) -> Optional[TeachIn]:
+    """Retourne le TeachIn porté par ce télégramme, ou None pour un télégramme ordinaire."""
+    rorg = telegram.rorg
+    payload = telegram.payload
+
+    if rorg == RORG_4BS:
+        if len(payload) != 4 or payload[3] & _LRN_BIT:
+            return None
+        eep = manufacturer = None
+        if payload[3] & _LRN_TYPE_EEP:
+            func = payload[0] >> 2
+            type_ = ((payload[0] & 0x03) << 5) | (payload[1] >> 3)
+            eep = f"A5-{func:02X}-{type_:02X}"
+            manufacturer = ((payload[1] & 0x07) << 8) | payload[2]
+        return TeachIn(telegram.sender, rorg, KIND_4BS, telegram.data, eep, manufacturer)
+
+    if rorg == RORG_1BS:
+        if len(payload) != 1 or payload[0] & _LRN_BIT:
+            return None
+        return TeachIn(telegram.sender, rorg, KIND_1BS, telegram.data)
+
+    if rorg == RORG_UTE:
+        if len(payload) != 7:
+            return None
+        db6 = payload[0]
+        if db6 & _UTE_CMD_MASK or (db6 >> 4) & 0x03 == _UTE_DELETE:
+            return None
+        eep = f"{payload[6]:02X}-{payload[5]:02X}-{payload[4]:02X}"
+        manufacturer = ((payload[3] & 0x07) << 8) | payload[2]
+        return TeachIn(
+            telegram.sender, rorg, KIND_UTE, telegram.data, eep, manufacturer,
+            bidirectional=bool(db6 & 0x80),
+        )
+
+    if rorg == RORG_RPS:
+        if len(payload) != 1 or not telegram.status & _STATUS_T21 or not payload[0] & _RPS_PRESSED:
+            return None
+        return TeachIn(telegram.sender, rorg, KIND_RPS, telegram.data)
+
+    return None
@@ -0,0 +1,92 @@
+# custom_components/enocean/telegram.py
+# -*- coding: utf-8 -*-
+"""
+telegram.py — Représentation compacte des télégrammes radio reçus.
+
+Un RadioPacket python-enocean porte des listes, un bitarray, un dict `parsed`
+et une dizaine d'attributs ; il est construit pour chaque trame, même celles
+qu'aucune entité n'attend. Quand le dongle tourne dans HA, le communicateur
+construit à la place un Telegram directement depuis le buffer ESP3 :
+- tuple nommé immuable (pas de __dict__ : `__slots__ = ()`) ;
+- émetteur en entier (comparaison directe avec le dev_id précalculé des entités) ;
+- charge utile ERP1 (entre RORG et émetteur) en bytes.
+
+Les plateformes décodent les octets de `payload` sans passer par parse_eep().
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from .frames import ESP3_HEADER_LEN, ESP3_SYNC, crc8
+
+PACKET_RADIO = 0x01
+
+
+class Telegram(NamedTuple):
+    """Télégramme radio ERP1 reçu (RORG | payload | sender(4) | status)."""
+
+    sender: int
+    rorg: int
+    payload: bytes
+    status: int
+    dbm: int
+
+    @property
+    def sender_hex(self) -> str:
+        """ID émetteur au format AA:BB:CC:DD (journaux)."""
+        return ":".join(f"{b:02X}" for b in self.sender.to_bytes(4, "big"))
+
+    @property
+    def data(self) -> list[int]:
+        """Données ERP1 complètes, comme RadioPacket.data (hors chemin critique)."""
+        return [self.rorg, *self.payload, *self.sender.to_bytes(4, "big"), self.status]
+
+    def __repr__(self) -> str:
+        return (
+            f"Telegram({self.sender_hex} rorg=0x{self.rorg:02X} "
+            f"payload={self.payload.hex()} status=0x{self.status:02X} {self.dbm} dBm)"
+        )
+
+
+def radio_frame_length(buf: list[int]) -> int:
+    """
+    Longueur de la trame radio complète et valide (CRC entête et données) en
+    tête de `buf` (qui commence par l'octet de synchro), ou 0 sinon : trame
+    incomplète, d'un autre type ou corrompue (laissée à Packet.parse_msg()).
+    """
+    if len(buf) < ESP3_HEADER_LEN or buf[0] != ESP3_SYNC or buf[4] != PACKET_RADIO:
+        return 0
+    data_len = (buf[1] << 8) | buf[2]
+    msg_len = ESP3_HEADER_LEN + data_len + buf[3] + 1
+    if (
+        data_len < 6
+        or len(buf) < msg_len
+        or buf[5] != crc8(buf[1:5])
+        or buf[msg_len - 1] != crc8(buf[ESP3_HEADER_LEN:msg_len - 1])
+    ):
+        return 0
+    return msg_len
+
+
+def frame_sender(buf: list[int]) -> int:
+    """ID émetteur (entier) de la trame radio en tête de buffer."""
+    end = ESP3_HEADER_LEN + ((buf[1] << 8) | buf[2])
+    return (buf[end - 5] << 24) | (buf[end - 4] << 16) | (buf[end - 3] << 8) | buf[end - 2]
+
+
+def telegram_from_frame(buf: list[int], sender: int) -> Telegram:
+    """Construit le Telegram de la trame radio en tête de buffer (validée au préalable)."""
+    end = ESP3_HEADER_LEN + ((buf[1] << 8) | buf[2])
+    # optional : sous-télégrammes(1) | destination(4) | dBm(1) | sécurité(1)
+    dbm = -buf[end + 5] if buf[3] >= 6 else 0
+    return Telegram(sender, buf[ESP3_HEADER_LEN], bytes(buf[ESP3_HEADER_LEN + 1:end - 5]), buf[end - 1], dbm)
+
+
+def meter_reading(payload: bytes) -> tuple[int, int, int, int]:
+    """
+    A5-12-xx (comptage) : (valeur MR brute, DT, diviseur DIV, tarif TI).
+    DB3..DB1 = MR (24 bits) ; DB0 = TI(4) | LRN | DT | DIV(2).
+    """
+    db0 = payload[3]
+    return (payload[0] << 16) | (payload[1] << 8) | payload[2], (db0 >> 2) & 0x01, db0 & 0x03, db0 >> 4
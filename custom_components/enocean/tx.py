@@ -0,0 +1,76 @@
+# custom_components/enocean/tx.py
+# -*- coding: utf-8 -*-
+"""
+tx.py — File d'émission cadencée vers le dongle.
+
+Le communicateur python-enocean écrit d'un coup tout ce qui est en file : une
+scène qui pilote 20 actionneurs envoie 20 télégrammes collés, et certains se
+perdent à la radio. Ici, les trames sont espacées d'au moins `interval` s.
+
+La file appartient au dongle (et non au communicateur) : elle survit donc aux
+reconnexions du superviseur. Toutes les méthodes s'exécutent dans la boucle HA.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TxPacer:
+    """Émet les trames une par une, espacées d'un intervalle minimal."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send: Callable[[Any], None],
+        interval: float,
+    ) -> None:
+        # Référence HA (boucle) et fonction d'envoi réelle (communicator.send)
+        self.hass = hass
+        self._send = send
+        # Espacement minimal entre deux trames (s)
+        self._interval = interval
+        # Trames en attente (FIFO)
+        self._queue: deque = deque()
+        # Timer de la prochaine émission (None = file au repos)
+        self._timer = None
+        # Compteur de trames émises
+        self.sent = 0
+
+    @callback
+    def async_enqueue(self, packet: Any) -> None:
+        """Ajoute une trame ; émission immédiate si la file est au repos."""
+        self._queue.append(packet)
+        if self._timer is None:
+            self._async_drain()
+
+    @callback
+    def _async_drain(self) -> None:
+        """Émet la trame de tête puis replanifie tant que la file n'est pas vide."""
+        self._timer = None
+        if not self._queue:
+            return
+        packet = self._queue.popleft()
+        try:
+            self._send(packet)
+            self.sent += 1
+        except Exception:
+            _LOGGER.exception("EnOcean: émission d'une trame échouée (ignorée).")
+        self._timer = self.hass.loop.call_later(self._interval, self._async_drain)
+
+    @callback
+    def async_stop(self) -> None:
+        """Annule le timer (les trames restantes sont abandonnées)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def __len__(self) -> int:
+        """Nombre de trames en attente."""
+        return len(self._queue)
@@ -0,0 +1,194 @@
+# custom_components/enocean/ute.py
+# -*- coding: utf-8 -*-
+"""
+ute.py — Réponses aux requêtes de teach-in UTE (RORG 0xD4).
+
+python-enocean répond à chaque requête UTE de façon synchrone, dans le thread
+de lecture, un appareil à la fois : lors d'une mise en service groupée,
+certaines réponses partent trop tard et l'appareil abandonne. Ici :
+- le thread de lecture ne fait que transmettre la requête à la boucle HA ;
+- les requêtes arrivées ensemble sont traitées en un seul passage (une réponse
+  par émetteur, trames construites d'un bloc) puis confiées à la file
+  d'émission cadencée (tx.py) ;
+- chaque appareil a son issue (acceptée, ignorée, sans Base ID…), consultable
+  via le service link_status ;
+- mode "tout accepter" borné dans le temps : pendant la fenêtre, toute requête
+  bidirectionnelle reçoit TEACHIN_ACCEPTED (ou DELETE_ACCEPTED) ; hors fenêtre,
+  aucune réponse n'est envoyée.
+
+Toutes les méthodes, sauf offer(), s'exécutent dans la boucle HA.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+from .frames import RawFrame, build_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKET_RADIO = 0x01
+RORG_UTE = 0xD4
+
+# DB6 de la requête
+_BIDIRECTIONAL = 0x80        # DB6.7 : communication bidirectionnelle demandée
+_NO_RESPONSE = 0x40          # DB6.6 : 1 = pas de réponse attendue
+_CMD_MASK = 0x0F             # DB6.3..0 : 0 = requête de teach-in
+_REQUEST_DELETE = 0x01       # DB6.5..4 : type de requête "suppression"
+
+# DB6 de la réponse : bidirectionnel | code réponse (DB6.5..4) | commande 0x1
+RESPONSE_TEACHIN_ACCEPTED = 0x91
+RESPONSE_DELETE_ACCEPTED = 0xA1
+
+# Issues par appareil
+OUTCOME_ACCEPTED = "accepted"
+OUTCOME_DELETED = "deleted"
+OUTCOME_IGNORED = "ignored"              # hors fenêtre d'acceptation
+OUTCOME_NO_RESPONSE = "no_response"      # unidirectionnel ou réponse non attendue
+OUTCOME_NO_BASE_ID = "no_base_id"        # Base ID du dongle inconnu
+
+
+class _Outcome:
+    """Dernière issue connue pour un émetteur."""
+
+    __slots__ = ("eep", "status", "requests", "responses", "last_seen")
+
+    def __init__(self, eep: str) -> None:
+        self.eep = eep
+        self.status = OUTCOME_IGNORED
+        self.requests = 0
+        self.responses = 0
+        self.last_seen = time.time()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "eep": self.eep,
+            "status": self.status,
+            "requests": self.requests,
+            "responses": self.responses,
+            "last_seen": self.last_seen,
+        }
+
+
+class UteResponder:
+    """File des requêtes UTE, réponses en lot via la file d'émission cadencée."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send: Callable[[Any], None],
+        base_id: Callable[[], Optional[list[int]]],
+    ) -> None:
+        # Référence HA (boucle), envoi cadencé (TxPacer.async_enqueue), Base ID du dongle
+        self.hass = hass
+        self._send = send
+        self._base_id = base_id
+        # Requêtes en attente du prochain passage (données ERP1 brutes)
+        self._queue: list[list[int]] = []
+        self._scheduled = False
+        # Fin (monotonic) de la fenêtre "tout accepter" ; 0 = fermée
+        self._accept_until = 0.0
+        # Émetteur (entier) -> issue
+        self.outcomes: dict[int, _Outcome] = {}
+
+    def offer(self, packet: Any) -> None:
+        """Thread de lecture : transmet la requête à la boucle, sans autre traitement."""
+        self.hass.loop.call_soon_threadsafe(self._async_add, packet.data)
+
+    @callback
+    def _async_add(self, data: list[int]) -> None:
+        """Empile la requête ; un seul passage pour toutes celles déjà arrivées."""
+        self._queue.append(data)
+        if not self._scheduled:
+            self._scheduled = True
+            self.hass.loop.call_soon(self._async_flush)
+
+    @property
+    def accepting(self) -> bool:
+        """Fenêtre "tout accepter" ouverte ?"""
+        return time.monotonic() < self._accept_until
+
+    @callback
+    def async_open_window(self, duration: float) -> None:
+        """Ouvre (ou prolonge) la fenêtre d'acceptation pour `duration` s."""
+        self._accept_until = max(self._accept_until, time.monotonic() + duration)
+        _LOGGER.info("UTE: acceptation des teach-in ouverte pour %.0fs.", duration)
+
+    @callback
+    def async_close_window(self) -> None:
+        """Ferme la fenêtre d'acceptation."""
+        self._accept_until = 0.0
+
+    @callback
+    def _async_flush(self) -> None:
+        """Décide et construit toutes les réponses du lot, puis les met en file."""
+        self._scheduled = False
+        batch, self._queue = self._queue, []
+        accepting = self.accepting
+        base_id = self._base_id() if accepting else None
+        answered: set[int] = set()
+        frames: list[RawFrame] = []
+
+        for data in batch:
+            if len(data) != 13 or data[1] & _CMD_MASK:
+                continue
+            db6 = data[1]
+            sender_bytes = data[8:12]
+            sender = int.from_bytes(bytes(sender_bytes), "big")
+            outcome = self.outcomes.get(sender)
+            if outcome is None:
+                outcome = self.outcomes[sender] = _Outcome(
+                    f"{data[7]:02X}-{data[6]:02X}-{data[5]:02X}"
+                )
+            outcome.requests += 1
+            outcome.last_seen = time.time()
+
+            if not accepting:
+                outcome.status = OUTCOME_IGNORED
+                continue
+            if db6 & _NO_RESPONSE or not db6 & _BIDIRECTIONAL:
+                outcome.status = OUTCOME_NO_RESPONSE
+                continue
+            if not base_id:
+                outcome.status = OUTCOME_NO_BASE_ID
+                continue
+            if sender in answered:
+                # Requête répétée dans le même lot : une seule réponse
+                continue
+            answered.add(sender)
+
+            delete = (db6 >> 4) & 0x03 == _REQUEST_DELETE
+            response = RESPONSE_DELETE_ACCEPTED if delete else RESPONSE_TEACHIN_ACCEPTED
+            frames.append(
+                RawFrame(
+                    build_frame(
+                        PACKET_RADIO,
+                        [RORG_UTE, response] + data[2:8] + list(base_id) + [0x00],
+                        [0x03] + sender_bytes + [0xFF, 0x00],
+                    )
+                )
+            )
+            outcome.status = OUTCOME_DELETED if delete else OUTCOME_ACCEPTED
+            outcome.responses += 1
+
+        for frame in frames:
+            self._send(frame)
+        if frames:
+            _LOGGER.info("UTE: %d réponse(s) de teach-in mise(s) en file.", len(frames))
+        elif accepting and batch and not base_id:
+            _LOGGER.warning("UTE: Base ID du dongle inconnu, requêtes de teach-in sans réponse.")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Fenêtre + issue par appareil (service link_status)."""
+        remaining = self._accept_until - time.monotonic()
+        return {
+            "accepting": remaining > 0,
+            "accept_remaining": round(max(0.0, remaining), 1),
+            "devices": {
+                f"{sender:08X}": outcome.as_dict() for sender, outcome in self.outcomes.items()
+            },
+        }
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Historique des backups YAML (rotation horodatée).
+
+- Un backup par export modifiant un fichier :
+  `<dossier du backup>/<nom>.<AAAAMMJJTHHMMSSffffffZ>.bak`, où <nom> est le nom
+  du backup configuré sans `.bak` (ex. enocean_auto.yaml.20261019T101500123456Z.bak).
+  L'ordre lexical est l'ordre chronologique.
+- Copie sans relire le contenu en Python : lien physique (`os.link`) d'abord.
+  Les YAML étant remplacés par rename atomique, l'inode lié n'est plus jamais
+  modifié par l'add-on. Sinon reflink (FICLONE), puis `os.copy_file_range`,
+  puis copie classique.
+- Rotation : on garde au plus BACKUP_KEEP backups par fichier, et on supprime
+  ceux de plus de BACKUP_MAX_AGE_DAYS jours (le plus récent est toujours gardé).
+- Liste = `os.scandir` + stat (aucun contenu lu) ; diff = deux fichiers lus
+  ligne à ligne ; restauration = copie (pas de lien : une édition à la main du
+  fichier restauré ne doit pas modifier le backup).
+"""
+
+from __future__ import annotations
+
+import calendar
+import difflib
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+
+try:
+    import fcntl
+except ImportError:  # hors Linux
+    fcntl = None  # type: ignore[assignment]
+
+# Dossier imposé si le backup configuré pointe dans /packages/ (HA le chargerait)
+DEFAULT_BACKUP_DIR = Path("/config/enocean_manager/backups")
+# Rotation (options de l'add-on, exportées par run.sh) ; 0 = pas de limite
+BACKUP_KEEP = int(os.environ.get("BACKUP_KEEP", "20") or 0)
+BACKUP_MAX_AGE_DAYS = float(os.environ.get("BACKUP_MAX_AGE_DAYS", "30") or 0)
+
+# ioctl Linux FICLONE : reflink (btrfs, xfs…), copie instantanée par partage d'extents
+_FICLONE = 0x40049409
+_STAMP = r"\d{8}T\d{12}Z"
+
+
+class BackupInfo(NamedTuple):
+    """Un backup de l'historique."""
+
+    id: str          # horodatage UTC, identifiant dans l'API
+    path: Path
+    size: int
+    created: float   # epoch (s), d'après l'horodatage (un lien garde le mtime de la source)
+
+
+def backup_dir(backup_path: Path) -> Path:
+    """Dossier de l'historique : celui du backup configuré, hors /packages/."""
+    if "/packages/" in str(backup_path):
+        return DEFAULT_BACKUP_DIR
+    return backup_path.parent
+
+
+def _series(src_path: Path, backup_path: Path) -> str:
+    """Préfixe des backups d'un fichier (nom du backup configuré sans .bak)."""
+    name = backup_path.name
+    if name.endswith(".bak"):
+        name = name[: -len(".bak")]
+    return name or src_path.name
+
+
+def _stamp(ns: int) -> str:
+    """Horodatage UTC triable, à la microseconde."""
+    sec, rest = divmod(ns, 1_000_000_000)
+    return time.strftime("%Y%m%dT%H%M%S", time.gmtime(sec)) + f"{rest // 1000:06d}Z"
+
+
+def _created(stamp: str) -> float:
+    """Epoch d'un horodatage produit par _stamp()."""
+    return calendar.timegm(time.strptime(stamp[:15], "%Y%m%dT%H%M%S")) + int(stamp[15:21]) / 1e6
+
+
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _copy_data(src: Path, dst: Path) -> str:
+    """Copie src -> dst (nouveau fichier, fsync) ; retourne la méthode employée."""
+    with src.open("rb") as fin, dst.open("wb") as fout:
+        method = "copy"
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(fout.fileno(), _FICLONE, fin.fileno())
+                method = "reflink"
+            except OSError:
+                pass
+        if method == "copy" and hasattr(os, "copy_file_range"):
+            try:
+                remaining = os.fstat(fin.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(fin.fileno(), fout.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+                method = "copy_file_range"
+            except OSError:
+                # Non supporté ici (ex. système de fichiers réseau) : on repart de zéro
+                fin.seek(0)
+                fout.seek(0)
+                fout.truncate()
+        if method == "copy":
+            shutil.copyfileobj(fin, fout)
+        fout.flush()
+        os.fsync(fout.fileno())
+    return method
+
+
+def _clone(src: Path, dst: Path, allow_link: bool) -> str:
+    """Crée dst identique à src : lien physique si permis et possible, sinon copie."""
+    if allow_link:
+        try:
+            os.link(src, dst)
+            return "link"
+        except OSError:
+            # Autre système de fichiers, liens non supportés…
+            pass
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    try:
+        method = _copy_data(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return method
+
+
+def _info(path: Path, stamp: str) -> Optional[BackupInfo]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return BackupInfo(stamp, path, st.st_size, _created(stamp))
+
+
+def create_backup(src_path: Path, backup_path: Path) -> Optional[BackupInfo]:
+    """
+    Ajoute l'état actuel de `src_path` à l'historique, puis applique la
+    rotation. Retourne le backup créé (None si `src_path` n'existe pas).
+    À appeler juste avant de remplacer `src_path` par rename atomique.
+    """
+    if not src_path.exists():
+        return None
+    directory = backup_dir(backup_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    series = _series(src_path, backup_path)
+    ns = time.time_ns()
+    while True:
+        stamp = _stamp(ns)
+        dst = directory / f"{series}.{stamp}.bak"
+        try:
+            _clone(src_path, dst, allow_link=True)
+            break
+        except FileExistsError:
+            # Deux backups dans la même microseconde
+            ns += 1000
+    _fsync_dir(directory)
+    prune_backups(src_path, backup_path)
+    return _info(dst, stamp)
+
+
+def discard_backup(info: BackupInfo) -> None:
+    """Retire un backup qui vient d'être créé (écriture principale échouée)."""
+    info.path.unlink(missing_ok=True)
+
+
+def _scan(src_path: Path, backup_path: Path) -> Iterator[BackupInfo]:
+    """Backups présents sur disque (ordre quelconque), sans lire leur contenu."""
+    directory = backup_dir(backup_path)
+    pattern = re.compile(rf"^{re.escape(_series(src_path, backup_path))}\.({_STAMP})\.bak$")
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            m = pattern.match(entry.name)
+            if m is None or not entry.is_file(follow_symlinks=False):
+                continue
+            st = entry.stat(follow_symlinks=False)
+            yield BackupInfo(m.group(1), Path(entry.path), st.st_size, _created(m.group(1)))
+
+
+def list_backups(src_path: Path, backup_path: Path) -> List[BackupInfo]:
+    """Historique d'un fichier, du plus récent au plus ancien."""
+    return sorted(_scan(src_path, backup_path), key=lambda b: b.id, reverse=True)
+
+
+def prune_backups(
+    src_path: Path,
+    backup_path: Path,
+    keep: Optional[int] = None,
+    max_age_days: Optional[float] = None,
+) -> List[str]:
+    """Supprime les backups au-delà de `keep` ou plus vieux que `max_age_days` ; retourne leurs id."""
+    keep = BACKUP_KEEP if keep is None else keep
+    max_age_days = BACKUP_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    history = list_backups(src_path, backup_path)
+    cutoff = time.time() - max_age_days * 86400 if max_age_days > 0 else None
+    removed: List[str] = []
+    # Le plus récent est toujours gardé
+    for rank, info in enumerate(history[1:], start=1):
+        if (keep > 0 and rank >= keep) or (cutoff is not None and info.created < cutoff):
+            info.path.unlink(missing_ok=True)
+            removed.append(info.id)
+    return removed
+
+
+def get_backup(src_path: Path, backup_path: Path, backup_id: str) -> Optional[BackupInfo]:
+    """Un backup par id (None si id invalide ou absent)."""
+    if not re.fullmatch(_STAMP, backup_id or ""):
+        return None
+    path = backup_dir(backup_path) / f"{_series(src_path, backup_path)}.{backup_id}.bak"
+    return _info(path, backup_id)
+
+
+def _lines(path: Optional[Path]) -> List[str]:
+    if path is None or not path.exists():
+        return []
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        return f.readlines()
+
+
+def diff_backup(
+    src_path: Path,
+    info: BackupInfo,
+    against: Optional[BackupInfo] = None,
+    context: int = 3,
+) -> Iterator[str]:
+    """
+    Diff unifié du backup vers `against` (un autre backup) ou, par défaut,
+    vers le fichier actuel. Seuls ces deux fichiers sont lus.
+    """
+    target = against.path if against is not None else src_path
+    to_name = f"{src_path.name}@{against.id}" if against is not None else f"{src_path.name} (actuel)"
+    return difflib.unified_diff(
+        _lines(info.path),
+        _lines(target),
+        fromfile=f"{src_path.name}@{info.id}",
+        tofile=to_name,
+        n=context,
+    )
+
+
+def restore_backup(src_path: Path, backup_path: Path, info: BackupInfo) -> Optional[BackupInfo]:
+    """
+    Remplace `src_path` par le contenu du backup (copie + rename atomique).
+    L'état actuel est d'abord ajouté à l'historique ; retourne ce backup.
+    """
+    src_path.parent.mkdir(parents=True, exist_ok=True)
+    # Copie d'abord : la rotation déclenchée par le nouveau backup peut supprimer `info`
+    tmp = src_path.with_name(f".{src_path.name}.restore")
+    _copy_data(info.path, tmp)
+    try:
+        current = create_backup(src_path, backup_path)
+        os.replace(tmp, src_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _fsync_dir(src_path.parent)
+    return current
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Index en mémoire du registre pour GET /api/devices (pagination, filtres, recherche).
+
+- Construit à partir du registre courant et reconstruit seulement quand la
+  génération du registre change (registry.generation()).
+- Filtres : ensembles de clés par ha_type, par EEP, et appareils ayant au
+  moins un émetteur ; l'intersection part du plus petit ensemble.
+- Recherche libre (libellés, IDs, émetteurs, sender) : index de trigrammes ;
+  seuls les appareils contenant tous les trigrammes de la requête sont
+  vérifiés. Les requêtes de 1-2 caractères parcourent les textes indexés.
+- Ordre des résultats = ordre du registre ; pagination par offset/limit ou
+  par curseur. Chaque appareil reçoit un numéro d'ordre conservé d'une
+  génération à l'autre (les nouveaux appareils sont ajoutés en fin de
+  registre) ; le curseur porte celui du dernier appareil renvoyé et reste
+  valide si cet appareil est supprimé entre deux pages.
+- L'index garde la vue des appareils de sa génération : le registre étant
+  copié à l'écriture, une page est servie depuis cet instantané même si une
+  suppression a lieu entre la requête et la sérialisation.
+"""
+
+from __future__ import annotations
+
+import base64
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set
+
+from . import registry
+from .models import Device, Registry
+
+
+def _search_text(key: str, dev: Device) -> str:
+    """Texte indexé d'un appareil (minuscules) : clé, ID, libellés, émetteurs, sender."""
+    parts = [key, dev.id_hex, dev.label, dev.eep or ""]
+    for ch in dev.channels:
+        parts.append(ch.label)
+        if ch.emitter is not None:
+            parts.append(ch.emitter.id)
+            parts.append(ch.emitter.label or "")
+    if dev.light_sender is not None:
+        parts.append(dev.light_sender.sender_id)
+    return "\n".join(parts).lower()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def encode_cursor(seq: int) -> str:
+    """Curseur opaque (numéro d'ordre du dernier appareil de la page)."""
+    return base64.urlsafe_b64encode(f"s{seq}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Numéro d'ordre porté par le curseur (ValueError si illisible)."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+    if not raw.startswith("s") or not raw[1:].isdigit():
+        raise ValueError(cursor)
+    return int(raw[1:])
+
+
+@dataclass
+class Page:
+    """Résultat d'une requête : clés de la page, total filtré, curseur suivant."""
+
+    keys: List[str]
+    total: int
+    next_cursor: Optional[str]
+
+
+class DeviceIndex:
+    """Index figé d'une génération du registre."""
+
+    def __init__(self, reg: Registry, generation: int, previous: Optional["DeviceIndex"] = None) -> None:
+        self.generation = generation
+        self.registry = reg
+        # Jamais modifié (copie à l'écriture dans registry.py) : instantané de cette génération
+        self.devices: Mapping[str, Device] = MappingProxyType(reg.devices)
+        self.order: List[str] = list(reg.devices)
+        self.position: Dict[str, int] = {key: i for i, key in enumerate(self.order)}
+        self.seq: List[int] = self._numbering(previous)
+        self.by_ha_type: Dict[str, Set[str]] = {}
+        self.by_eep: Dict[str, Set[str]] = {}
+        self.with_emitter: Set[str] = set()
+        self.text: Dict[str, str] = {}
+        self.trigrams: Dict[str, Set[str]] = {}
+        for key, dev in reg.devices.items():
+            self.by_ha_type.setdefault(dev.ha_type, set()).add(key)
+            self.by_eep.setdefault((dev.eep or "").upper(), set()).add(key)
+            if any(ch.emitter is not None for ch in dev.channels):
+                self.with_emitter.add(key)
+            text = self.text[key] = _search_text(key, dev)
+            for tri in _trigrams(text):
+                self.trigrams.setdefault(tri, set()).add(key)
+
+    def _numbering(self, previous: Optional["DeviceIndex"]) -> List[int]:
+        """
+        Numéros d'ordre (croissants dans self.order) : ceux de l'index précédent
+        pour les appareils déjà connus, les suivants pour les nouveaux. Si le
+        registre a été réordonné (remplacement complet), renumérotation au-delà
+        des anciens numéros.
+        """
+        if previous is None:
+            self.next_seq = len(self.order)
+            return list(range(len(self.order)))
+        known = dict(zip(previous.order, previous.seq))
+        next_seq = previous.next_seq
+        seq: List[int] = []
+        for key in self.order:
+            n = known.get(key)
+            if n is None:
+                n = next_seq
+                next_seq += 1
+            if seq and n <= seq[-1]:
+                seq = list(range(previous.next_seq, previous.next_seq + len(self.order)))
+                next_seq = previous.next_seq + len(self.order)
+                break
+            seq.append(n)
+        self.next_seq = next_seq
+        return seq
+
+    def _search(self, q: str) -> Set[str]:
+        """Clés dont le texte indexé contient `q` (insensible à la casse)."""
+        q = q.lower()
+        if len(q) < 3:
+            return {key for key, text in self.text.items() if q in text}
+        sets = sorted((self.trigrams.get(tri, set()) for tri in _trigrams(q)), key=len)
+        if not sets or not sets[0]:
+            return set()
+        candidates = set(sets[0])
+        for s in sets[1:]:
+            candidates &= s
+            if not candidates:
+                return candidates
+        return {key for key in candidates if q in self.text[key]}
+
+    def query(
+        self,
+        ha_type: Optional[str] = None,
+        eep: Optional[str] = None,
+        has_emitter: Optional[bool] = None,
+        q: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """Filtre, recherche puis découpe la page demandée (ordre du registre)."""
+        sets: List[Set[str]] = []
+        if ha_type:
+            sets.append(self.by_ha_type.get(ha_type, set()))
+        if eep:
+            sets.append(self.by_eep.get(eep.strip().upper(), set()))
+        if has_emitter is True:
+            sets.append(self.with_emitter)
+        q = (q or "").strip()
+        if q:
+            sets.append(self._search(q))
+
+        if sets:
+            sets.sort(key=len)
+            matched = set(sets[0])
+            for s in sets[1:]:
+                matched &= s
+            if has_emitter is False:
+                matched -= self.with_emitter
+            keys = sorted(matched, key=self.position.__getitem__)
+        elif has_emitter is False:
+            keys = [key for key in self.order if key not in self.with_emitter]
+        else:
+            keys = self.order
+
+        total = len(keys)
+        start = offset
+        if cursor:
+            last_seq = decode_cursor(cursor)
+            # Premier résultat placé après le dernier appareil déjà renvoyé
+            # (supprimé depuis ou non : seul son numéro d'ordre compte)
+            lo, hi = 0, total
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.seq[self.position[keys[mid]]] <= last_seq:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            start = lo
+        end = total if limit is None else min(total, start + limit)
+        page = keys[start:end]
+        next_cursor = None
+        if page and end < total:
+            next_cursor = encode_cursor(self.seq[self.position[page[-1]]])
+        return Page(page, total, next_cursor)
+
+
+_index: Optional[DeviceIndex] = None
+_lock = threading.Lock()
+
+
+def get_index() -> DeviceIndex:
+    """Index de la génération courante du registre (reconstruit si elle a changé)."""
+    global _index
+    with _lock:
+        reg = registry.load_registry()
+        generation = registry.generation()
+        if _index is None or _index.generation != generation or _index.registry is not reg:
+            _index = DeviceIndex(reg, generation, _index)
+        return _index
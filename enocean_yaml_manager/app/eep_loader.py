@@ -7,6 +7,7 @@
 # sur la clé "channel".
 #
 # Exemple joint (D2-01-12.json) : titre, range 0..1, etc. :contentReference[oaicite:3]{index=3}
+import hashlib
 import json
 import os
 from typing import Dict, Any, List, Optional, Tuple
@@ -15,6 +16,7 @@ EEP_DIR = "/app/eep"
 
 _cache: Dict[str, Dict[str, Any]] = {}     # eep -> contenu JSON
 _index: Dict[str, Dict[str, Any]] = {}     # eep -> {title, channel_min, channel_max}
+_index_hash: Optional[Tuple[int, str]] = None  # (taille de l'index, empreinte)
 
 def _find_channel_range(profile: Dict[str, Any]) -> Tuple[Optional[int], Optional[int]]:
     """Parcourt functionGroups pour retrouver 'channel.range' dans les fonctions 'to'."""
@@ -71,6 +73,15 @@ def list_eep() -> List[Dict[str, Any]]:
     # Tri par code EEP
     return sorted(_index.values(), key=lambda x: x["eep"])
 
+def index_hash() -> str:
+    """Empreinte de l'index EEP (ETag de /api/eep) ; calculée une fois, l'index ne change pas."""
+    global _index_hash
+    _ensure_loaded()
+    if _index_hash is None or _index_hash[0] != len(_index):
+        payload = json.dumps(list_eep(), sort_keys=True, separators=(",", ":"))
+        _index_hash = (len(_index), hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16])
+    return _index_hash[1]
+
 def get_eep(eep: str) -> Optional[Dict[str, Any]]:
     """Retourne le profil complet + méta (ajoute channel_min/max)."""
     _ensure_loaded()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Réponses JSON conditionnelles (ETag fort, 304) et compressées (gzip).
+
+- L'ETag est fourni par l'appelant à partir de ce qui détermine le contenu
+  (génération du registre, empreinte de l'index EEP, paramètres de requête),
+  préfixé par un jeton de démarrage : la génération repartant de zéro à chaque
+  lancement, un ETag d'une exécution précédente ne peut pas être validé à tort.
+- If-None-Match correspondant -> 304 sans corps ni sérialisation.
+- Corps >= GZIP_MIN_BYTES et client acceptant gzip -> corps compressé, avec un
+  ETag distinct (suffixe "-gz") puisque les octets diffèrent.
+- Les corps encodés des derniers ETag servis sont gardés (LRU court) : un
+  rechargement sans cache navigateur ne resérialise pas le registre.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+_BODY_CACHE_SIZE = 32
+
+# Jeton propre à ce démarrage de l'add-on
+BOOT_TOKEN = uuid.uuid4().hex[:8]
+
+_bodies: "OrderedDict[str, Tuple[bytes, Optional[bytes]]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fort (entre guillemets) construit à partir des éléments déterminant le contenu."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+    return f'"{BOOT_TOKEN}-{digest}"'
+
+
+def query_key(request: Request) -> str:
+    """Paramètres de requête normalisés (ordre indifférent) pour l'ETag."""
+    return "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+
+
+def _gzip_etag(etag: str) -> str:
+    return etag[:-1] + '-gz"'
+
+
+def _matched(request: Request, *etags: str) -> Optional[str]:
+    """Premier des ETag présent dans If-None-Match ("*" valide le premier), sinon None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tokens = {t.strip() for t in header.split(",")}
+    if "*" in tokens:
+        return etags[0]
+    return next((e for e in etags if e in tokens), None)
+
+
+def _encoded(etag: str, build: Callable[[], Any]) -> Tuple[bytes, Optional[bytes]]:
+    """Corps JSON (et sa version gzip si assez gros) pour cet ETag, depuis le cache si possible."""
+    with _lock:
+        cached = _bodies.get(etag)
+        if cached is not None:
+            _bodies.move_to_end(etag)
+            return cached
+    body = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    compressed = gzip.compress(body, GZIP_LEVEL) if len(body) >= GZIP_MIN_BYTES else None
+    with _lock:
+        _bodies[etag] = (body, compressed)
+        _bodies.move_to_end(etag)
+        while len(_bodies) > _BODY_CACHE_SIZE:
+            _bodies.popitem(last=False)
+    return body, compressed
+
+
+def conditional_json(request: Request, etag: str, build: Callable[[], Any]) -> Response:
+    """Réponse JSON avec ETag : 304 si le client a déjà cette version, gzip si utile."""
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    matched = _matched(request, etag, _gzip_etag(etag))
+    if matched is not None:
+        headers["ETag"] = matched
+        return Response(status_code=304, headers=headers)
+
+    body, compressed = _encoded(etag, build)
+    if compressed is not None and "gzip" in request.headers.get("accept-encoding", "").lower():
+        headers["ETag"] = _gzip_etag(etag)
+        headers["Content-Encoding"] = "gzip"
+        return Response(compressed, media_type="application/json", headers=headers)
+    headers["ETag"] = etag
+    return Response(body, media_type="application/json", headers=headers)
@@ -4,17 +4,26 @@
 # - Expose /api/health pour le watchdog Supervisor
 # - Middleware "anti //": normalise le chemin des requêtes (remplace // par /)
 # - Endpoints: /api/paths, /api/eep, /api/suggest/channels,
-#              /api/devices*, /api/export, /api/import
+#              /api/devices*, /api/devices/bulk, /api/export, /api/import,
+#              /api/backups* (historique : liste, diff, restauration)
+# - GET /api/eep et /api/devices : ETag fort (génération du registre / empreinte
+#   de l'index EEP), 304 si If-None-Match correspond, gzip au-delà de 1 Ko
 import os
 import re  # <- pour normaliser les chemins
-from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import JSONResponse
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import TypeAdapter, ValidationError
 
 from .models import Device
-from . import registry
-from .yaml_manager import write_both_yaml_files, read_both_yaml_files
-from .eep_loader import list_eep, suggest_channels
+from . import backups, registry
+from .device_index import get_index
+from .http_cache import conditional_json, make_etag, query_key
+from .yaml_manager import output_paths, read_both_yaml_files, restore_yaml_backup, write_both_yaml_files
+from .eep_loader import index_hash, list_eep, suggest_channels
 
 # --- Variables d'environnement injectées par run.sh (ou options add-on) ---
 AUTO_OUTPUT_PATH = os.environ.get("AUTO_OUTPUT_PATH", "/config/packages/enocean_auto.yaml")  # package HA
@@ -22,6 +31,9 @@ AUTO_BACKUP_PATH = os.environ.get("AUTO_BACKUP_PATH", "/config/enocean_manager/b
 CONFIG_OUTPUT_PATH = os.environ.get("CONFIG_OUTPUT_PATH", "/config/enocean_yaml_config.yaml")  # hors /packages
 CONFIG_BACKUP_PATH = os.environ.get("CONFIG_BACKUP_PATH", "/config/enocean_manager/backups/enocean_yaml_config.yaml.bak")
 
+# Validation des appareils d'un lot, un par un (POST /api/devices/bulk)
+DEVICE = TypeAdapter(Device)
+
 # --- App FastAPI ---
 app = FastAPI(title="EnOcean YAML Manager", version="0.3.5")
 
@@ -67,9 +79,10 @@ def api_paths():
 # EEP (liste + suggestion de canaux)
 # -----------------------
 @app.get("/api/eep")
-def api_list_eep():
+def api_list_eep(request: Request):
   """Liste des EEP disponibles (chargés depuis /app/eep/*.json)."""
-  return {"profiles": list_eep()}
+  etag = make_etag("eep", index_hash())
+  return conditional_json(request, etag, lambda: {"profiles": list_eep()})
 
 @app.get("/api/suggest/channels")
 def api_suggest_channels(eep: str = Query(...)):
@@ -80,9 +93,44 @@ def api_suggest_channels(eep: str = Query(...)):
 # Registry CRUD (appareils)
 # -----------------------
 @app.get("/api/devices")
-def list_devices():
-  """Retourne le registre complet (toutes les entités)."""
-  return registry.list_devices().model_dump()
+def list_devices(
+  request: Request,
+  ha_type: Optional[str] = Query(None, description="switch / light / sensor"),
+  eep: Optional[str] = Query(None, description="EEP exact (ex: D2-01-12)"),
+  has_emitter: Optional[bool] = Query(None, description="Au moins un émetteur sur un canal"),
+  q: Optional[str] = Query(None, description="Recherche libre (libellés, IDs, émetteurs)"),
+  offset: int = Query(0, ge=0),
+  limit: Optional[int] = Query(None, ge=1, le=1000, description="Taille de page (défaut : tout)"),
+  cursor: Optional[str] = Query(None, description="next_cursor de la page précédente"),
+):
+  """
+  Liste des appareils, filtrée / paginée via l'index en mémoire.
+  Sans paramètre : tout le registre (format historique {"devices": {...}}),
+  complété par total / count / next_cursor.
+  Réponse conditionnelle : ETag = génération du registre + paramètres.
+  """
+  index = get_index()
+
+  def build():
+    try:
+      page = index.query(
+        ha_type=ha_type, eep=eep, has_emitter=has_emitter, q=q,
+        offset=offset, limit=limit, cursor=cursor,
+      )
+    except ValueError:
+      raise HTTPException(status_code=400, detail="Invalid cursor")
+    devices = index.devices
+    return {
+      "devices": {key: devices[key].model_dump() for key in page.keys},
+      "total": page.total,
+      "count": len(page.keys),
+      "offset": offset if cursor is None else None,
+      "limit": limit,
+      "next_cursor": page.next_cursor,
+    }
+
+  etag = make_etag("devices", registry.BACKEND, index.generation, query_key(request))
+  return conditional_json(request, etag, build)
 
 @app.post("/api/devices")
 def add_or_update_device(device: Device):
@@ -90,6 +138,52 @@ def add_or_update_device(device: Device):
   reg = registry.upsert_device(device)
   return reg.model_dump()
 
+# Déclarés avant /api/devices/{id_hex_or_key} : "bulk" n'est pas un ID
+@app.post("/api/devices/bulk")
+def bulk_upsert_devices(items: List[Any] = Body(...)):
+  """
+  Ajoute / met à jour une liste d'appareils en une seule écriture.
+  Chaque élément est validé une seule fois ; les éléments invalides sont
+  écartés et rapportés (index + erreurs), les autres sont appliqués.
+  Réponse compacte : clés créées / mises à jour et échecs (pas le registre).
+  """
+  failed = {}
+  devices = []
+  for index, item in enumerate(items):
+    try:
+      devices.append(DEVICE.validate_python(item))
+    except ValidationError as exc:
+      failed[index] = [
+        {"loc": list(err["loc"]), "msg": err["msg"]}
+        for err in exc.errors(include_url=False, include_input=False)
+      ]
+  created, updated = registry.upsert_devices(devices)
+  return {
+    "created": created,
+    "updated": updated,
+    "failed": [
+      {
+        "index": index,
+        "id_hex": items[index].get("id_hex") if isinstance(items[index], dict) else None,
+        "errors": errors,
+      }
+      for index, errors in sorted(failed.items())
+    ],
+    "counts": {"created": len(created), "updated": len(updated), "failed": len(failed)},
+  }
+
+@app.delete("/api/devices/bulk")
+def bulk_delete_devices(keys: List[str] = Body(...)):
+  """Supprime une liste d'appareils (IDs ou clés internes) en une seule écriture."""
+  deleted = registry.delete_devices(keys)
+  done = set(deleted)
+  missing = [k for k in dict.fromkeys((k or "").upper() for k in keys) if k not in done]
+  return {
+    "deleted": deleted,
+    "missing": missing,
+    "counts": {"deleted": len(deleted), "missing": len(missing)},
+  }
+
 @app.get("/api/devices/{id_hex_or_key}")
 def get_device(id_hex_or_key: str):
   """Récupère un appareil par son ID (ou sa clé interne)."""
@@ -109,14 +203,24 @@ def delete_device(id_hex_or_key: str):
 # -----------------------
 @app.post("/api/export")
 def export_yaml():
-  """Écrit les 2 YAML (auto + config) et leurs backups éventuels."""
+  """
+  Écrit les 2 YAML (auto + config) et leurs backups éventuels.
+  Un fichier dont le contenu est inchangé n'est ni sauvegardé ni réécrit
+  (auto_written / config_written = False).
+  """
   reg = registry.list_devices()
   auto_out, cfg_out = write_both_yaml_files(
     reg,
     AUTO_OUTPUT_PATH, AUTO_BACKUP_PATH,
     CONFIG_OUTPUT_PATH, CONFIG_BACKUP_PATH
   )
-  return {"ok": True, "auto_output": auto_out, "config_output": cfg_out}
+  return {
+    "ok": True,
+    "auto_output": auto_out.path,
+    "auto_written": auto_out.written,
+    "config_output": cfg_out.path,
+    "config_written": cfg_out.written,
+  }
 
 @app.post("/api/import")
 def import_yaml():
@@ -125,6 +229,72 @@ def import_yaml():
   registry.save_registry(reg)
   return {"ok": True, "imported": len(reg.devices)}
 
+# -----------------------
+# Historique des backups
+# -----------------------
+def _backup_target(target: str) -> Tuple[Path, Path]:
+  """(fichier exporté, backup configuré) pour target = auto | config."""
+  auto_out, cfg_out = output_paths(AUTO_OUTPUT_PATH, CONFIG_OUTPUT_PATH)
+  if target == "auto":
+    return auto_out, Path(AUTO_BACKUP_PATH)
+  if target == "config":
+    return cfg_out, Path(CONFIG_BACKUP_PATH)
+  raise HTTPException(status_code=404, detail="Unknown target (auto / config)")
+
+def _backup_or_404(src: Path, bak: Path, backup_id: str) -> backups.BackupInfo:
+  info = backups.get_backup(src, bak, backup_id)
+  if info is None:
+    raise HTTPException(status_code=404, detail="Backup not found")
+  return info
+
+def _backup_json(info: backups.BackupInfo) -> dict:
+  return {
+    "id": info.id,
+    "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(info.created)),
+    "size": info.size,
+  }
+
+@app.get("/api/backups")
+def list_backups():
+  """Backups de chaque fichier, du plus récent au plus ancien (aucun contenu lu)."""
+  out = {}
+  for target in ("auto", "config"):
+    src, bak = _backup_target(target)
+    out[target] = {
+      "path": str(src),
+      "backups": [_backup_json(b) for b in backups.list_backups(src, bak)],
+    }
+  return out
+
+@app.get("/api/backups/{target}/{backup_id}/diff")
+def diff_backup(
+  target: str,
+  backup_id: str,
+  against: Optional[str] = Query(None, description="id d'un autre backup (défaut : fichier actuel)"),
+):
+  """Diff unifié (texte) du backup vers le fichier actuel ou un autre backup."""
+  src, bak = _backup_target(target)
+  info = _backup_or_404(src, bak, backup_id)
+  other = _backup_or_404(src, bak, against) if against else None
+  return StreamingResponse(backups.diff_backup(src, info, other), media_type="text/plain; charset=utf-8")
+
+@app.post("/api/backups/{target}/{backup_id}/restore")
+def restore_backup(target: str, backup_id: str):
+  """Restaure un backup ; l'état actuel du fichier est d'abord ajouté à l'historique."""
+  src, bak = _backup_target(target)
+  info = _backup_or_404(src, bak, backup_id)
+  try:
+    previous = restore_yaml_backup(src, bak, info)
+  except FileNotFoundError:
+    # Supprimé par la rotation d'un export concurrent
+    raise HTTPException(status_code=404, detail="Backup not found")
+  return {
+    "ok": True,
+    "path": str(src),
+    "restored": info.id,
+    "previous": previous.id if previous else None,
+  }
+
 # -----------------------
 # UI statique (Ingress)
 # -----------------------
@@ -1,46 +1,357 @@
 # Persistance du registre (JSON sous /data) + CRUD
+# - Instantané : /data/enocean_registry.json (registre complet, joli format).
+# - Journal : /data/enocean_registry.json.journal, une ligne JSON par mutation
+#   ({"op": "upsert", "key", "device"} ou {"op": "delete", "key"}), ajoutée puis
+#   fsync : modifier un appareil n'écrit que cet appareil, pas tout le registre.
+# - Chargement = instantané + rejeu du journal. Une ligne incomplète en fin de
+#   journal (coupure pendant l'écriture) est ignorée puis tronquée.
+# - Compactage : au-delà de JOURNAL_COMPACT_BYTES, le registre est réécrit dans
+#   un nouvel instantané (fichier temporaire, fsync, rename atomique) et le
+#   journal vidé. Chaque instantané porte une époque (journal_epoch) et le
+#   journal commence par une ligne {"op": "epoch", "id"} : un arrêt entre le
+#   rename et la suppression du journal laisse un journal d'une autre époque,
+#   ignoré puis supprimé au chargement. Sans cela, un import (qui remplace tout
+#   le registre) verrait l'ancien journal rejoué par-dessus.
+# - Le registre validé est gardé en mémoire : les lectures ne relisent le disque
+#   que si la signature (mtime, taille, inode) de l'instantané ou du journal a
+#   changé, par exemple après une modification à la main.
+# - Copie à l'écriture : le Registry renvoyé aux lecteurs n'est jamais modifié
+#   (les lecteurs ne prennent pas _lock). Une mutation construit un nouveau
+#   dict d'appareils et remplace _cache sous le verrou.
+# - Backend SQLite optionnel (REGISTRY_BACKEND=sqlite, voir registry_sqlite.py) :
+#   même API ; au premier démarrage, le registre JSON existant y est migré.
+import json
 import os
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
 from .models import Registry, Device
+from .registry_sqlite import SqliteRegistry
 
 REG_PATH = "/data/enocean_registry.json"  # fichier persistant interne à l'add-on
+SQLITE_PATH = "/data/enocean_registry.sqlite3"
+# "json" (instantané + journal) ou "sqlite"
+BACKEND = os.environ.get("REGISTRY_BACKEND", "json").strip().lower()
+JOURNAL_SUFFIX = ".journal"
+# Taille du journal (octets) au-delà de laquelle il est compacté dans l'instantané
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+_Signature = Tuple[Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]]]
+
+# Cache : registre validé + signature (instantané, journal) lue
+_cache: Optional[Registry] = None
+_cache_sig: Optional[_Signature] = None
+_cache_path: Optional[str] = None
+# Les endpoints synchrones FastAPI tournent dans un pool de threads
+_lock = threading.RLock()
+# Base SQLite ouverte (backend "sqlite")
+_sqlite: Optional[SqliteRegistry] = None
+# Génération du registre en mémoire : +1 à chaque relecture ou modification
+# (clé des index de recherche et des ETag de l'API)
+_generation = 0
+# Époque de l'instantané chargé (None : instantané absent ou antérieur aux époques)
+_epoch: Optional[str] = None
+
+
+class _Snapshot(Registry):
+    """Instantané sur disque : le registre + l'époque des lignes de journal valides."""
+
+    journal_epoch: Optional[str] = None
+
+def journal_path() -> str:
+    """Chemin du journal associé à l'instantané courant."""
+    return REG_PATH + JOURNAL_SUFFIX
+
+def _stat(path: str) -> Optional[Tuple[int, int, int]]:
+    """(mtime_ns, taille, inode) d'un fichier, ou None s'il n'existe pas."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _file_signature() -> _Signature:
+    """Signature de l'instantané et du journal."""
+    return (_stat(REG_PATH), _stat(journal_path()))
+
+def _fsync_dir(path: str) -> None:
+    """fsync du dossier parent (rend durables création / rename)."""
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _journal_epoch(data: bytes) -> Optional[str]:
+    """Époque déclarée par la première ligne du journal (None si absente)."""
+    try:
+        rec = json.loads(data.split(b"\n", 1)[0])
+    except ValueError:
+        return None
+    if isinstance(rec, dict) and rec.get("op") == "epoch":
+        return rec.get("id")
+    return None
+
+def _replay_journal(reg: Registry, epoch: Optional[str]) -> None:
+    """
+    Applique le journal au registre s'il appartient à l'époque `epoch` de
+    l'instantané (sinon il est périmé et supprimé) ; tronque une fin incomplète.
+    """
+    path = journal_path()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return
+    if _journal_epoch(data) != epoch:
+        # Journal d'un autre instantané (arrêt pendant save_registry) : déjà intégré ou remplacé
+        os.remove(path)
+        _fsync_dir(path)
+        return
+    good = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break
+        try:
+            rec = json.loads(line)
+            if rec["op"] == "upsert":
+                reg.devices[rec["key"]] = Device.model_validate(rec["device"])
+            elif rec["op"] == "delete":
+                reg.devices.pop(rec["key"], None)
+        except (ValueError, KeyError, TypeError):
+            break
+        good += len(line)
+    if good < len(data):
+        # Écriture interrompue : la suite n'a jamais été confirmée à l'appelant
+        with open(path, "r+b") as f:
+            f.truncate(good)
+            f.flush()
+            os.fsync(f.fileno())
+
+def _append_journal(record: str) -> None:
+    """
+    Ajoute une ligne au journal et attend qu'elle soit sur disque. Un nouveau
+    journal commence par l'époque de l'instantané courant (même écriture).
+    """
+    path = journal_path()
+    created = not os.path.exists(path)
+    if created and _epoch is not None:
+        record = f'{{"op":"epoch","id":{json.dumps(_epoch)}}}\n' + record
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, record.encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    if created:
+        _fsync_dir(path)
+
+def _write_snapshot(reg: Registry) -> str:
+    """Réécrit l'instantané de façon atomique (temporaire + fsync + rename) ; retourne sa nouvelle époque."""
+    epoch = uuid.uuid4().hex
+    snapshot = _Snapshot.model_construct(devices=reg.devices, journal_epoch=epoch)
+    tmp = REG_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(snapshot.model_dump_json(indent=2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, REG_PATH)
+    _fsync_dir(REG_PATH)
+    return epoch
+
+def _store() -> Optional[SqliteRegistry]:
+    """Base SQLite (ouverte et migrée depuis le JSON au premier appel), ou None en backend JSON."""
+    global _sqlite
+    if BACKEND != "sqlite":
+        return None
+    with _lock:
+        if _sqlite is None or _sqlite.path != SQLITE_PATH:
+            store = SqliteRegistry(SQLITE_PATH)
+            if (
+                store.is_empty()
+                and store.meta("migrated_from") is None
+                and any(sig is not None for sig in _file_signature())
+            ):
+                store.migrate_from(_load_json_registry(), REG_PATH)
+            _sqlite = store
+        return _sqlite
+
+def _load_json_registry() -> Registry:
+    """Registre JSON (mémoire), relu depuis /data seulement si les fichiers ont changé."""
+    global _cache, _cache_sig, _cache_path, _generation, _epoch
+    with _lock:
+        sig = _file_signature()
+        if _cache is not None and sig == _cache_sig and _cache_path == REG_PATH:
+            return _cache
+        if sig[0] is None:
+            reg, epoch = Registry(), None
+        else:
+            with open(REG_PATH, "r", encoding="utf-8") as f:
+                snapshot = _Snapshot.model_validate_json(f.read())
+            reg, epoch = Registry.model_construct(devices=snapshot.devices), snapshot.journal_epoch
+        _replay_journal(reg, epoch)
+        _epoch = epoch
+        _cache, _cache_sig, _cache_path = reg, _file_signature(), REG_PATH
+        _generation += 1
+        return reg
 
 def load_registry() -> Registry:
-    """Charge le registre depuis /data, ou retourne un registre vide."""
-    if not os.path.exists(REG_PATH):
-        return Registry()
-    with open(REG_PATH, "r", encoding="utf-8") as f:
-        return Registry.model_validate_json(f.read())
+    """Retourne le registre (mémoire), relu seulement s'il a changé sur disque."""
+    if (store := _store()) is not None:
+        return store.load()
+    return _load_json_registry()
 
 def save_registry(reg: Registry) -> None:
-    """Sauvegarde le registre dans /data (joli format)."""
-    with open(REG_PATH, "w", encoding="utf-8") as f:
-        f.write(reg.model_dump_json(indent=2))
+    """
+    Sauvegarde le registre complet (nouvel instantané, journal vidé) et le garde en mémoire.
+    Le journal restant après un arrêt entre les deux étapes est d'une autre époque : ignoré.
+    """
+    global _cache, _cache_sig, _cache_path, _generation, _epoch
+    if (store := _store()) is not None:
+        store.save(reg)
+        return
+    with _lock:
+        _epoch = _write_snapshot(reg)
+        try:
+            os.remove(journal_path())
+        except FileNotFoundError:
+            pass
+        _cache, _cache_sig, _cache_path = reg, _file_signature(), REG_PATH
+        _generation += 1
 
-def upsert_device(dev: Device) -> Registry:
+def compact_registry() -> None:
+    """Intègre le journal dans un nouvel instantané (backend JSON)."""
+    with _lock:
+        save_registry(_load_json_registry())
+
+def _commit(reg: Registry, record: str) -> None:
     """
-    Ajoute / met à jour un appareil (clé = ID normalisé).
-    - Cas particulier des lights sans dev_id : on indexe par une clé spéciale.
+    Journalise une mutation déjà appliquée à `reg` (nouveau registre, pas
+    encore publié), puis le publie comme registre en mémoire.
     """
+    global _cache, _cache_sig, _generation
+    try:
+        _append_journal(record)
+    except OSError:
+        # Écriture peut-être partielle : relecture depuis le disque
+        invalidate_cache()
+        raise
+    _cache, _cache_sig = reg, _file_signature()
+    _generation += 1
+    journal = _cache_sig[1]
+    if journal is not None and journal[1] > JOURNAL_COMPACT_BYTES:
+        save_registry(reg)
+
+def invalidate_cache() -> None:
+    """Oublie le registre en mémoire (prochaine lecture depuis les fichiers)."""
+    global _cache, _cache_sig, _cache_path
+    with _lock:
+        _cache = _cache_sig = _cache_path = None
+        if _sqlite is not None:
+            _sqlite.invalidate()
+
+def device_key(dev: Device) -> str:
+    """Clé du registre : ID normalisé, ou clé spéciale pour les lights sans dev_id."""
     key = (dev.id_hex or "").upper()
     if key == "":
         key = f"LIGHT::{(dev.label or '').upper()}"
-    reg = load_registry()
-    reg.devices[key] = dev
-    save_registry(reg)
-    return reg
+    return key
+
+def upsert_devices(devs: List[Device]) -> Tuple[List[str], List[str]]:
+    """
+    Ajoute / met à jour plusieurs appareils en une seule écriture (un ajout au
+    journal + un fsync, ou une transaction SQLite). Retourne (créés, mis à jour).
+    """
+    # Clé répétée dans le lot : la dernière version l'emporte (comptée une fois)
+    items = list(dict((device_key(dev), dev) for dev in devs).items())
+    created: List[str] = []
+    updated: List[str] = []
+    with _lock:
+        store = _store()
+        reg = store.load() if store is not None else _load_json_registry()
+        for key, _dev in items:
+            (updated if key in reg.devices else created).append(key)
+        if not items:
+            return created, updated
+        if store is not None:
+            store.upsert(items)
+        else:
+            _commit(
+                Registry.model_construct(devices={**reg.devices, **dict(items)}),
+                "".join(
+                    f'{{"op":"upsert","key":{json.dumps(key)},"device":{dev.model_dump_json()}}}\n'
+                    for key, dev in items
+                ),
+            )
+    return created, updated
+
+def delete_devices(keys: List[str]) -> List[str]:
+    """Supprime plusieurs appareils en une seule écriture ; retourne les clés supprimées."""
+    keys = [(k or "").upper() for k in keys]
+    with _lock:
+        if (store := _store()) is not None:
+            return store.delete(keys)
+        reg = _load_json_registry()
+        deleted = [key for key in dict.fromkeys(keys) if key in reg.devices]
+        if deleted:
+            gone = set(deleted)
+            devices = {key: dev for key, dev in reg.devices.items() if key not in gone}
+            _commit(
+                Registry.model_construct(devices=devices),
+                "".join(f'{{"op":"delete","key":{json.dumps(key)}}}\n' for key in deleted),
+            )
+        return deleted
+
+def upsert_device(dev: Device) -> Registry:
+    """
+    Ajoute / met à jour un appareil (clé = ID normalisé).
+    - Cas particulier des lights sans dev_id : on indexe par une clé spéciale.
+    """
+    with _lock:
+        upsert_devices([dev])
+        return load_registry()
 
 def delete_device(id_hex_or_key: str) -> Registry:
     """Supprime un appareil par ID (ou par clé interne pour lights sans dev_id)."""
-    reg = load_registry()
-    reg.devices.pop((id_hex_or_key or "").upper(), None)
-    save_registry(reg)
-    return reg
+    with _lock:
+        delete_devices([id_hex_or_key])
+        return load_registry()
 
 def get_device(id_hex_or_key: str):
     """Récupère un appareil par son ID (ou clé interne)."""
-    reg = load_registry()
-    return reg.devices.get((id_hex_or_key or "").upper())
+    key = (id_hex_or_key or "").upper()
+    if (store := _store()) is not None:
+        return store.get(key)
+    return _load_json_registry().devices.get(key)
 
 def list_devices() -> Registry:
     """Retourne tout le registre."""
     return load_registry()
+
+def generation() -> int:
+    """Génération du registre en mémoire (change à chaque relecture ou modification)."""
+    if (store := _store()) is not None:
+        return store.generation
+    return _generation
+
+def find_devices(
+    eep: Optional[str] = None,
+    ha_type: Optional[str] = None,
+    emitter_id: Optional[str] = None,
+) -> Dict[str, Device]:
+    """
+    Appareils correspondant à tous les critères donnés : EEP, type HA, ou
+    émetteur attaché à l'un des canaux. Index SQLite si disponible, sinon
+    parcours du registre en mémoire.
+    """
+    if (store := _store()) is not None:
+        return store.find(eep=eep, ha_type=ha_type, emitter_id=emitter_id)
+    emitter = (emitter_id or "").strip().upper()
+    return {
+        key: dev
+        for key, dev in _load_json_registry().devices.items()
+        if (not eep or dev.eep == eep)
+        and (not ha_type or dev.ha_type == ha_type)
+        and (not emitter or any(ch.emitter and ch.emitter.id == emitter for ch in dev.channels))
+    }
@@ -0,0 +1,277 @@
+# Backend SQLite du registre (optionnel, REGISTRY_BACKEND=sqlite)
+# - Tables normalisées : devices, channels, emitters (un émetteur par canal).
+# - Index sur id_hex, eep, ha_type et l'ID émetteur : "quels récepteurs
+#   utilisent l'émetteur X" ou "tous les D2-01-12" sans parcourir le registre.
+# - Mode WAL : lectures sans bloquer les écritures, une écriture = une
+#   transaction courte (l'appareil modifié seulement).
+# - Le registre complet (GET /api/devices, export YAML) est assemblé une fois et
+#   gardé en mémoire ; il n'est relu que si une autre connexion a écrit
+#   (PRAGMA data_version). Copie à l'écriture, comme registry.py : une
+#   mutation remplace _cache par un nouveau Registry, celui déjà renvoyé aux
+#   lecteurs n'est jamais modifié.
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Device, Registry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS devices (
+    seq            INTEGER PRIMARY KEY AUTOINCREMENT,  -- ordre d'insertion (comme le dict JSON)
+    key            TEXT NOT NULL UNIQUE,
+    id_hex         TEXT NOT NULL,
+    label          TEXT NOT NULL,
+    ha_type        TEXT NOT NULL,
+    eep            TEXT,
+    light_sender   TEXT,
+    sensor_options TEXT                                -- JSON (SensorOptions)
+);
+CREATE TABLE IF NOT EXISTS channels (
+    device_key TEXT NOT NULL REFERENCES devices(key) ON DELETE CASCADE ON UPDATE CASCADE,
+    position   INTEGER NOT NULL,
+    channel    INTEGER NOT NULL,
+    label      TEXT NOT NULL,
+    PRIMARY KEY (device_key, position)
+);
+CREATE TABLE IF NOT EXISTS emitters (
+    device_key TEXT NOT NULL,
+    position   INTEGER NOT NULL,
+    id         TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    label      TEXT,
+    PRIMARY KEY (device_key, position),
+    FOREIGN KEY (device_key, position) REFERENCES channels(device_key, position)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
+CREATE INDEX IF NOT EXISTS devices_id_hex ON devices(id_hex);
+CREATE INDEX IF NOT EXISTS devices_eep ON devices(eep);
+CREATE INDEX IF NOT EXISTS devices_ha_type ON devices(ha_type);
+CREATE INDEX IF NOT EXISTS emitters_id ON emitters(id);
+"""
+
+_DEVICE_COLUMNS = "key, id_hex, label, ha_type, eep, light_sender, sensor_options"
+
+
+class SqliteRegistry:
+    """Registre stocké dans une base SQLite (une connexion partagée, protégée par un verrou)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        # Les endpoints synchrones FastAPI tournent dans un pool de threads
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(SCHEMA)
+        self._cache: Optional[Registry] = None
+        self._data_version: Optional[int] = None
+        # +1 à chaque réassemblage ou modification du registre en mémoire
+        self.generation = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def invalidate(self) -> None:
+        """Oublie le registre assemblé en mémoire."""
+        with self._lock:
+            self._cache = None
+
+    # ------------------------------------------------------------------
+    # Lignes <-> modèles
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _device_row(key: str, dev: Device) -> tuple:
+        return (
+            key,
+            dev.id_hex,
+            dev.label,
+            dev.ha_type,
+            dev.eep,
+            dev.light_sender.sender_id if dev.light_sender else None,
+            dev.sensor_options.model_dump_json() if dev.sensor_options else None,
+        )
+
+    def _insert(self, items: Iterable[tuple]) -> None:
+        """Insère (ou remplace) des appareils et leurs canaux ; transaction ouverte par l'appelant."""
+        devices: List[tuple] = []
+        channels: List[tuple] = []
+        emitters: List[tuple] = []
+        keys: List[tuple] = []
+        for key, dev in items:
+            devices.append(self._device_row(key, dev))
+            keys.append((key,))
+            for pos, ch in enumerate(dev.channels):
+                channels.append((key, pos, ch.channel, ch.label))
+                if ch.emitter is not None:
+                    emitters.append((key, pos, ch.emitter.id, ch.emitter.kind, ch.emitter.label))
+        db = self._db
+        db.executemany(
+            f"INSERT INTO devices ({_DEVICE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET id_hex=excluded.id_hex, label=excluded.label, "
+            "ha_type=excluded.ha_type, eep=excluded.eep, light_sender=excluded.light_sender, "
+            "sensor_options=excluded.sensor_options",
+            devices,
+        )
+        db.executemany("DELETE FROM channels WHERE device_key = ?", keys)
+        db.executemany("INSERT INTO channels VALUES (?, ?, ?, ?)", channels)
+        db.executemany("INSERT INTO emitters VALUES (?, ?, ?, ?, ?)", emitters)
+
+    def _select(self, where: str = "", params: tuple = ()) -> Dict[str, Device]:
+        """Assemble les appareils (et leurs canaux) sélectionnés par `where`."""
+        db = self._db
+        rows = db.execute(
+            f"SELECT {_DEVICE_COLUMNS} FROM devices {where} ORDER BY seq", params
+        ).fetchall()
+        if not rows:
+            return {}
+        raw: Dict[str, dict] = {}
+        for key, id_hex, label, ha_type, eep, light_sender, sensor_options in rows:
+            raw[key] = {
+                "id_hex": id_hex,
+                "label": label,
+                "ha_type": ha_type,
+                "eep": eep,
+                "channels": [],
+                "light_sender": {"sender_id": light_sender} if light_sender else None,
+                "sensor_options": json.loads(sensor_options) if sensor_options else None,
+            }
+        ch_filter = f"WHERE c.device_key IN (SELECT key FROM devices {where})" if where else ""
+        for key, _pos, channel, label, e_id, e_kind, e_label in db.execute(
+            "SELECT c.device_key, c.position, c.channel, c.label, e.id, e.kind, e.label "
+            "FROM channels c LEFT JOIN emitters e "
+            "ON e.device_key = c.device_key AND e.position = c.position "
+            f"{ch_filter} ORDER BY c.device_key, c.position",
+            params if where else (),
+        ):
+            ch = {"channel": channel, "label": label, "emitter": None}
+            if e_id is not None:
+                ch["emitter"] = {"id": e_id, "kind": e_kind, "label": e_label}
+            raw[key]["channels"].append(ch)
+        return {key: Device.model_validate(data) for key, data in raw.items()}
+
+    # ------------------------------------------------------------------
+    # API (mêmes opérations que registry.py)
+    # ------------------------------------------------------------------
+    def _fresh(self) -> bool:
+        """Le registre en mémoire est-il à jour (aucune écriture d'une autre connexion) ?"""
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        fresh = self._cache is not None and version == self._data_version
+        self._data_version = version
+        return fresh
+
+    def load(self) -> Registry:
+        """Registre complet (mémoire, réassemblé si une autre connexion a écrit)."""
+        with self._lock:
+            if not self._fresh():
+                self._cache = Registry(devices=self._select())
+                self.generation += 1
+            return self._cache
+
+    def save(self, reg: Registry) -> None:
+        """Remplace tout le registre (import YAML, migration)."""
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("DELETE FROM devices")
+                self._insert(reg.devices.items())
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._cache = reg
+            self.generation += 1
+            self._fresh()
+
+    def upsert(self, items: List[Tuple[str, Device]]) -> Registry:
+        """Ajoute / met à jour des appareils (une transaction, ces appareils seulement)."""
+        with self._lock:
+            reg = self.load()
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert(items)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._cache = Registry.model_construct(devices={**reg.devices, **dict(items)})
+            self.generation += 1
+            return self._cache
+
+    def delete(self, keys: List[str]) -> List[str]:
+        """Supprime des appareils (canaux et émetteurs en cascade) ; retourne les clés supprimées."""
+        with self._lock:
+            reg = self.load()
+            deleted = [key for key in dict.fromkeys(keys) if key in reg.devices]
+            if deleted:
+                db = self._db
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    db.executemany("DELETE FROM devices WHERE key = ?", [(k,) for k in deleted])
+                    db.execute("COMMIT")
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+                gone = set(deleted)
+                self._cache = Registry.model_construct(
+                    devices={k: d for k, d in reg.devices.items() if k not in gone}
+                )
+                self.generation += 1
+            return deleted
+
+    def get(self, key: str) -> Optional[Device]:
+        """Un appareil par clé, depuis la mémoire si elle est à jour, sinon par requête indexée."""
+        with self._lock:
+            if self._fresh():
+                return self._cache.devices.get(key)
+            self._cache = None
+            return self._select("WHERE key = ?", (key,)).get(key)
+
+    def find(
+        self,
+        eep: Optional[str] = None,
+        ha_type: Optional[str] = None,
+        emitter_id: Optional[str] = None,
+    ) -> Dict[str, Device]:
+        """Appareils filtrés via les index (eep, ha_type, émetteur d'un canal)."""
+        clauses: List[str] = []
+        params: List[str] = []
+        if eep:
+            clauses.append("eep = ?")
+            params.append(eep)
+        if ha_type:
+            clauses.append("ha_type = ?")
+            params.append(ha_type)
+        if emitter_id:
+            clauses.append("key IN (SELECT device_key FROM emitters WHERE id = ?)")
+            params.append(emitter_id.strip().upper())
+        with self._lock:
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            if not where:
+                return dict(self.load().devices)
+            return self._select(where, tuple(params))
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM devices LIMIT 1").fetchone() is None
+
+    def meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def migrate_from(self, reg: Registry, source: str) -> None:
+        """Importe le registre JSON existant (une seule fois ; le fichier JSON est conservé)."""
+        with self._lock:
+            self.save(reg)
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('migrated_from', ?)", (source,)
+            )
@@ -6,6 +6,12 @@
 
 const $ = (sel) => document.querySelector(sel);
 const devicesDiv = $("#devices");
+const devicesCount = $("#devices-count");
+const devicesMore = $("#devices-more");
+const deviceSearch = $("#device-search");
+// Liste paginée : taille de page, curseur de la page suivante
+const PAGE_SIZE = 100;
+let nextCursor = null;
 const channelsDiv = $("#channels");
 const form = $("#device-form");
 const opResult = $("#op-result");
@@ -157,12 +163,21 @@ function formToObj(formEl) {
 }
 
 // --- CRUD & Import/Export ---
-async function refresh() {
-  const res = await api("api/devices");
+// Recharge la première page (append=false) ou ajoute la suivante (append=true)
+async function refresh(append = false) {
+  const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+  const q = (deviceSearch?.value || "").trim();
+  if (q) params.set("q", q);
+  if (append && nextCursor) params.set("cursor", nextCursor);
+  const res = await api(`api/devices?${params}`);
   const json = await res.json();
   const items = Object.entries(json.devices || {});
-  devicesDiv.innerHTML = "";
-  if (!items.length) {
+  nextCursor = json.next_cursor || null;
+  devicesMore.hidden = !nextCursor;
+  if (!append) devicesDiv.innerHTML = "";
+  const shown = devicesDiv.querySelectorAll(".dev").length + items.length;
+  devicesCount.textContent = json.total ? `${shown} / ${json.total}` : "";
+  if (!append && !items.length) {
     devicesDiv.textContent = "(aucun appareil)";
     return;
   }
@@ -244,8 +259,9 @@ $("#export").onclick = async () => {
   opResult.textContent = "Export en cours...";
   const res = await api("api/export", { method:"POST" });
   const json = await res.json();
+  const state = (written) => written ? "écrit" : "inchangé";
   opResult.textContent = json.ok
-    ? `Écrit: ${json.auto_output} et ${json.config_output}`
+    ? `${json.auto_output} : ${state(json.auto_written)} — ${json.config_output} : ${state(json.config_written)}`
     : "Erreur export";
 };
 
@@ -261,4 +277,12 @@ $("#import").onclick = async () => {
   }
 };
 
+// Pagination / recherche (debounce pour ne pas requêter à chaque touche)
+devicesMore.onclick = () => refresh(true);
+let searchTimer = null;
+deviceSearch.oninput = () => {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(() => refresh(), 250);
+};
+
 refresh();
@@ -10,7 +10,17 @@ Ce module s'occupe :
      (regroupements récepteur/émetteur, EEP, options, etc.)
 - de lire ces deux fichiers pour reconstruire un `Registry`.
 - de sauvegarder un **backup** des fichiers, mais **hors `/packages/`**,
-  pour éviter que Home Assistant ne tente de charger le backup comme un package.
+  pour éviter que Home Assistant ne tente de charger le backup comme un package
+  (historique horodaté avec rotation, voir backups.py).
+- de ne rendre que les appareils modifiés depuis l'export précédent
+  (fragments YAML par appareil, indexés par l'empreinte du modèle) ;
+- de ne rien toucher quand le contenu n'a pas changé : les documents sont
+  rendus en mémoire et leur SHA-256 comparé à l'empreinte enregistrée du
+  fichier sur disque (pas de backup, pas d'écriture, mtime inchangé donc pas de
+  rechargement du package par HA). Les écritures sont atomiques
+  (temporaire + fsync + rename).
+- d'utiliser libyaml (CSafeDumper / CSafeLoader) si PyYAML a été compilé
+  avec, sinon les classes Python équivalentes ; la sortie est identique.
 
 Le contenu écrit pour `enocean_auto.yaml` respecte les schémas HA :
 - binary_sensor.platform: enocean  (id: [int,int,int,int], name?, device_class?)
@@ -23,11 +33,21 @@ Réf. code source HA : plateformes "enocean" binary_sensor / light / sensor.  #
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, NamedTuple, Tuple, Optional
 
+import hashlib
+import json
 import os
+import threading
 import yaml
 
+# libyaml (extension C) si disponible : même sortie, 2 à 4 fois plus rapide
+try:
+    from yaml import CSafeDumper as _SafeDumper, CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML sans libyaml
+    from yaml import SafeDumper as _SafeDumper, SafeLoader as _SafeLoader
+
+from . import backups
 from .models import (
     Registry,
     Device,
@@ -35,6 +55,21 @@ from .models import (
     ChannelEmitter,
 )
 
+# Empreintes des fichiers exportés : chemin -> {"sig": [mtime_ns, taille, inode], "sha256": ...}
+# (évite de relire les YAML pour savoir s'ils ont changé ; une signature
+# différente, ex. après une modification à la main, force la relecture)
+DIGEST_PATH = "/data/enocean_export_digests.json"
+
+_digests: Optional[Dict[str, dict]] = None
+_digest_lock = threading.Lock()
+
+
+class ExportedFile(NamedTuple):
+    """Résultat de l'export d'un fichier : chemin effectif et écriture effectuée ou non."""
+
+    path: str
+    written: bool
+
 # -----------------------------------------------------------------------------
 # Utilitaires
 # -----------------------------------------------------------------------------
@@ -61,46 +96,133 @@ def _ensure_dir(p: Path) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
 
 
-def _yaml_dump_to_file(path: Path, data: dict) -> None:
+def _render_yaml(data: dict) -> bytes:
     """
-    Écrit du YAML lisible :
+    Rend du YAML lisible (en mémoire) :
     - sort_keys=False pour garder l’ordre logique,
     - allow_unicode=True pour conserver les accents,
     - default_flow_style=False pour listes/mappings multilignes.
     """
+    return yaml.dump(
+        data,
+        Dumper=_SafeDumper,
+        sort_keys=False,
+        allow_unicode=True,
+        default_flow_style=False,
+    ).encode("utf-8")
+
+
+def _file_sig(path: Path) -> Optional[List[int]]:
+    """[mtime_ns, taille, inode] du fichier, ou None s'il n'existe pas."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def _load_digests() -> Dict[str, dict]:
+    """Empreintes enregistrées (lues une fois depuis DIGEST_PATH)."""
+    global _digests
+    if _digests is None:
+        try:
+            with open(DIGEST_PATH, "r", encoding="utf-8") as f:
+                _digests = json.load(f)
+        except (OSError, ValueError):
+            _digests = {}
+    return _digests
+
+
+def _store_digest(path: Path, sha: str) -> None:
+    """Enregistre l'empreinte du fichier qui vient d'être écrit (échec non bloquant)."""
+    digests = _load_digests()
+    digests[str(path)] = {"sig": _file_sig(path), "sha256": sha}
+    try:
+        _atomic_write(Path(DIGEST_PATH), json.dumps(digests, indent=2).encode("utf-8"))
+    except OSError:
+        # Sans empreinte persistée, le prochain export relira simplement le fichier
+        pass
+
+
+def _disk_digest(path: Path) -> Optional[str]:
+    """SHA-256 du fichier sur disque : empreinte enregistrée si sa signature correspond, sinon relecture."""
+    sig = _file_sig(path)
+    if sig is None:
+        return None
+    known = _load_digests().get(str(path))
+    if known and known.get("sig") == sig:
+        return known.get("sha256")
+    try:
+        sha = hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+    _load_digests()[str(path)] = {"sig": sig, "sha256": sha}
+    return sha
+
+
+def _atomic_write(path: Path, content: bytes) -> None:
+    """Écrit `content` via un fichier temporaire voisin, fsync, puis rename atomique."""
     _ensure_dir(path)
-    with path.open("w", encoding="utf-8") as f:
-        yaml.safe_dump(
-            data,
-            f,
-            sort_keys=False,
-            allow_unicode=True,
-            default_flow_style=False,
-        )
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
-def _safe_backup(src_path: Path, backup_path: Path) -> None:
+def _write_if_changed(path: Path, backup_path: Path, content: bytes) -> bool:
     """
-    Sauvegarde le fichier `src_path` vers `backup_path` **hors /packages/**.
-    - Si `backup_path` pointe dans /packages/, on le redirige vers :
-      /config/enocean_manager/backups/<nom>.bak
+    Écrit `content` dans `path` seulement s'il diffère du fichier existant
+    (backup préalable dans ce cas). Retourne True si écrit.
     """
-    if not src_path.exists():
-        return
+    sha = hashlib.sha256(content).hexdigest()
+    with _digest_lock:
+        if _disk_digest(path) == sha:
+            return False
+        backup = _safe_backup(path, backup_path)
+        try:
+            _atomic_write(path, content)
+        except BaseException:
+            # Le backup (souvent un lien vers le fichier resté en place) n'a pas lieu d'être
+            if backup is not None:
+                backups.discard_backup(backup)
+            raise
+        _store_digest(path, sha)
+    return True
+
+
+def restore_yaml_backup(
+    path: Path, backup_path: Path, info: backups.BackupInfo
+) -> Optional[backups.BackupInfo]:
+    """
+    Restaure un backup de `path` sous le même verrou que l'export (backup de
+    l'état actuel, remplacement, empreinte enregistrée) ; retourne le backup
+    de l'état remplacé. FileNotFoundError si le backup a disparu entre-temps.
+    """
+    with _digest_lock:
+        previous = backups.restore_backup(path, backup_path, info)
+        _store_digest(path, hashlib.sha256(path.read_bytes()).hexdigest())
+    return previous
+
 
-    effective_backup = backup_path
+def _safe_backup(src_path: Path, backup_path: Path) -> Optional[backups.BackupInfo]:
+    """
+    Ajoute `src_path` à l'historique des backups **hors /packages/**
+    (voir backups.py : horodatage, lien physique ou copie, rotation).
+    - Si `backup_path` pointe dans /packages/, l'historique va dans :
+      /config/enocean_manager/backups/
+    """
     try:
-        # Si le backup est sous /packages/, on le déplace dans /config/enocean_manager/backups/
-        if "/packages/" in str(backup_path):
-            new_dir = Path("/config/enocean_manager/backups")
-            new_dir.mkdir(parents=True, exist_ok=True)
-            effective_backup = new_dir / (backup_path.name or f"{src_path.name}.bak")
-
-        _ensure_dir(effective_backup)
-        effective_backup.write_text(src_path.read_text(encoding="utf-8"), encoding="utf-8")
+        return backups.create_backup(src_path, backup_path)
     except Exception:
         # En cas d'échec de backup, on n'empêche pas l'écriture principale.
-        pass
+        return None
 
 
 def _auto_correct_config_target(path: Path) -> Path:
@@ -177,6 +299,42 @@ def _build_ha_entry_sensor(device: Device) -> dict:
     return entry
 
 
+class _HaEntries(NamedTuple):
+    """Entrées HA d'un appareil, par section de `enocean_auto.yaml`."""
+
+    binary_sensor: List[Tuple[str, dict]]   # (ID émetteur normalisé, entrée)
+    switch: List[dict]
+    light: List[dict]
+    sensor: List[dict]
+
+
+def _device_ha_entries(dev: Device) -> _HaEntries:
+    """Entrées HA produites par un appareil (sans dédoublonnage des émetteurs)."""
+    entries = _HaEntries([], [], [], [])
+    if dev.ha_type == "switch":
+        # Un switch HA est un récepteur avec au moins 1 canal
+        for ch in (dev.channels or []):
+            entries.switch.append(_build_ha_entry_switch(dev, ch))
+            # Si un émetteur (kind=binary_sensor) est attaché au canal, on peut l’exposer
+            if ch.emitter and ch.emitter.id:
+                kind = (ch.emitter.kind or "binary_sensor").strip()
+                if kind == "binary_sensor":
+                    eid = ch.emitter.id.upper().strip()
+                    entries.binary_sensor.append((eid, _build_ha_entry_binary_sensor(ch.emitter)))
+
+    elif dev.ha_type == "light":
+        # Light HA requiert sender_id – on ajoute l’entrée si complète
+        entry = _build_ha_entry_light(dev)
+        if entry:
+            entries.light.append(entry)
+
+    elif dev.ha_type == "sensor":
+        entries.sensor.append(_build_ha_entry_sensor(dev))
+
+    # Les autres types ne sont pas gérés côté EnOcean (limités à ceux-ci)
+    return entries
+
+
 def _generate_auto_yaml_structure(reg: Registry) -> dict:
     """
     Construit la structure dict correspondant à `enocean_auto.yaml`.
@@ -191,29 +349,14 @@ def _generate_auto_yaml_structure(reg: Registry) -> dict:
     seen_emitters: set[str] = set()
 
     for key, dev in (reg.devices or {}).items():
-        if dev.ha_type == "switch":
-            # Un switch HA est un récepteur avec au moins 1 canal
-            for ch in (dev.channels or []):
-                switches.append(_build_ha_entry_switch(dev, ch))
-                # Si un émetteur (kind=binary_sensor) est attaché au canal, on peut l’exposer
-                if ch.emitter and ch.emitter.id:
-                    kind = (ch.emitter.kind or "binary_sensor").strip()
-                    if kind == "binary_sensor":
-                        eid = ch.emitter.id.upper().strip()
-                        if eid not in seen_emitters:
-                            binary_sensors.append(_build_ha_entry_binary_sensor(ch.emitter))
-                            seen_emitters.add(eid)
-
-        elif dev.ha_type == "light":
-            # Light HA requiert sender_id – on ajoute l’entrée si complète
-            entry = _build_ha_entry_light(dev)
-            if entry:
-                lights.append(entry)
-
-        elif dev.ha_type == "sensor":
-            sensors.append(_build_ha_entry_sensor(dev))
-
-        # Les autres types ne sont pas gérés côté EnOcean (limités à ceux-ci)
+        entries = _device_ha_entries(dev)
+        for eid, entry in entries.binary_sensor:
+            if eid not in seen_emitters:
+                binary_sensors.append(entry)
+                seen_emitters.add(eid)
+        switches.extend(entries.switch)
+        lights.extend(entries.light)
+        sensors.extend(entries.sensor)
 
     # Assemble le mapping top-level attendu par HA (packages)
     doc: dict = {}
@@ -245,46 +388,139 @@ def _generate_config_yaml_structure(reg: Registry) -> dict:
     return {"version": 1, "devices": devices_list}
 
 
+# -----------------------------------------------------------------------------
+# Rendu incrémental : fragments YAML par appareil
+# -----------------------------------------------------------------------------
+# Un document = en-têtes de section + éléments de liste ; chaque appareil rend
+# ses éléments ("- platform: ...") une fois, gardés sous l'empreinte de son
+# modèle. Un export ne rend donc que les appareils modifiés depuis le précédent
+# et assemble le reste par concaténation (octets identiques au rendu complet :
+# les listes sous une clé de premier niveau ne sont pas indentées par PyYAML).
+
+class _Fragments(NamedTuple):
+    """YAML déjà rendu d'un appareil (éléments de liste, sans en-tête de section)."""
+
+    binary_sensor: Tuple[Tuple[str, bytes], ...]   # (ID émetteur normalisé, élément)
+    switch: bytes
+    light: bytes
+    sensor: bytes
+    config: bytes
+
+
+# empreinte du modèle -> fragments (seuls ceux du dernier export sont gardés)
+_fragments: Dict[bytes, _Fragments] = {}
+_fragment_lock = threading.Lock()
+
+
+def _render_items(items: List[dict]) -> bytes:
+    """Éléments de liste YAML ("- ..."), ou b"" pour une liste vide."""
+    return _render_yaml(items) if items else b""
+
+
+def _device_fragments(dev: Device) -> _Fragments:
+    """Rend les entrées HA et le fragment de config d'un appareil."""
+    entries = _device_ha_entries(dev)
+    return _Fragments(
+        binary_sensor=tuple((eid, _render_yaml([entry])) for eid, entry in entries.binary_sensor),
+        switch=_render_items(entries.switch),
+        light=_render_items(entries.light),
+        sensor=_render_items(entries.sensor),
+        config=_render_yaml([dev.model_dump(exclude_none=True)]),
+    )
+
+
+def _section(name: str, items: List[bytes]) -> bytes:
+    """Section de premier niveau : "name:" suivi des éléments, "name: []" si vide."""
+    body = b"".join(items)
+    return name.encode("utf-8") + (b":\n" + body if body else b": []\n")
+
+
+def _render_documents(reg: Registry) -> Tuple[bytes, bytes]:
+    """
+    Rend (enocean_auto.yaml, enocean_yaml_config.yaml), identiques à
+    _render_yaml(_generate_*_yaml_structure(reg)), en ne rendant que les
+    appareils absents du cache de fragments.
+    """
+    global _fragments
+    with _fragment_lock:
+        previous = _fragments
+        current: Dict[bytes, _Fragments] = {}
+        frags: List[_Fragments] = []
+        for dev in (reg.devices or {}).values():
+            digest = hashlib.sha1(dev.model_dump_json().encode("utf-8")).digest()
+            frag = current.get(digest) or previous.get(digest)
+            if frag is None:
+                frag = _device_fragments(dev)
+            current[digest] = frag
+            frags.append(frag)
+        _fragments = current
+
+    # Pour éviter les doublons d’émetteurs transformés en binary_sensor
+    seen_emitters: set[str] = set()
+    binary_sensors: List[bytes] = []
+    for frag in frags:
+        for eid, item in frag.binary_sensor:
+            if eid not in seen_emitters:
+                binary_sensors.append(item)
+                seen_emitters.add(eid)
+
+    sections = [
+        _section(name, items)
+        for name, items in (
+            ("binary_sensor", binary_sensors),
+            ("switch", [f.switch for f in frags]),
+            ("light", [f.light for f in frags]),
+            ("sensor", [f.sensor for f in frags]),
+        )
+        if any(items)
+    ]
+    auto = b"".join(sections) if sections else _render_yaml({})
+    config = _render_yaml({"version": 1}) + _section("devices", [f.config for f in frags])
+    return auto, config
+
+
 # -----------------------------------------------------------------------------
 # Fonctions publiques utilisées par l'API
 # -----------------------------------------------------------------------------
 
+def output_paths(auto_output_path: str, config_output_path: str) -> Tuple[Path, Path]:
+    """Chemins effectivement écrits (auto, config) ; la config est forcée hors /packages/."""
+    return Path(auto_output_path), _auto_correct_config_target(Path(config_output_path))
+
+
 def write_both_yaml_files(
     reg: Registry,
     auto_output_path: str,
     auto_backup_path: str,
     config_output_path: str,
     config_backup_path: str,
-) -> Tuple[str, str]:
+) -> Tuple[ExportedFile, ExportedFile]:
     """
     Écrit:
       - `auto_output_path` avec la configuration HA (packages)
       - `config_output_path` avec les groupements lisibles
-    Crée une sauvegarde de chaque fichier juste avant l'écriture.
+    Chaque fichier n'est sauvegardé puis réécrit que si son contenu change ;
+    retourne (auto, config) avec pour chacun written=True/False.
 
     Règles de sûreté:
     - **Backups hors /packages/** (redirigés si nécessaire).
     - **enocean_yaml_config.yaml** forcé hors /packages/.
     """
     # Normalise chemins
-    auto_out = Path(auto_output_path)
+    auto_out, cfg_out = output_paths(auto_output_path, config_output_path)
     auto_bak = Path(auto_backup_path)
-    cfg_out = _auto_correct_config_target(Path(config_output_path))
     cfg_bak = Path(config_backup_path)
 
-    # Sauvegardes si les fichiers existent déjà
-    _safe_backup(auto_out, auto_bak)
-    _safe_backup(cfg_out, cfg_bak)
-
-    # Génère la structure HA (packages) puis écrit
-    auto_doc = _generate_auto_yaml_structure(reg)
-    _yaml_dump_to_file(auto_out, auto_doc)
-
-    # Génère la structure lisible de config puis écrit
-    cfg_doc = _generate_config_yaml_structure(reg)
-    _yaml_dump_to_file(cfg_out, cfg_doc)
+    # Rend le package HA et la config lisible (appareils modifiés seulement),
+    # puis écrit chaque fichier s'il a changé
+    auto_doc, cfg_doc = _render_documents(reg)
+    auto_written = _write_if_changed(auto_out, auto_bak, auto_doc)
+    cfg_written = _write_if_changed(cfg_out, cfg_bak, cfg_doc)
 
-    return (str(auto_out), str(cfg_out))
+    return (
+        ExportedFile(str(auto_out), auto_written),
+        ExportedFile(str(cfg_out), cfg_written),
+    )
 
 
 def read_both_yaml_files(auto_output_path: str, config_output_path: str) -> Registry:
@@ -308,7 +544,7 @@ def read_both_yaml_files(auto_output_path: str, config_output_path: str) -> Regi
 
     if cfg_path.exists():
         try:
-            raw = yaml.safe_load(cfg_path.read_text(encoding="utf-8")) or {}
+            raw = yaml.load(cfg_path.read_bytes(), Loader=_SafeLoader) or {}
             for dev_obj in (raw.get("devices") or []):
                 dev = Device.model_validate(dev_obj)
                 # clé = id_hex (stable) ; si collision, on suffixe
@@ -323,7 +559,7 @@ def read_both_yaml_files(auto_output_path: str, config_output_path: str) -> Regi
 
     if auto_path.exists():
         try:
-            raw = yaml.safe_load(auto_path.read_text(encoding="utf-8")) or {}
+            raw = yaml.load(auto_path.read_bytes(), Loader=_SafeLoader) or {}
             # ---- switches ----
             for sw in (raw.get("switch") or []):
                 if not isinstance(sw, dict) or sw.get("platform") != "enocean":
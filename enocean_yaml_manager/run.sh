@@ -6,11 +6,17 @@ AUTO_OUTPUT_PATH="$(bashio::config 'auto_output_path')"
 AUTO_BACKUP_PATH="$(bashio::config 'auto_backup_path')"
 CONFIG_OUTPUT_PATH="$(bashio::config 'config_output_path')"
 CONFIG_BACKUP_PATH="$(bashio::config 'config_backup_path')"
+REGISTRY_BACKEND="$(bashio::config 'registry_backend' 'json')"
+BACKUP_KEEP="$(bashio::config 'backup_keep' '20')"
+BACKUP_MAX_AGE_DAYS="$(bashio::config 'backup_max_age_days' '30')"
 
 export AUTO_OUTPUT_PATH
 export AUTO_BACKUP_PATH
 export CONFIG_OUTPUT_PATH
 export CONFIG_BACKUP_PATH
+export REGISTRY_BACKEND
+export BACKUP_KEEP
+export BACKUP_MAX_AGE_DAYS
 
 # Crée les répertoires/fichiers si nécessaire
 mkdir -p "$(dirname "$AUTO_OUTPUT_PATH")" "$(dirname "$CONFIG_OUTPUT_PATH")"
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# tools/bench_registry.py
+# -*- coding: utf-8 -*-
+"""
+bench_registry.py — Latence des lectures et écritures du registre de l'add-on EnOcean YAML Manager.
+
+Génère un registre synthétique (switches D2-01 à 2 canaux avec émetteurs,
+capteurs, lights) dans un fichier temporaire, puis mesure get_device() et
+list_devices() :
+- à froid : cache invalidé avant chaque appel (relecture + validation
+  Pydantic complètes, comme avant le cache) ;
+- à chaud : registre servi depuis la mémoire (fichier inchangé).
+Mesure aussi upsert_device() (ligne de journal + fsync) et l'écriture d'un
+instantané complet (ce que coûtait chaque modification avant le journal),
+ainsi que find_devices() (EEP, émetteur) : parcours en mémoire pour le
+backend JSON, index pour SQLite.
+
+Exemples :
+    python3 tools/bench_registry.py --devices 5000
+    python3 tools/bench_registry.py --devices 5000 --backend sqlite
+
+Dépendances : pydantic>=2 (celles de l'add-on).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "enocean_yaml_manager"))
+
+from app import registry  # noqa: E402
+from app.models import Channel, ChannelEmitter, Device, LightSender, Registry, SensorOptions  # noqa: E402
+
+
+def synthetic_registry(count: int, seed: int = 1) -> Registry:
+    """Registre de `count` appareils (70 % switches, 20 % capteurs, 10 % lights)."""
+    rnd = random.Random(seed)
+    reg = Registry()
+    for i in range(count):
+        id_hex = f"05{i:06X}"
+        kind = rnd.random()
+        if kind < 0.7:
+            dev = Device(
+                id_hex=id_hex,
+                label=f"Actionneur {i}",
+                ha_type="switch",
+                eep="D2-01-12",
+                channels=[
+                    Channel(
+                        channel=ch,
+                        label=f"Canal {ch}",
+                        emitter=ChannelEmitter(id=f"FE{i:04X}{ch:02X}", label=f"Inter {i}.{ch}"),
+                    )
+                    for ch in range(2)
+                ],
+            )
+        elif kind < 0.9:
+            dev = Device(
+                id_hex=id_hex,
+                label=f"Capteur {i}",
+                ha_type="sensor",
+                eep="A5-02-05",
+                sensor_options=SensorOptions(device_class="temperature"),
+            )
+        else:
+            dev = Device(
+                id_hex=id_hex,
+                label=f"Variateur {i}",
+                ha_type="light",
+                eep="A5-38-08",
+                light_sender=LightSender(sender_id=f"FF{i:06X}"),
+            )
+        reg.devices[registry.device_key(dev)] = dev
+    return reg
+
+
+def timed(func, runs: int, cold: bool) -> list[float]:
+    """Durées (ms) de `runs` appels ; `cold` invalide le cache avant chacun."""
+    samples = []
+    for _ in range(runs):
+        if cold:
+            registry.invalidate_cache()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def report(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"{name:<28} médiane {statistics.median(samples):>10.4f} ms   p95 {p95:>10.4f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=5000, help="taille du registre")
+    parser.add_argument("--runs", type=int, default=20, help="appels mesurés à froid")
+    parser.add_argument(
+        "--backend", choices=("json", "sqlite", "both"), default="both", help="backend(s) mesuré(s)"
+    )
+    args = parser.parse_args()
+
+    reg = synthetic_registry(args.devices)
+    for backend in ("json", "sqlite") if args.backend == "both" else (args.backend,):
+        bench_backend(backend, reg, args.runs)
+
+
+def bench_backend(backend: str, source: Registry, runs: int) -> None:
+    """Toutes les mesures pour un backend, dans un dossier temporaire neuf."""
+    with tempfile.TemporaryDirectory() as tmp:
+        registry.BACKEND = backend
+        registry.REG_PATH = os.path.join(tmp, "enocean_registry.json")
+        registry.SQLITE_PATH = os.path.join(tmp, "enocean_registry.sqlite3")
+        registry.invalidate_cache()
+        registry.save_registry(source.model_copy(deep=True))
+        path = registry.SQLITE_PATH if backend == "sqlite" else registry.REG_PATH
+        # SQLite en WAL : les pages récentes sont encore dans le fichier -wal
+        size_kb = sum(
+            os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p)
+        ) / 1024
+        print(f"\n[{backend}] registre : {len(source.devices)} appareils, {size_kb:.0f} Ko")
+
+        keys = list(registry.load_registry().devices)
+        rnd = random.Random(2)
+        get = lambda: registry.get_device(rnd.choice(keys))  # noqa: E731
+
+        report("GET appareil (à froid)", timed(get, runs, cold=True))
+        report("GET appareil (cache)", timed(get, runs * 100, cold=False))
+        report("GET registre (à froid)", timed(registry.list_devices, runs, cold=True))
+        report("GET registre (cache)", timed(registry.list_devices, runs * 100, cold=False))
+
+        reg = registry.load_registry()
+        emitters = [
+            ch.emitter.id for dev in reg.devices.values() for ch in dev.channels if ch.emitter
+        ]
+        by_eep = lambda: registry.find_devices(eep="A5-02-05")  # noqa: E731
+        by_emitter = lambda: registry.find_devices(emitter_id=rnd.choice(emitters))  # noqa: E731
+        report("recherche EEP", timed(by_eep, runs, cold=False))
+        report("recherche émetteur", timed(by_emitter, runs * 10, cold=False))
+
+        # Écritures : le compactage est repoussé pour mesurer l'ajout seul
+        registry.JOURNAL_COMPACT_BYTES = 1 << 40
+        put = lambda: registry.upsert_device(reg.devices[rnd.choice(keys)])  # noqa: E731
+        report("POST appareil", timed(put, runs, cold=False))
+        if backend == "json":
+            journal_kb = os.path.getsize(registry.journal_path()) / 1024 / runs
+            print(f"{'':<28} {journal_kb:.2f} Ko écrits par modification (journal)")
+        report("registre complet (import)", timed(lambda: registry.save_registry(reg), runs, cold=False))
+
+
+if __name__ == "__main__":
+    main()
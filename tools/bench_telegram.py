@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# tools/bench_telegram.py
+# -*- coding: utf-8 -*-
+"""
+bench_telegram.py — Allocations et durée du décodage d'une trame radio reçue.
+
+Compare, pour un mélange de trames (A5-02-05, A5-12-01, D2-01 statut, F6) :
+- chemin python-enocean : Packet.parse_msg() -> RadioPacket (+ parse_eep()
+  pour les compteurs et statuts D2-01, comme le faisaient les plateformes) ;
+- chemin intégration : radio_frame_length() + telegram_from_frame() -> Telegram,
+  décodé sur les octets de `payload`.
+
+Mesures : octets alloués par trame (tracemalloc, pic et blocs vivants par
+télégramme retenu) et µs par trame.
+
+Exemple :
+    python3 tools/bench_telegram.py --frames 20000
+
+Dépendances : python-enocean (chemin de référence) ; le module telegram.py de
+l'intégration est chargé directement, sans Home Assistant.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import pathlib
+import sys
+import time
+import tracemalloc
+import types
+
+_COMPONENT = pathlib.Path(__file__).resolve().parent.parent / "custom_components" / "enocean"
+
+
+def _load_component_modules():
+    """Charge frames.py et telegram.py dans un paquet factice (pas d'import HA)."""
+    package = types.ModuleType("_enocean_component")
+    package.__path__ = [str(_COMPONENT)]
+    sys.modules[package.__name__] = package
+    modules = []
+    for name in ("frames", "telegram"):
+        spec = importlib.util.spec_from_file_location(
+            f"{package.__name__}.{name}", _COMPONENT / f"{name}.py"
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        modules.append(module)
+    return modules
+
+
+frames, telegram = _load_component_modules()
+
+SENDER = [0x01, 0x82, 0x5D, 0xAB]
+OPTIONAL = [0x01, 0xFF, 0xFF, 0xFF, 0xFF, 0x45, 0x00]
+
+
+def sample_frames() -> list[list[int]]:
+    """Un exemplaire de chaque type de trame courant, en liste d'octets (comme _buffer)."""
+    data = [
+        [0xA5, 0x00, 0x00, 0x7F, 0x08],          # température A5-02-05
+        [0xA5, 0x00, 0x04, 0xD2, 0x0C | 0x01],   # compteur A5-12-01, DT=1, DIV=1
+        [0xD2, 0x04, 0x61, 0x64],                # statut D2-01 CMD 0x04
+        [0xF6, 0x30],                            # interrupteur F6
+    ]
+    return [
+        list(frames.build_frame(0x01, d + SENDER + [0x30], OPTIONAL)) for d in data
+    ]
+
+
+def decode_packet(buf: list[int]):
+    """Chemin python-enocean, décodage EEP compris pour A5-12 / D2-01."""
+    from enocean.protocol.packet import Packet  # type: ignore
+
+    _status, _rest, packet = Packet.parse_msg(list(buf))
+    rorg = packet.data[0]
+    if rorg == 0xA5 and packet.data[4] & 0x04:
+        packet.parse_eep(0x12, 0x01)
+    elif rorg == 0xD2:
+        packet.parse_eep(0x01, 0x01)
+    return packet
+
+
+def decode_telegram(buf: list[int]):
+    """Chemin intégration : Telegram construit depuis le buffer, décodage par octets."""
+    buf = list(buf)
+    if not telegram.radio_frame_length(buf):
+        return None
+    tel = telegram.telegram_from_frame(buf, telegram.frame_sender(buf))
+    if tel.rorg == 0xA5 and tel.payload[3] & 0x04:
+        telegram.meter_reading(tel.payload)
+    elif tel.rorg == 0xD2:
+        _ = (tel.payload[0] & 0x0F, tel.payload[1] & 0x1F, tel.payload[2] & 0x7F)
+    return tel
+
+
+def measure(decode, buffers: list[list[int]], count: int) -> dict[str, float]:
+    """Durée par trame, puis pic d'allocation et octets retenus par objet décodé."""
+    n = len(buffers)
+    start = time.perf_counter()
+    for i in range(count):
+        decode(buffers[i % n])
+    elapsed = time.perf_counter() - start
+
+    # Allocations : on garde `keep` objets vivants pour mesurer leur taille réelle
+    keep = min(count, 2000)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    retained = [decode(buffers[i % n]) for i in range(keep)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    return {
+        "us_per_frame": elapsed / count * 1e6,
+        "retained_bytes": (current - before) / keep,
+        "peak_bytes": (peak - before) / keep,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--frames", type=int, default=20000, help="nombre de trames décodées")
+    args = parser.parse_args()
+
+    buffers = sample_frames()
+    results = {"telegram": measure(decode_telegram, buffers, args.frames)}
+    try:
+        results["radiopacket"] = measure(decode_packet, buffers, args.frames)
+    except ImportError:
+        print("python-enocean absent : seul le chemin Telegram est mesuré.")
+
+    print(f"{'chemin':<12} {'µs/trame':>10} {'octets retenus':>15} {'pic/trame':>10}")
+    for name, res in results.items():
+        print(
+            f"{name:<12} {res['us_per_frame']:>10.2f} "
+            f"{res['retained_bytes']:>15.0f} {res['peak_bytes']:>10.0f}"
+        )
+    if "radiopacket" in results:
+        ref, new = results["radiopacket"], results["telegram"]
+        print(
+            f"gain : x{ref['us_per_frame'] / new['us_per_frame']:.1f} en durée, "
+            f"x{ref['retained_bytes'] / max(new['retained_bytes'], 1):.1f} en mémoire retenue"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# tools/bench_yaml.py
+# -*- coding: utf-8 -*-
+"""
+bench_yaml.py — Export / import YAML de l'add-on EnOcean YAML Manager, libyaml contre PyYAML pur.
+
+Génère un registre de switches D2-01 (un émetteur par canal, libellés
+accentués, longs ou avec caractères spéciaux) totalisant `--channels`
+canaux, puis mesure pour chaque implémentation disponible :
+- le rendu des deux documents (enocean_auto.yaml + enocean_yaml_config.yaml) ;
+- la relecture des deux documents (import).
+Vérifie que les deux dumpers produisent exactement les mêmes octets, puis
+mesure l'export incrémental (fragments par appareil) : cache vide, aucun
+changement, un appareil modifié.
+
+Exemple :
+    python3 tools/bench_yaml.py --channels 10000
+
+Dépendances : pydantic>=2, PyYAML (celles de l'add-on).
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import statistics
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "enocean_yaml_manager"))
+
+from app import yaml_manager  # noqa: E402
+from app.models import Channel, ChannelEmitter, Device, Registry  # noqa: E402
+
+LABELS = (
+    "Salon – plafond",
+    "Chambre d'amis : applique « nord »",
+    "Cuisine #2 (îlot) - éclairage sous meubles, côté fenêtre donnant sur le jardin",
+    "Bureau: \"lampe\" 50%",
+    "Entrée ✓",
+)
+
+
+def synthetic_registry(channels: int, per_device: int = 2) -> Registry:
+    """Registre de switches à `per_device` canaux, `channels` canaux au total."""
+    reg = Registry()
+    for i in range((channels + per_device - 1) // per_device):
+        id_hex = f"05{i:06X}"
+        reg.devices[id_hex] = Device(
+            id_hex=id_hex,
+            label=f"{LABELS[i % len(LABELS)]} {i}",
+            ha_type="switch",
+            eep="D2-01-12",
+            channels=[
+                Channel(
+                    channel=ch,
+                    label=f"Canal {ch}",
+                    emitter=ChannelEmitter(id=f"FE{i:04X}{ch:02X}", label=f"Inter {i}.{ch}"),
+                )
+                for ch in range(per_device)
+            ],
+        )
+    return reg
+
+
+def timed(func, runs: int) -> float:
+    """Durée médiane (ms) de `runs` appels."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--channels", type=int, default=10000, help="nombre total de canaux")
+    parser.add_argument("--runs", type=int, default=3, help="répétitions par mesure")
+    args = parser.parse_args()
+
+    reg = synthetic_registry(args.channels)
+    docs = (
+        yaml_manager._generate_auto_yaml_structure(reg),
+        yaml_manager._generate_config_yaml_structure(reg),
+    )
+
+    impls = [("PyYAML pur", yaml.SafeDumper, yaml.SafeLoader)]
+    if getattr(yaml, "__with_libyaml__", False):
+        impls.append(("libyaml", yaml.CSafeDumper, yaml.CSafeLoader))
+    else:
+        print("libyaml indisponible : mesure de PyYAML pur seulement")
+    print(
+        f"registre : {len(reg.devices)} appareils, {args.channels} canaux"
+        f" (le module utilise {yaml_manager._SafeDumper.__name__})"
+    )
+
+    outputs = {}
+    for name, dumper, loader in impls:
+        yaml_manager._SafeDumper, yaml_manager._SafeLoader = dumper, loader
+        rendered = [yaml_manager._render_yaml(doc) for doc in docs]
+        outputs[name] = rendered
+        export_ms = timed(lambda: [yaml_manager._render_yaml(doc) for doc in docs], args.runs)
+        import_ms = timed(lambda: [yaml.load(raw, Loader=loader) for raw in rendered], args.runs)
+        size_kb = sum(len(raw) for raw in rendered) / 1024
+        print(f"{name:<12} export {export_ms:>9.1f} ms   import {import_ms:>9.1f} ms   ({size_kb:.0f} Ko)")
+
+    if len(outputs) > 1:
+        same = outputs["PyYAML pur"] == outputs["libyaml"]
+        print(f"sortie identique octet pour octet : {'oui' if same else 'NON'}")
+        if not same:
+            sys.exit(1)
+
+    # Export incrémental avec le dernier dumper mesuré
+    def cold():
+        yaml_manager._fragments = {}
+        return yaml_manager._render_documents(reg)
+
+    keys = list(reg.devices)
+    edits = iter(range(1 << 30))
+
+    def one_edit():
+        key = keys[next(edits) * 7919 % len(keys)]
+        dev = reg.devices[key].model_copy(deep=True)
+        dev.label += " *"
+        reg.devices[key] = dev
+        return yaml_manager._render_documents(reg)
+
+    print(f"\nexport incrémental ({name}) :")
+    print(f"{'cache vide':<22} {timed(cold, args.runs):>9.1f} ms")
+    print(f"{'aucun changement':<22} {timed(lambda: yaml_manager._render_documents(reg), args.runs):>9.1f} ms")
+    print(f"{'1 appareil modifié':<22} {timed(one_edit, args.runs):>9.1f} ms")
+    full = (
+        yaml_manager._render_yaml(yaml_manager._generate_auto_yaml_structure(reg)),
+        yaml_manager._render_yaml(yaml_manager._generate_config_yaml_structure(reg)),
+    )
+    same = yaml_manager._render_documents(reg) == full
+    print(f"identique au rendu complet : {'oui' if same else 'NON'}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+# tools/enocean_emulator.py
+# -*- coding: utf-8 -*-
+"""
+enocean_emulator.py — Faux dongle EnOcean (ESP3) pour tests d'intégration et de charge.
+
+Expose un pseudo-terminal (pty) ou un serveur TCP parlant ESP3 comme un USB300 :
+- common commands : CO_RD_IDBASE (0x08), CO_RD_VERSION (0x03) ; les autres
+  reçoivent RET_NOT_SUPPORTED ;
+- chaque télégramme radio émis par l'hôte est acquitté (RESPONSE RET_OK) ;
+- actionneurs D2-01 simulés : une commande CMD 0x01 (ou une requête de statut
+  CMD 0x03) adressée à un actionneur déclaré reçoit un statut CMD 0x04, avec
+  délai et taux de perte réglables (test des ré-émissions) ;
+- trafic capteurs configurable : températures A5-02-05, compteurs A5-12-01,
+  interrupteurs F6, à un débit global donné ;
+- requêtes de teach-in UTE (D2-01-12), répétées jusqu'à réponse du dongle.
+
+EnOceanDongle, AssociationManager et les plateformes tournent sans modification :
+le chemin du pty (ou tcp://hôte:port) se renseigne comme chemin du dongle.
+
+Exemples :
+    python3 tools/enocean_emulator.py --pty --link /tmp/ttyENOCEAN \\
+        --actuator 05979CFA:2 --sensors temp:50,power:5,rocker:5 --rate 200
+    python3 tools/enocean_emulator.py --tcp 0.0.0.0:9637 --ute 20
+
+Dépendances : bibliothèque standard uniquement (Python ≥ 3.9, pty sous Linux/macOS).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+_LOGGER = logging.getLogger("enocean_emulator")
+
+# ---------------------------------------------------------------------------
+# ESP3
+# ---------------------------------------------------------------------------
+ESP3_SYNC = 0x55
+ESP3_HEADER_LEN = 6
+
+PACKET_RADIO = 0x01
+PACKET_RESPONSE = 0x02
+PACKET_COMMON_COMMAND = 0x05
+
+CO_RD_VERSION = 0x03
+CO_RD_IDBASE = 0x08
+
+RET_OK = 0x00
+RET_NOT_SUPPORTED = 0x02
+
+RORG_RPS = 0xF6
+RORG_4BS = 0xA5
+RORG_VLD = 0xD2
+RORG_UTE = 0xD4
+
+
+def _make_crc8_table() -> tuple[int, ...]:
+    """Table CRC8 ESP3 (polynôme 0x07)."""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return tuple(table)
+
+
+CRC8_TABLE = _make_crc8_table()
+
+
+def crc8(data: bytes) -> int:
+    """CRC8 ESP3."""
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def build_frame(packet_type: int, data: list[int], optional: list[int]) -> bytes:
+    """Trame ESP3 complète."""
+    header = bytes([(len(data) >> 8) & 0xFF, len(data) & 0xFF, len(optional), packet_type])
+    body = bytes(data) + bytes(optional)
+    return bytes([ESP3_SYNC]) + header + bytes([crc8(header)]) + body + bytes([crc8(body)])
+
+
+def radio_frame(data: list[int], dbm: int = 60, destination: int = 0xFFFFFFFF) -> bytes:
+    """Télégramme radio reçu (optional : sous-télégrammes, destination, dBm, sécurité)."""
+    return build_frame(
+        PACKET_RADIO, data, [0x01] + list(destination.to_bytes(4, "big")) + [dbm, 0x00]
+    )
+
+
+class FrameReader:
+    """Découpe le flux entrant en trames ESP3 valides (octets parasites ignorés)."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self.crc_errors = 0
+
+    def feed(self, chunk: bytes) -> list[tuple[int, bytes, bytes]]:
+        """Ajoute des octets ; retourne les trames complètes (type, data, optional)."""
+        buf = self._buf
+        buf.extend(chunk)
+        out = []
+        while True:
+            start = buf.find(ESP3_SYNC)
+            if start < 0:
+                buf.clear()
+                return out
+            del buf[:start]
+            if len(buf) < ESP3_HEADER_LEN:
+                return out
+            if buf[5] != crc8(buf[1:5]):
+                self.crc_errors += 1
+                del buf[:1]
+                continue
+            data_len = (buf[1] << 8) | buf[2]
+            opt_len = buf[3]
+            end = ESP3_HEADER_LEN + data_len + opt_len + 1
+            if len(buf) < end:
+                return out
+            body = bytes(buf[ESP3_HEADER_LEN:end - 1])
+            if buf[end - 1] != crc8(body):
+                self.crc_errors += 1
+            else:
+                out.append((buf[4], body[:data_len], body[data_len:]))
+            del buf[:end]
+
+
+# ---------------------------------------------------------------------------
+# Appareils simulés
+# ---------------------------------------------------------------------------
+@dataclass
+class Actuator:
+    """Actionneur D2-01 simulé (sorties 0..channels-1, valeurs 0–100 %)."""
+
+    sender: int
+    channels: int = 1
+    outputs: list[int] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.outputs = [0] * self.channels
+
+    def status(self, channel: int) -> list[int]:
+        """Télégramme de statut CMD 0x04 pour une sortie."""
+        return (
+            [RORG_VLD, 0x04, 0x60 | (channel & 0x1F), self.outputs[channel] & 0x7F]
+            + list(self.sender.to_bytes(4, "big"))
+            + [0x00]
+        )
+
+
+def _temperature(sender: int, rnd: random.Random) -> list[int]:
+    """A5-02-05 (0–40 °C) : DB1 = 255 - T*255/40, DB0.3 = 1 (données)."""
+    raw = 255 - int(rnd.uniform(15.0, 28.0) * 255 / 40)
+    return [RORG_4BS, 0x00, 0x00, raw, 0x08] + list(sender.to_bytes(4, "big")) + [0x00]
+
+
+def _power(sender: int, rnd: random.Random) -> list[int]:
+    """A5-12-01 puissance instantanée (DT = 1, diviseur 1) en W."""
+    value = rnd.randint(0, 3500)
+    return (
+        [RORG_4BS, (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF, 0x0C]
+        + list(sender.to_bytes(4, "big"))
+        + [0x00]
+    )
+
+
+def _rocker(sender: int, rnd: random.Random) -> list[int]:
+    """F6-02 : appui d'un bouton (PTM, T21 = NU = 1)."""
+    button = rnd.choice((0x10, 0x30, 0x50, 0x70))
+    return [RORG_RPS, button] + list(sender.to_bytes(4, "big")) + [0x30]
+
+
+SENSOR_KINDS: dict[str, tuple[int, Callable[[int, random.Random], list[int]]]] = {
+    # type -> (préfixe des IDs, générateur)
+    "temp": (0x01A00000, _temperature),
+    "power": (0x01B00000, _power),
+    "rocker": (0x01C00000, _rocker),
+}
+
+UTE_PREFIX = 0x01D00000
+
+
+def ute_request(sender: int) -> list[int]:
+    """Requête de teach-in UTE bidirectionnelle, réponse attendue, EEP D2-01-12."""
+    return [RORG_UTE, 0x80, 0xFF, 0x46, 0x00, 0x12, 0x01, RORG_VLD] + list(
+        sender.to_bytes(4, "big")
+    ) + [0x00]
+
+
+# ---------------------------------------------------------------------------
+# Émulateur
+# ---------------------------------------------------------------------------
+class Esp3Emulator:
+    """Logique du faux dongle, indépendante du transport."""
+
+    def __init__(
+        self,
+        base_id: int,
+        actuators: list[Actuator],
+        sensors: dict[str, int],
+        rate: float,
+        ute_devices: int = 0,
+        actuator_delay: float = 0.02,
+        loss: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.base_id = base_id
+        self.actuators = {a.sender: a for a in actuators}
+        self.rate = rate
+        self.actuator_delay = actuator_delay
+        self.loss = loss
+        self._rnd = random.Random(seed)
+        self._reader = FrameReader()
+        # Écrivains des clients connectés (pty : un seul)
+        self._writers: list[Callable[[bytes], None]] = []
+        # Capteurs : (id, générateur)
+        self._sensors = [
+            (SENSOR_KINDS[kind][0] + i, SENSOR_KINDS[kind][1])
+            for kind, count in sensors.items()
+            for i in range(count)
+        ]
+        # Appareils UTE en attente de réponse
+        self._ute_pending = {UTE_PREFIX + i for i in range(ute_devices)}
+        self._ute_total = ute_devices
+        # Compteurs
+        self.stats = {
+            "rx_frames": 0, "tx_frames": 0, "commands": 0, "radio_from_host": 0,
+            "status_sent": 0, "status_lost": 0, "sensor_telegrams": 0,
+            "ute_requests": 0, "ute_answered": 0,
+        }
+
+    # ---- transport ----
+    def attach(self, writer: Callable[[bytes], None]) -> None:
+        self._writers.append(writer)
+
+    def detach(self, writer: Callable[[bytes], None]) -> None:
+        if writer in self._writers:
+            self._writers.remove(writer)
+
+    def emit(self, frame: bytes) -> None:
+        """Envoie une trame à tous les clients."""
+        for writer in list(self._writers):
+            try:
+                writer(frame)
+                self.stats["tx_frames"] += 1
+            except OSError as exc:
+                _LOGGER.debug("Écriture impossible (%s), client retiré.", exc)
+                self.detach(writer)
+
+    def feed(self, chunk: bytes) -> None:
+        """Octets reçus de l'hôte."""
+        for packet_type, data, optional in self._reader.feed(chunk):
+            self.stats["rx_frames"] += 1
+            if packet_type == PACKET_COMMON_COMMAND and data:
+                self._on_common_command(data[0])
+            elif packet_type == PACKET_RADIO and data:
+                self._on_radio(data, optional)
+
+    # ---- commandes ----
+    def _on_common_command(self, code: int) -> None:
+        self.stats["commands"] += 1
+        if code == CO_RD_IDBASE:
+            # Base ID + nombre d'écritures restantes (optional)
+            self.emit(build_frame(PACKET_RESPONSE, [RET_OK] + list(self.base_id.to_bytes(4, "big")), [0x0A]))
+        elif code == CO_RD_VERSION:
+            data = (
+                [RET_OK, 2, 11, 1, 0, 2, 6, 3, 0]
+                + list((0x01859E4D).to_bytes(4, "big"))
+                + [0x45, 0x4F, 0x01, 0x03]
+                + list(b"EMULATOR".ljust(16, b"\x00"))
+            )
+            self.emit(build_frame(PACKET_RESPONSE, data, []))
+        else:
+            self.emit(build_frame(PACKET_RESPONSE, [RET_NOT_SUPPORTED], []))
+
+    def _on_radio(self, data: bytes, optional: bytes) -> None:
+        self.stats["radio_from_host"] += 1
+        # Un vrai dongle acquitte chaque émission
+        self.emit(build_frame(PACKET_RESPONSE, [RET_OK], []))
+        destination = int.from_bytes(optional[1:5], "big") if len(optional) >= 5 else 0xFFFFFFFF
+
+        if data[0] == RORG_UTE and destination in self._ute_pending:
+            # Réponse de teach-in du dongle : DB6.3..0 = 1 (réponse)
+            if data[1] & 0x0F == 0x01:
+                self._ute_pending.discard(destination)
+                self.stats["ute_answered"] += 1
+            return
+
+        actuator = self.actuators.get(destination)
+        if actuator is None or data[0] != RORG_VLD or len(data) < 3:
+            return
+        cmd = data[1] & 0x0F
+        channel = data[2] & 0x1F
+        if cmd == 0x01 and len(data) >= 4:
+            value = data[3] & 0x7F
+            targets = range(actuator.channels) if channel == 0x1E else [channel]
+            for ch in targets:
+                if ch < actuator.channels:
+                    actuator.outputs[ch] = value
+        elif cmd != 0x03:
+            return
+        targets = range(actuator.channels) if channel == 0x1E else [channel]
+        for ch in targets:
+            if ch >= actuator.channels:
+                continue
+            if self._rnd.random() < self.loss:
+                self.stats["status_lost"] += 1
+                continue
+            asyncio.get_running_loop().call_later(
+                self.actuator_delay, self._send_status, actuator, ch
+            )
+
+    def _send_status(self, actuator: Actuator, channel: int) -> None:
+        self.emit(radio_frame(actuator.status(channel), dbm=self._rnd.randint(40, 80)))
+        self.stats["status_sent"] += 1
+
+    # ---- trafic généré ----
+    async def run_sensors(self) -> None:
+        """Émet des télégrammes capteurs au débit global demandé (par paquets de 10 ms)."""
+        if not self._sensors or self.rate <= 0:
+            return
+        tick = 0.01
+        credit = 0.0
+        while True:
+            await asyncio.sleep(tick)
+            credit += self.rate * tick
+            while credit >= 1.0:
+                credit -= 1.0
+                sender, make = self._rnd.choice(self._sensors)
+                self.emit(radio_frame(make(sender, self._rnd), dbm=self._rnd.randint(40, 95)))
+                self.stats["sensor_telegrams"] += 1
+
+    async def run_ute(self, interval: float = 1.0, repeats: int = 5) -> None:
+        """Requêtes de teach-in UTE, répétées pour les appareils encore sans réponse."""
+        while not self._writers:
+            await asyncio.sleep(0.1)
+        for _ in range(repeats):
+            if not self._ute_pending:
+                return
+            for sender in sorted(self._ute_pending):
+                self.emit(radio_frame(ute_request(sender)))
+                self.stats["ute_requests"] += 1
+            await asyncio.sleep(interval)
+
+    async def report(self, interval: float) -> None:
+        """Affiche périodiquement les compteurs."""
+        while True:
+            await asyncio.sleep(interval)
+            stats = dict(self.stats, crc_errors=self._reader.crc_errors)
+            if self._ute_total:
+                stats["ute_pending"] = len(self._ute_pending)
+            _LOGGER.info("stats %s", stats)
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+async def serve_pty(emulator: Esp3Emulator, link: Optional[str]) -> None:
+    """Expose l'émulateur sur un pseudo-terminal (chemin affiché, lien optionnel)."""
+    import tty  # Unix uniquement
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    path = os.ttyname(slave)
+    if link:
+        if os.path.lexists(link):
+            os.unlink(link)
+        os.symlink(path, link)
+    _LOGGER.info("Dongle émulé sur %s%s", path, f" (lien {link})" if link else "")
+    os.set_blocking(master, False)
+
+    loop = asyncio.get_running_loop()
+
+    def _on_readable() -> None:
+        try:
+            chunk = os.read(master, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            # EIO : aucun processus n'a le pty ouvert pour l'instant
+            return
+        emulator.feed(chunk)
+
+    def _write(frame: bytes) -> None:
+        try:
+            os.write(master, frame)
+        except BlockingIOError:
+            # Tampon du pty plein : personne ne lit, la trame est perdue (comme à la radio)
+            pass
+
+    loop.add_reader(master, _on_readable)
+    emulator.attach(_write)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        loop.remove_reader(master)
+        os.close(master)
+        os.close(slave)
+        if link and os.path.islink(link):
+            os.unlink(link)
+
+
+async def serve_tcp(emulator: Esp3Emulator, host: str, port: int) -> None:
+    """Expose l'émulateur en ESP3 brut sur TCP (cf. transport tcp:// de l'intégration)."""
+
+    async def _client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        _LOGGER.info("Client connecté : %s", peer)
+        emulator.attach(writer.write)
+        try:
+            while chunk := await reader.read(4096):
+                emulator.feed(chunk)
+        finally:
+            emulator.detach(writer.write)
+            writer.close()
+            _LOGGER.info("Client déconnecté : %s", peer)
+
+    server = await asyncio.start_server(_client, host, port)
+    _LOGGER.info("Dongle émulé sur tcp://%s:%d", host, port)
+    async with server:
+        await server.serve_forever()
+
+
+# ---------------------------------------------------------------------------
+# Ligne de commande
+# ---------------------------------------------------------------------------
+def _parse_actuator(value: str) -> Actuator:
+    """'05979CFA' ou '05979CFA:2' (ID hexadécimal, nombre de canaux)."""
+    sender, _, channels = value.partition(":")
+    return Actuator(int(sender.replace(":", ""), 16), int(channels or 1))
+
+
+def _parse_sensors(value: str) -> dict[str, int]:
+    """'temp:50,power:5,rocker:5'."""
+    out: dict[str, int] = {}
+    for item in filter(None, value.split(",")):
+        kind, _, count = item.partition(":")
+        if kind not in SENSOR_KINDS:
+            raise argparse.ArgumentTypeError(f"type de capteur inconnu : {kind}")
+        out[kind] = int(count or 1)
+    return out
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Faux dongle EnOcean ESP3 (pty ou TCP).")
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument("--pty", action="store_true", help="exposer un pseudo-terminal")
+    transport.add_argument("--tcp", metavar="HÔTE:PORT", help="exposer un serveur TCP")
+    parser.add_argument("--link", help="lien symbolique vers le pty (ex. /tmp/ttyENOCEAN)")
+    parser.add_argument("--base-id", default="FF800000", help="Base ID (hex, défaut FF800000)")
+    parser.add_argument("--actuator", action="append", type=_parse_actuator, default=[],
+                        help="actionneur D2-01 ID[:canaux] (répétable)")
+    parser.add_argument("--actuator-delay", type=float, default=0.02,
+                        help="délai (s) avant le statut CMD 0x04")
+    parser.add_argument("--loss", type=float, default=0.0,
+                        help="probabilité de perdre un statut (0–1)")
+    parser.add_argument("--sensors", type=_parse_sensors, default={},
+                        help="capteurs simulés, ex. temp:50,power:5,rocker:5")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="débit global des télégrammes capteurs (par seconde)")
+    parser.add_argument("--ute", type=int, default=0,
+                        help="nombre d'appareils émettant une requête de teach-in UTE")
+    parser.add_argument("--seed", type=int, help="graine aléatoire (reproductibilité)")
+    parser.add_argument("--stats", type=float, default=10.0,
+                        help="période (s) d'affichage des compteurs")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    emulator = Esp3Emulator(
+        base_id=int(args.base_id, 16),
+        actuators=args.actuator,
+        sensors=args.sensors,
+        rate=args.rate,
+        ute_devices=args.ute,
+        actuator_delay=args.actuator_delay,
+        loss=args.loss,
+        seed=args.seed,
+    )
+
+    async def _run() -> None:
+        if args.pty:
+            serve = serve_pty(emulator, args.link)
+        else:
+            host, _, port = args.tcp.rpartition(":")
+            serve = serve_tcp(emulator, host or "127.0.0.1", int(port))
+        tasks = [serve, emulator.run_sensors(), emulator.report(args.stats)]
+        if args.ute:
+            tasks.append(emulator.run_ute())
+        await asyncio.gather(*tasks)
+
+    started = time.monotonic()
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _LOGGER.info("Arrêt après %.0fs : %s", time.monotonic() - started, emulator.stats)
+
+
+if __name__ == "__main__":
+    main()